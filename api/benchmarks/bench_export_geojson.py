@@ -0,0 +1,133 @@
+"""
+Benchmark de l'export GeoJSON : chargement complet en mémoire (ancien
+/points/export/geojson) contre le flux par curseur serveur (stream_geojson).
+
+Mesure la durée et le pic de mémoire Python (tracemalloc) sur un jeu de
+points factices inséré pour l'occasion puis supprimé. À lancer sur une base
+de développement : l'insertion passe par les triggers (journal de sync).
+
+Usage: python benchmarks/bench_export_geojson.py [nombre_points ...]
+Exemple: python benchmarks/bench_export_geojson.py 10000 100000
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Ajouter le répertoire de l'API au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from database import AsyncSessionLocal, engine
+from services.point_export import stream_geojson
+
+DEFAULT_SIZES = [10000, 100000]
+BENCH_CODE = "BENCH_EXPORT"
+
+
+async def insert_fixture(count: int):
+    """Insère `count` points factices (autour de Toulouse) marqués BENCH_EXPORT."""
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            text("""
+                INSERT INTO geoclic_staging (name, type, lexique_code, geom_type, geom, comment, custom_properties)
+                SELECT 'Bench export ' || n, 'bench', :code, 'POINT',
+                       ST_SetSRID(ST_MakePoint(1.44 + random() * 0.1 - 0.05, 43.60 + random() * 0.1 - 0.05), 4326),
+                       'Relevé de benchmark',
+                       jsonb_build_object('Matériau', 'Acier', 'Hauteur', (n % 12) + 1)
+                FROM generate_series(1, :count) AS n
+            """),
+            {"code": BENCH_CODE, "count": count},
+        )
+        await session.commit()
+
+
+async def delete_fixture():
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            text("DELETE FROM geoclic_staging WHERE lexique_code = :code"), {"code": BENCH_CODE}
+        )
+        await session.commit()
+
+
+async def export_in_memory() -> int:
+    """Reproduit l'ancien export : toutes les lignes, liste de features, json.dumps."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text("""
+                SELECT id, name, type, subtype, lexique_code,
+                       condition_state, point_status, sync_status,
+                       comment, photos, custom_properties,
+                       materiau, hauteur, largeur,
+                       created_at, updated_at,
+                       ST_AsGeoJSON(geom)::json as geometry
+                FROM geoclic_staging
+                WHERE lexique_code = :code
+                ORDER BY created_at DESC
+            """),
+            {"code": BENCH_CODE},
+        )
+        features = []
+        for row in result.mappings().all():
+            properties = {
+                key: row[key] for key in (
+                    "name", "type", "subtype", "lexique_code", "condition_state",
+                    "point_status", "sync_status", "comment", "materiau",
+                    "hauteur", "largeur", "photos",
+                )
+            }
+            properties["created_at"] = row["created_at"].isoformat() if row["created_at"] else None
+            properties["updated_at"] = row["updated_at"].isoformat() if row["updated_at"] else None
+            for key, value in (row["custom_properties"] or {}).items():
+                properties[f"custom_{key}"] = value
+            features.append({
+                "type": "Feature", "id": str(row["id"]),
+                "geometry": row["geometry"], "properties": properties,
+            })
+        return len(json.dumps({"type": "FeatureCollection", "features": features}).encode())
+
+
+async def export_streamed() -> int:
+    size = 0
+    async for chunk in stream_geojson("lexique_code = :code", {"code": BENCH_CODE}):
+        size += len(chunk)
+    return size
+
+
+async def measure(export) -> tuple:
+    """(durée en secondes, pic mémoire Python en Mo, taille produite en Mo)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = await export()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6, size / 1e6
+
+
+async def main(sizes: list):
+    print(f"{'Points':>8} | {'Taille':>8} | {'Mémoire (s / Mo)':>18} | {'Flux (s / Mo)':>18}")
+    print("-" * 62)
+    for count in sizes:
+        await delete_fixture()
+        await insert_fixture(count)
+        try:
+            mem_time, mem_peak, size = await measure(export_in_memory)
+            stream_time, stream_peak, _ = await measure(export_streamed)
+        finally:
+            await delete_fixture()
+        print(
+            f"{count:>8} | {size:>6.1f}Mo | {mem_time:>7.2f} / {mem_peak:>8.1f} "
+            f"| {stream_time:>7.2f} / {stream_peak:>8.1f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    asyncio.run(main(sizes))
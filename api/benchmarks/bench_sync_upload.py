@@ -0,0 +1,156 @@
+"""
+Benchmark de l'upload de la synchronisation mobile : boucle point par point
+(un savepoint + un INSERT par point) contre l'INSERT groupé jsonb_to_recordset.
+
+Chaque mesure tourne dans une transaction annulée : la base n'est pas modifiée.
+
+Usage: python benchmarks/bench_sync_upload.py [taille_lot ...]
+Exemple: python benchmarks/bench_sync_upload.py 10 100 400 1000
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Tuple
+
+# Ajouter le répertoire de l'API au path pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal, engine
+from routers.sync import coords_to_wkt, upload_points_bulk
+from schemas.point import PointCreate
+
+DEFAULT_BATCH_SIZES = [10, 100, 400, 1000]
+REPEAT = 3
+
+
+async def upload_points_loop(db: AsyncSession, points: list, user_id: str) -> Tuple[list, list]:
+    """
+    Ancienne écriture de l'upload, gardée comme référence de mesure :
+    les points un par un (un savepoint + un INSERT par point).
+    """
+    errors = []
+    inserted_ids = []
+    for point in points:
+        try:
+            # Utiliser un savepoint pour isoler chaque INSERT
+            # Si un INSERT échoue, on rollback au savepoint sans affecter les autres
+            async with db.begin_nested():
+                point_id = str(uuid.uuid4())
+                wkt = coords_to_wkt(point.coordinates, point.geom_type.value)
+                photos_json = json.dumps([p.model_dump() for p in point.photos], default=str) if point.photos else "[]"
+                custom_props_json = json.dumps(point.custom_properties) if point.custom_properties else None
+
+                await db.execute(
+                    text("""
+                        INSERT INTO geoclic_staging (
+                            id, project_id, name, lexique_code, type, subtype,
+                            geom_type, geom, gps_precision, gps_source, altitude,
+                            condition_state, point_status, sync_status, comment,
+                            materiau, hauteur, largeur, date_installation,
+                            priorite, cout_remplacement, custom_properties,
+                            photos, color_value, icon_name, created_by
+                        ) VALUES (
+                            :id, :project_id, :name, :lexique_code, :type, :subtype,
+                            :geom_type, ST_GeomFromText(:wkt, 4326), :gps_precision, :gps_source, :altitude,
+                            :condition_state, :point_status, 'pending', :comment,
+                            :materiau, :hauteur, :largeur, :date_installation,
+                            :priorite, :cout_remplacement, CAST(:custom_properties AS jsonb),
+                            CAST(:photos AS jsonb), :color_value, :icon_name, :created_by
+                        )
+                    """),
+                    {
+                        "id": point_id,
+                        "project_id": point.project_id,
+                        "name": point.name,
+                        "lexique_code": point.lexique_code,
+                        "type": point.type,
+                        "subtype": point.subtype,
+                        "geom_type": point.geom_type.value,
+                        "wkt": wkt,
+                        "gps_precision": point.gps_precision,
+                        "gps_source": point.gps_source,
+                        "altitude": point.altitude,
+                        "condition_state": point.condition_state,
+                        "point_status": point.point_status,
+                        "comment": point.comment,
+                        "materiau": point.materiau,
+                        "hauteur": point.hauteur,
+                        "largeur": point.largeur,
+                        "date_installation": point.date_installation,
+                        "priorite": point.priorite,
+                        "cout_remplacement": point.cout_remplacement,
+                        "custom_properties": custom_props_json,
+                        "photos": photos_json,
+                        "color_value": point.color_value,
+                        "icon_name": point.icon_name,
+                        "created_by": user_id,
+                    },
+                )
+            inserted_ids.append(point_id)
+        except Exception as e:
+            errors.append(f"Erreur upload {point.name}: {str(e)}")
+    return inserted_ids, errors
+
+
+def make_points(count: int, project_id: str) -> list:
+    """Génère un lot de points terrain réalistes (autour de Toulouse)."""
+    return [
+        PointCreate(
+            name=f"Bench point {i}",
+            type="bench",
+            lexique_code="BENCH",
+            project_id=project_id,
+            coordinates=[{
+                "latitude": 43.60 + random.uniform(-0.05, 0.05),
+                "longitude": 1.44 + random.uniform(-0.05, 0.05),
+            }],
+            gps_precision=random.uniform(1, 5),
+            comment="Relevé de benchmark",
+            custom_properties={"Matériau": "Acier", "Hauteur": 6},
+        )
+        for i in range(count)
+    ]
+
+
+async def measure(upload, points: list, user_id: str) -> float:
+    """Durée (secondes) de l'upload d'un lot, dans une transaction annulée."""
+    async with AsyncSessionLocal() as session:
+        start = time.perf_counter()
+        inserted_ids, errors = (await upload(session, points, user_id))[:2]
+        elapsed = time.perf_counter() - start
+        await session.rollback()
+    if errors or len(inserted_ids) != len(points):
+        raise RuntimeError(f"{upload.__name__}: {len(inserted_ids)}/{len(points)} points, erreurs: {errors[:3]}")
+    return elapsed
+
+
+async def main(batch_sizes: list):
+    async with AsyncSessionLocal() as session:
+        user_id = (await session.execute(text("SELECT id FROM geoclic_users LIMIT 1"))).scalar()
+        project_id = (await session.execute(text("SELECT id FROM projects LIMIT 1"))).scalar()
+    if not user_id:
+        print("❌ Aucun utilisateur dans geoclic_users")
+        return
+
+    print(f"{'Lot':>6} | {'Boucle (ms)':>12} | {'Groupé (ms)':>12} | {'Gain':>6}")
+    print("-" * 46)
+    for size in batch_sizes:
+        points = make_points(size, str(project_id) if project_id else None)
+        loop_time = min([await measure(upload_points_loop, points, str(user_id)) for _ in range(REPEAT)])
+        bulk_time = min([await measure(upload_points_bulk, points, str(user_id)) for _ in range(REPEAT)])
+        print(f"{size:>6} | {loop_time * 1000:>12.1f} | {bulk_time * 1000:>12.1f} | {loop_time / bulk_time:>5.1f}x")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_BATCH_SIZES
+    asyncio.run(main(sizes))
@@ -73,6 +73,27 @@ class Settings(BaseSettings):
     max_photo_size_mb: int = 10
     photo_thumbnail_size: int = 300
 
+    # Exports asynchrones (jobs d'export, fichiers résultats)
+    export_storage_path: str = "/app/storage/exports"
+    export_workers: int = 2  # Exports simultanés par worker uvicorn
+    export_job_ttl_hours: int = 24
+
+    # Cache des tuiles vectorielles (disque partagé + LRU mémoire par worker)
+    tile_cache_path: str = "/app/storage/tiles"
+    tile_cache_memory_mb: int = 64
+    # Âge maximal d'une tuile en cache : filet pour les écritures qui
+    # n'invalident pas (SQL direct, triggers)
+    tile_cache_ttl_seconds: int = 3600
+
+    # Cache des réponses publiques (GET anonymes du portail citoyen)
+    public_cache_enabled: bool = True
+    public_cache_memory_entries: int = 2048  # LRU par worker
+    # Redis ou compatible partagé par les workers (paquet redis requis), ex. redis://redis:6379/0
+    public_cache_redis_url: str = os.environ.get("PUBLIC_CACHE_REDIS_URL", "")
+
+    # Compteurs de scans des QR codes : écriture groupée en base (secondes)
+    scan_flush_interval_seconds: float = 5.0
+
     class Config:
         env_file = ".env"
         case_sensitive = False
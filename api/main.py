@@ -17,6 +17,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from contextlib import asynccontextmanager
+import asyncio
 from pathlib import Path
 import traceback
 import logging
@@ -116,7 +117,8 @@ def ensure_photo_directories():
 
 
 from database import engine, create_tables
-from routers import auth, points, lexique, projects, sync, photos, stats, users, champs, qrcodes, ogs, imports, postgis, sig, public, demandes, zones, services, push
+from services.scan_counter import run_scan_flusher
+from routers import auth, points, lexique, projects, sync, photos, stats, users, champs, qrcodes, ogs, imports, postgis, sig, public, demandes, zones, services, push, exports
 from routers import settings as settings_router
 
 
@@ -132,9 +134,15 @@ async def lifespan(app: FastAPI):
     await create_tables()
     logger.info("Base de données connectée")
     ensure_photo_directories()
+    # Écriture groupée des compteurs de scans QR
+    scan_flusher_stop = asyncio.Event()
+    scan_flusher = asyncio.create_task(run_scan_flusher(scan_flusher_stop))
     yield
     # Arrêt
     logger.info("GéoClic Suite V14 API - Arrêt...")
+    # Écrire les derniers scans QR avant de fermer les connexions
+    scan_flusher_stop.set()
+    await scan_flusher
     await engine.dispose()
 
 
@@ -275,6 +283,7 @@ app.include_router(zones.router, prefix="/api/zones", tags=["Zones géographique
 app.include_router(settings_router.router, prefix="/api/settings", tags=["Paramètres système"])
 app.include_router(services.router, prefix="/api/services", tags=["GeoClic Services"])
 app.include_router(push.router, prefix="/api/push", tags=["Notifications Push"])
+app.include_router(exports.router, prefix="/api/exports", tags=["Exports"])
 
 
 @app.get("/", tags=["Health"])
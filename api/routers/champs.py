@@ -12,6 +12,7 @@ import json
 
 from database import get_db
 from routers.auth import get_current_user
+from services.lexique_version import invalidate_lexique_version
 
 router = APIRouter()
 
@@ -220,6 +221,7 @@ async def create_champ(
     )
 
     await db.commit()
+    invalidate_lexique_version()
     row = result.mappings().first()
 
     return ChampResponse(
@@ -335,6 +337,7 @@ async def update_champ(
         params,
     )
     await db.commit()
+    invalidate_lexique_version()
     row = result.mappings().first()
 
     if not row:
@@ -385,6 +388,7 @@ async def delete_champ(
         {"id": champ_id},
     )
     await db.commit()
+    invalidate_lexique_version()
 
     if not result.first():
         raise HTTPException(status_code=404, detail="Champ non trouvé")
@@ -406,5 +410,6 @@ async def reorder_champs(
             {"id": int(item["id"]), "ordre": item["ordre"]},
         )
     await db.commit()
+    invalidate_lexique_version()
 
     return {"success": True}
@@ -11,11 +11,11 @@ Endpoints:
 - /api/demandes/stats - Statistiques
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, UploadFile, File, Request
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime, date, timedelta
 from pathlib import Path
 from PIL import Image
@@ -36,6 +36,11 @@ from services.notifications import (
     schedule_intervention_reminder,
 )
 from config import settings
+from services.map_clusters import bbox_condition, fetch_clusters, snap_bbox, use_clusters
+from services.response_cache import cached_response, invalidate_public_cache
+from services.vector_tiles import (
+    DEMANDES_LAYER, invalidate_rows, layer_bounds, render_tile, tile_response,
+)
 from schemas.demandes import (
     # Catégories
     CategorieCreate, CategorieUpdate, CategorieResponse, CategorieArbre,
@@ -261,6 +266,7 @@ async def create_category(
         })
 
         await db.commit()
+        await invalidate_public_cache("demandes")
         row = result.fetchone()
 
         return CategorieResponse(
@@ -331,6 +337,7 @@ async def update_category(
 
         if not row:
             raise HTTPException(status_code=404, detail="Catégorie non trouvée")
+        await invalidate_public_cache("demandes")
 
         return CategorieResponse(
             id=str(row.id),
@@ -385,6 +392,7 @@ async def delete_category(
 
     if not result.fetchone():
         raise HTTPException(status_code=404, detail="Catégorie non trouvée")
+    await invalidate_public_cache("demandes")
 
     return {"success": True, "deleted_id": category_id}
 
@@ -660,6 +668,7 @@ async def create_demande_backoffice(
 
         await db.commit()
         row = result.fetchone()
+        await invalidate_rows(db, DEMANDES_LAYER, [row.id])
 
         # Créer l'entrée historique avec l'agent
         agent_name = f"{current_user.get('prenom', '')} {current_user.get('nom', '')}".strip() or current_user.get('email', 'Agent')
@@ -813,6 +822,7 @@ async def update_demande_backoffice(
     updates["demande_id"] = demande_id
 
     query = f"UPDATE demandes_citoyens SET {', '.join(set_clauses)} WHERE id = CAST(:demande_id AS uuid)"
+    previous_bounds = await layer_bounds(db, DEMANDES_LAYER, [demande_id])
 
     try:
         await db.execute(text(query), updates)
@@ -831,6 +841,7 @@ async def update_demande_backoffice(
             "commentaire": commentaire,
         })
         await db.commit()
+        await invalidate_rows(db, DEMANDES_LAYER, [demande_id], previous_bounds)
 
         # Retourner la demande mise à jour
         result = await db.execute(text("""
@@ -957,6 +968,7 @@ async def create_demande_public(
 
         await db.commit()
         row = result.fetchone()
+        await invalidate_rows(db, DEMANDES_LAYER, [row.id])
 
         # Créer l'entrée historique
         await db.execute(text("""
@@ -1087,78 +1099,223 @@ async def get_demande_historique_public(
 # CARTE PUBLIQUE - Affichage des demandes sur la carte du portail citoyen
 # ═══════════════════════════════════════════════════════════════════════════════
 
+# Couleur des marqueurs selon le statut
+STATUT_COLORS = {
+    "nouveau": "#ef4444",      # Rouge
+    "en_moderation": "#f97316",# Orange-Rouge
+    "envoye": "#0ea5e9",       # Bleu ciel
+    "accepte": "#22c55e",      # Vert
+    "en_cours": "#f59e0b",     # Orange
+    "planifie": "#3b82f6",     # Bleu
+    "traite": "#22c55e",       # Vert
+    "rejete": "#6b7280",       # Gris
+    "cloture": "#10b981",      # Vert émeraude
+}
+
+# Fraîcheur de la carte publique dans le cache des réponses (secondes)
+CARTE_CACHE_TTL_SECONDS = 30
+
+# Source des regroupements de demandes (services/map_clusters.py)
+CARTE_CLUSTER_SOURCE = """
+    SELECT d.id, d.geom AS pt, COALESCE(c.nom, 'Non catégorisé') AS category
+    FROM demandes_citoyens d
+    LEFT JOIN demandes_categories c ON d.categorie_id = c.id
+    WHERE {where_sql}
+"""
+
+
+def _carte_uuid(name: str, value: Optional[str]) -> Optional[str]:
+    """Identifiant d'un filtre de la carte publique ; 400 s'il n'est pas un UUID."""
+    if not value:
+        return None
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} invalide")
+
+
+def _carte_bbox(
+    min_lng: Optional[float], min_lat: Optional[float],
+    max_lng: Optional[float], max_lat: Optional[float],
+    zoom: Optional[int],
+) -> Optional[tuple]:
+    """Emprise alignée sur les tuiles du zoom (clé de cache partagée entre vues voisines)."""
+    bbox = (min_lng, min_lat, max_lng, max_lat)
+    return snap_bbox(bbox, zoom) if None not in bbox else None
+
+
+def _carte_conditions(
+    bbox: Optional[tuple],
+    categorie_id: Optional[str] = None,
+    project_id: Optional[str] = None,
+) -> Tuple[str, dict]:
+    """Filtres de la carte publique (90 derniers jours, emprise, catégorie, projet)."""
+    conditions = [
+        "d.geom IS NOT NULL",
+        "d.created_at >= NOW() - INTERVAL '90 days'",
+    ]
+    params = {}
+
+    if project_id:
+        conditions.append("d.project_id = CAST(:project_id AS uuid)")
+        params["project_id"] = project_id
+
+    if categorie_id:
+        conditions.append("""(
+            d.categorie_id = CAST(:categorie_id AS uuid)
+            OR d.categorie_id IN (SELECT id FROM demandes_categories WHERE parent_id = CAST(:categorie_id AS uuid))
+        )""")
+        params["categorie_id"] = categorie_id
+
+    bbox_sql = bbox_condition("d.geom", bbox, params)
+    if bbox_sql:
+        conditions.append(bbox_sql)
+
+    return " AND ".join(conditions), params
+
+
+def _cluster_feature(cluster: dict) -> dict:
+    """Regroupement de demandes sous forme de Feature GeoJSON."""
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [cluster["longitude"], cluster["latitude"]]
+        },
+        "properties": {
+            "cluster": True,
+            "count": cluster["count"],
+            "categories": cluster["categories"] or {},
+            "bounds": [cluster["min_lng"], cluster["min_lat"], cluster["max_lng"], cluster["max_lat"]],
+            "id": cluster["id"],
+        }
+    }
+
+
 @router.get("/public/carte/demandes")
 async def get_demandes_carte_public(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    min_lat: Optional[float] = Query(None),
+    max_lat: Optional[float] = Query(None),
+    min_lng: Optional[float] = Query(None),
+    max_lng: Optional[float] = Query(None),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Zoom de la carte : regroupement en dessous du zoom rue"),
+    categorie_id: Optional[str] = Query(None, description="Catégorie (sous-catégories incluses)"),
+    project_id: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=2000),
 ):
     """
     Récupère les demandes pour affichage sur la carte publique du portail citoyen.
     Retourne un GeoJSON avec les demandes des 90 derniers jours (position, catégorie, statut).
     Aucune authentification requise - données anonymisées.
+
+    - Emprise (min/max lat/lng) filtrée par l'index GiST de demandes_citoyens.geom
+    - Sous le zoom rue, les demandes sont regroupées par maille (features
+      `cluster`, avec nombre et répartition par catégorie)
+    - Réponses servies par le cache des réponses publiques (étiquette
+      "demandes", invalidée à chaque écriture) avec ETag : un client à jour
+      reçoit un 304. L'emprise est étendue aux tuiles du zoom avant filtrage
+      et calcul de la clé, pour que les vues voisines partagent l'entrée
     """
-    # Récupérer les demandes des 90 derniers jours avec coordonnées valides
-    result = await db.execute(text("""
-        SELECT
-            d.id,
-            d.numero_suivi,
-            d.statut,
-            d.created_at,
-            d.photos,
-            c.nom AS categorie_nom,
-            c.icone AS categorie_icone,
-            c.couleur AS categorie_couleur,
-            ST_X(d.geom::geometry) AS longitude,
-            ST_Y(d.geom::geometry) AS latitude
-        FROM demandes_citoyens d
-        LEFT JOIN demandes_categories c ON d.categorie_id = c.id
-        WHERE d.geom IS NOT NULL
-          AND d.created_at >= NOW() - INTERVAL '90 days'
-        ORDER BY d.created_at DESC
-        LIMIT 500
-    """))
+    categorie_id = _carte_uuid("categorie_id", categorie_id)
+    project_id = _carte_uuid("project_id", project_id)
+    bbox = _carte_bbox(min_lng, min_lat, max_lng, max_lat, zoom)
 
-    rows = result.fetchall()
+    async def build(db: AsyncSession):
+        where_sql, params = _carte_conditions(bbox, categorie_id, project_id)
 
-    # Construire le GeoJSON
-    features = []
-    for row in rows:
-        # Couleur selon le statut
-        statut_colors = {
-            "nouveau": "#ef4444",      # Rouge
-            "en_moderation": "#f97316",# Orange-Rouge
-            "envoye": "#0ea5e9",       # Bleu ciel
-            "accepte": "#22c55e",      # Vert
-            "en_cours": "#f59e0b",     # Orange
-            "planifie": "#3b82f6",     # Bleu
-            "traite": "#22c55e",       # Vert
-            "rejete": "#6b7280",       # Gris
-            "cloture": "#10b981",      # Vert émeraude
+        if use_clusters(zoom):
+            clusters = await fetch_clusters(db, CARTE_CLUSTER_SOURCE.format(where_sql=where_sql), params, zoom)
+            features = [_cluster_feature(cluster) for cluster in clusters]
+        else:
+            result = await db.execute(text(f"""
+                SELECT
+                    d.id,
+                    d.numero_suivi,
+                    d.statut,
+                    d.created_at,
+                    d.photos,
+                    c.nom AS categorie_nom,
+                    c.icone AS categorie_icone,
+                    c.couleur AS categorie_couleur,
+                    ST_X(d.geom::geometry) AS longitude,
+                    ST_Y(d.geom::geometry) AS latitude
+                FROM demandes_citoyens d
+                LEFT JOIN demandes_categories c ON d.categorie_id = c.id
+                WHERE {where_sql}
+                ORDER BY d.created_at DESC
+                LIMIT {limit}
+            """), params)
+
+            # Construire le GeoJSON
+            features = []
+            for row in result.fetchall():
+                feature = {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [row.longitude, row.latitude]
+                    },
+                    "properties": {
+                        "id": str(row.id),
+                        "numero_suivi": row.numero_suivi,
+                        "statut": row.statut,
+                        "statut_color": STATUT_COLORS.get(row.statut, "#6b7280"),
+                        "categorie_nom": row.categorie_nom or "Non catégorisé",
+                        "categorie_icone": row.categorie_icone or "📍",
+                        "categorie_couleur": row.categorie_couleur or "#6b7280",
+                        "created_at": row.created_at.isoformat() if row.created_at else None,
+                        "photos": row.photos if row.photos else [],
+                    }
+                }
+                features.append(feature)
+
+        return {
+            "type": "FeatureCollection",
+            "features": features
         }
 
-        feature = {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [row.longitude, row.latitude]
-            },
-            "properties": {
-                "id": str(row.id),
-                "numero_suivi": row.numero_suivi,
-                "statut": row.statut,
-                "statut_color": statut_colors.get(row.statut, "#6b7280"),
-                "categorie_nom": row.categorie_nom or "Non catégorisé",
-                "categorie_icone": row.categorie_icone or "📍",
-                "categorie_couleur": row.categorie_couleur or "#6b7280",
-                "created_at": row.created_at.isoformat() if row.created_at else None,
-                "photos": row.photos if row.photos else [],
-            }
+    return await cached_response(
+        request, build, tags=["demandes"], ttl=CARTE_CACHE_TTL_SECONDS,
+        key_params={
+            "bbox": bbox, "zoom": zoom, "categorie_id": categorie_id,
+            "project_id": project_id, "limit": limit,
+        },
+    )
+
+
+@router.get("/public/carte/demandes/clusters")
+async def get_demandes_carte_clusters(
+    request: Request,
+    zoom: int = Query(..., ge=0, le=22),
+    min_lat: Optional[float] = Query(None),
+    max_lat: Optional[float] = Query(None),
+    min_lng: Optional[float] = Query(None),
+    max_lng: Optional[float] = Query(None),
+    project_id: Optional[str] = Query(None),
+):
+    """
+    Demandes des 90 derniers jours regroupées par maille pour la carte publique
+    (petits niveaux de zoom) : position moyenne, nombre et répartition par
+    catégorie de chaque regroupement. Aucune donnée du déclarant.
+    """
+    project_id = _carte_uuid("project_id", project_id)
+    bbox = _carte_bbox(min_lng, min_lat, max_lng, max_lat, zoom)
+
+    async def build(db: AsyncSession):
+        where_sql, params = _carte_conditions(bbox, project_id=project_id)
+        clusters = await fetch_clusters(db, CARTE_CLUSTER_SOURCE.format(where_sql=where_sql), params, zoom)
+
+        return {
+            "zoom": zoom,
+            "total": sum(c["count"] for c in clusters),
+            "clusters": clusters,
         }
-        features.append(feature)
 
-    return {
-        "type": "FeatureCollection",
-        "features": features
-    }
+    return await cached_response(
+        request, build, tags=["demandes"], ttl=CARTE_CACHE_TTL_SECONDS,
+        key_params={"bbox": bbox, "zoom": zoom, "project_id": project_id},
+    )
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1717,6 +1874,48 @@ async def create_template(
 # DEMANDES - API AGENTS
 # ═══════════════════════════════════════════════════════════════════════════════
 
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+async def get_demandes_tile(
+    z: int,
+    x: int,
+    y: int,
+    project_id: Optional[str] = Query(None, description="UUID du projet"),
+    statut: Optional[List[DemandeStatut]] = Query(None, description="Filtrer par statut(s)"),
+    categorie_id: Optional[str] = None,
+    priorite: Optional[DemandePriorite] = None,
+    fields: Optional[str] = Query(None, description="Attributs des demandes (séparés par des virgules)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Tuile vectorielle (MVT) des demandes.
+
+    `fields` choisit les attributs (par défaut id, numero_suivi, categorie_id,
+    statut, priorite) ; les coordonnées du déclarant ne sont jamais incluses.
+    """
+    conditions = []
+    params = {}
+
+    if project_id:
+        conditions.append("project_id = CAST(:project_id AS uuid)")
+        params["project_id"] = project_id
+
+    if statut:
+        conditions.append("statut = ANY(CAST(:statuts AS text[]))")
+        params["statuts"] = [s.value for s in statut]
+
+    if categorie_id:
+        conditions.append("categorie_id = CAST(:categorie_id AS uuid)")
+        params["categorie_id"] = categorie_id
+
+    if priorite:
+        conditions.append("priorite = :priorite")
+        params["priorite"] = priorite.value
+
+    tile = await render_tile(db, DEMANDES_LAYER, z, x, y, fields, conditions, params)
+    return tile_response(tile)
+
+
 @router.get("", response_model=DemandeListResponse)
 async def list_demandes(
     project_id: Optional[str] = Query(None, description="UUID du projet (optionnel si mono-projet)"),
@@ -2261,6 +2460,7 @@ async def assign_demande_to_service(
     })
 
     await db.commit()
+    await invalidate_rows(db, DEMANDES_LAYER, [demande_id])
 
     return {
         "success": True,
@@ -2797,6 +2997,7 @@ async def update_demande(
     })
 
     await db.commit()
+    await invalidate_rows(db, DEMANDES_LAYER, [demande_id])
 
     # Envoyer email si demandé ou si changement de statut important
     statuts_avec_notif = ["envoye", "en_cours", "accepte", "planifie", "traite", "rejete"]
@@ -3801,6 +4002,7 @@ async def marquer_comme_doublon(
     })
 
     await db.commit()
+    await invalidate_rows(db, DEMANDES_LAYER, [demande_id])
 
     return {
         "success": True,
@@ -3855,6 +4057,7 @@ async def dissocier_doublon(
     })
 
     await db.commit()
+    await invalidate_rows(db, DEMANDES_LAYER, [demande_id])
 
     return {
         "success": True,
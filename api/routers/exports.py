@@ -0,0 +1,115 @@
+"""
+Router des exports asynchrones.
+Lancement, suivi et téléchargement des jobs d'export (services/export_jobs.py).
+"""
+
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from routers.auth import get_current_user
+from schemas.export import ExportJobCreate, ExportJobResponse
+from services.export_jobs import get_export_job, submit_export
+
+router = APIRouter()
+
+
+def check_export_access(job: dict, current_user: dict) -> None:
+    """Un export n'est visible que de son auteur (et des administrateurs data)."""
+    if current_user.get("is_super_admin") or current_user.get("role_data") == "admin":
+        return
+    if str(job.get("created_by")) != str(current_user.get("id")):
+        # 404 plutôt que 403 : ne pas révéler l'existence de l'export d'un autre
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export non trouvé")
+
+
+def job_to_response(job: dict, cached: bool = False) -> ExportJobResponse:
+    """Convertit une ligne export_jobs en réponse API."""
+    total = job.get("progress_total")
+    progress = None
+    if total:
+        progress = min(job["progress_done"] / total, 1.0)
+    elif job["status"] == "done":
+        progress = 1.0
+
+    return ExportJobResponse(
+        id=str(job["id"]),
+        kind=job["kind"],
+        status=job["status"],
+        progress_done=job["progress_done"],
+        progress_total=total,
+        progress=progress,
+        bytes_written=job["bytes_written"],
+        filename=job.get("filename"),
+        error=job.get("error"),
+        cached=cached,
+        download_url=f"/api/exports/{job['id']}/download" if job["status"] == "done" else None,
+        created_at=job["created_at"],
+        finished_at=job.get("finished_at"),
+        expires_at=job.get("expires_at"),
+    )
+
+
+@router.post("", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_export(
+    export: ExportJobCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Lance un export en arrière-plan.
+
+    `params` reprend les paramètres de l'endpoint d'export correspondant
+    (filtres des points, PhotoExportRequest, BatchQRRequest). Si le même
+    export existe déjà sur des données inchangées, il est retourné
+    (`cached`: true) au lieu d'être recalculé.
+    """
+    job, cached = await submit_export(db, export.kind.value, export.params, current_user.get("id"))
+    return job_to_response(job, cached=cached)
+
+
+@router.get("/{job_id}", response_model=ExportJobResponse)
+async def get_export(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Retourne l'état et la progression d'un export."""
+    job = await get_export_job(db, job_id)
+    check_export_access(job, current_user)
+    return job_to_response(job)
+
+
+@router.get("/{job_id}/download")
+async def download_export(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Télécharge le résultat d'un export terminé.
+
+    Les requêtes Range sont prises en charge : un téléchargement interrompu
+    reprend là où il s'est arrêté.
+    """
+    job = await get_export_job(db, job_id)
+    check_export_access(job, current_user)
+    if job["status"] != "done":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export non terminé (statut: {job['status']})",
+        )
+
+    file_path = Path(job["file_path"])
+    if not file_path.exists():
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Fichier d'export expiré")
+
+    return FileResponse(
+        file_path,
+        media_type=job["media_type"],
+        filename=job["filename"],
+        headers={"Cache-Control": "private, max-age=3600"},
+    )
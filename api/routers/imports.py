@@ -19,6 +19,7 @@ import uuid
 
 from database import get_db
 from routers.auth import get_current_user
+from services.vector_tiles import POINTS_LAYER, invalidate_rows
 
 router = APIRouter()
 
@@ -392,6 +393,7 @@ async def execute_import(
     skipped = 0
     errors = 0
     error_details = []
+    imported_ids = []
 
     for i, row in enumerate(rows):
         try:
@@ -556,6 +558,7 @@ async def execute_import(
                 }
             )
             imported += 1
+            imported_ids.append(point_id)
 
         except ValueError as e:
             errors += 1
@@ -565,6 +568,7 @@ async def execute_import(
             error_details.append(f"Ligne {i+1}: Erreur inattendue - {str(e)}")
 
     await db.commit()
+    await invalidate_rows(db, POINTS_LAYER, imported_ids)
 
     return ImportResult(
         success=errors == 0,
@@ -9,6 +9,8 @@ from typing import List
 
 from database import get_db
 from routers.auth import get_current_user
+from services.lexique_version import invalidate_lexique_version
+from services.response_cache import invalidate_public_cache
 from schemas.lexique import (
     LexiqueCreate,
     LexiqueUpdate,
@@ -30,7 +32,7 @@ async def list_lexique(
     if project_id:
         result = await db.execute(
             text("""
-                SELECT l.*, get_lexique_path(l.code) as full_path
+                SELECT l.*
                 FROM lexique l
                 WHERE l.is_active = TRUE AND l.project_id = :project_id
                 ORDER BY l.level, l.display_order, l.label
@@ -40,7 +42,7 @@ async def list_lexique(
     else:
         result = await db.execute(
             text("""
-                SELECT l.*, get_lexique_path(l.code) as full_path
+                SELECT l.*
                 FROM lexique l
                 WHERE l.is_active = TRUE
                 ORDER BY l.level, l.display_order, l.label
@@ -81,7 +83,7 @@ async def get_lexique_tree(
         # Récupérer les racines du projet
         roots_result = await db.execute(
             text("""
-                SELECT l.*, get_lexique_path(l.code) as full_path
+                SELECT l.*
                 FROM lexique l
                 WHERE l.parent_code IS NULL AND l.is_active = TRUE AND l.project_id = :project_id
                 ORDER BY l.display_order, l.label
@@ -106,7 +108,7 @@ async def get_lexique_tree(
     else:
         roots_result = await db.execute(
             text("""
-                SELECT l.*, get_lexique_path(l.code) as full_path
+                SELECT l.*
                 FROM lexique l
                 WHERE l.parent_code IS NULL AND l.is_active = TRUE
                 ORDER BY l.display_order, l.label
@@ -312,7 +314,7 @@ async def get_lexique_entry(
     if project_id:
         result = await db.execute(
             text("""
-                SELECT l.*, get_lexique_path(l.code) as full_path
+                SELECT l.*
                 FROM lexique l
                 WHERE l.code = :code AND l.project_id = :project_id
             """),
@@ -321,7 +323,7 @@ async def get_lexique_entry(
     else:
         result = await db.execute(
             text("""
-                SELECT l.*, get_lexique_path(l.code) as full_path
+                SELECT l.*
                 FROM lexique l
                 WHERE l.code = :code
             """),
@@ -400,7 +402,7 @@ async def create_lexique_entry(
                 :triggers_form, :form_type_ref, :icon_name, :color_value,
                 :is_active, CAST(:metadata AS jsonb)
             )
-            RETURNING *, get_lexique_path(code) as full_path
+            RETURNING *
         """),
         {
             "code": entry.code,
@@ -418,6 +420,8 @@ async def create_lexique_entry(
         },
     )
     await db.commit()
+    invalidate_lexique_version()
+    await invalidate_public_cache("lexique")
     row = result.mappings().first()
 
     return LexiqueResponse(
@@ -473,11 +477,13 @@ async def update_lexique_entry(
             UPDATE lexique
             SET {', '.join(set_clauses)}
             WHERE {where_clause}
-            RETURNING *, get_lexique_path(code) as full_path
+            RETURNING *
         """),
         params,
     )
     await db.commit()
+    invalidate_lexique_version()
+    await invalidate_public_cache("lexique")
     row = result.mappings().first()
 
     if not row:
@@ -616,6 +622,8 @@ async def delete_lexique_entry(
     deleted_entries = lexique_result.fetchall()
 
     await db.commit()
+    invalidate_lexique_version()
+    await invalidate_public_cache("lexique")
 
     return {
         "success": True,
@@ -644,5 +652,7 @@ async def reorder_lexique(
             {"id": item["id"], "ordre": item["ordre"]},
         )
     await db.commit()
+    invalidate_lexique_version()
+    await invalidate_public_cache("lexique")
 
     return {"success": True}
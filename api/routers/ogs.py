@@ -13,6 +13,7 @@ import re
 
 from database import get_db
 from routers.auth import get_current_user
+from services.vector_tiles import POINTS_LAYER, invalidate_rows
 
 router = APIRouter()
 
@@ -133,10 +134,9 @@ async def get_ogs_status(
                 COUNT(DISTINCT p.id) as point_count,
                 MAX(p.updated_at) as last_update
             FROM lexique l
-            LEFT JOIN geoclic_staging p ON (
-                p.lexique_code = l.code
-                OR p.lexique_code LIKE l.code || '%'
-            ) AND p.sync_status = 'validated'
+            LEFT JOIN geoclic_staging p ON
+                p.lexique_path @> ARRAY[l.code::text]
+                AND p.sync_status = 'validated'
             WHERE l.is_active = TRUE AND l.level = 0
             GROUP BY l.code, l.label
             ORDER BY l.label
@@ -231,8 +231,9 @@ async def publish_to_ogs(
 
     # Construire la condition WHERE pour les points
     if request.include_children:
-        where_condition = "lexique_code = :code OR lexique_code LIKE :code_pattern"
-        params = {"code": lexique_code, "code_pattern": f"{lexique_code}_%"}
+        # Sous-arbre de la catégorie : chemin matérialisé (migration 036)
+        where_condition = "lexique_path @> ARRAY[CAST(:code AS text)]"
+        params = {"code": lexique_code}
     else:
         where_condition = "lexique_code = :code"
         params = {"code": lexique_code}
@@ -423,18 +424,22 @@ async def publish_to_ogs(
             points_published += 1
 
     # Mettre à jour le statut des points publiés
-    await db.execute(
+    published = await db.execute(
         text(f"""
             UPDATE geoclic_staging
             SET sync_status = 'synced',
                 ogs_published_at = CURRENT_TIMESTAMP,
                 ogs_table_name = :table_name
             WHERE ({where_condition}) AND sync_status = 'validated'
+            RETURNING id
         """),
         {**params, "table_name": table_name}
     )
+    published_ids = [row[0] for row in published.fetchall()]
 
     await db.commit()
+    # sync_status est un attribut des tuiles de points
+    await invalidate_rows(db, POINTS_LAYER, published_ids)
 
     return OGSPublishResponse(
         success=True,
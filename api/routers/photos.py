@@ -8,21 +8,25 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import AsyncIterator, Callable, List, Optional
 from pydantic import BaseModel
 import uuid
 import os
 import json
 import csv
-import zipfile
 import tempfile
 from PIL import Image
 import io
 
-from database import get_db
+from database import get_db, AsyncSessionLocal
 from routers.auth import get_current_user
 from config import settings
 from schemas.photo import PhotoMetadata, PhotoUploadResponse
+from services.point_export import photo_file_path
+from services.point_filters import compile_point_filters, join_conditions
+from schemas.export import ExportKind
+from services.zip_stream import ZipStream
+from services.export_jobs import ExportProgress, ExportSpec, register_exporter
 
 
 # === Schémas pour l'export ===
@@ -378,7 +382,9 @@ async def delete_photo(
 
 # === Export de photos ===
 
-MAX_PHOTOS_EXPORT = 500
+# L'archive est émise en flux (services/zip_stream.py) : la limite borne la
+# durée d'une requête, plus la mémoire du worker
+MAX_PHOTOS_EXPORT = 20000
 
 
 async def get_photos_for_export(
@@ -389,23 +395,14 @@ async def get_photos_for_export(
 ) -> List[dict]:
     """Récupère les photos et leurs métadonnées pour l'export."""
 
-    # Construire la requête dynamiquement
-    conditions = ["photos IS NOT NULL", "jsonb_array_length(photos) > 0"]
-    params = {}
-
-    if point_ids and len(point_ids) > 0:
-        conditions.append("id::text = ANY(:point_ids)")
-        params["point_ids"] = point_ids
-
-    if project_id:
-        conditions.append("project_id = :project_id")
-        params["project_id"] = project_id
-
-    if lexique_code:
-        conditions.append("lexique_code = :lexique_code")
-        params["lexique_code"] = lexique_code
-
-    where_clause = " AND ".join(conditions)
+    # Filtres communs des points (services/point_filters.py)
+    conditions, params = compile_point_filters(
+        project_id=project_id,
+        lexique_code=lexique_code,
+        point_ids=point_ids,
+    )
+    conditions += ["photos IS NOT NULL", "jsonb_array_length(photos) > 0"]
+    where_clause = join_conditions(conditions)
 
     query = f"""
         SELECT
@@ -444,6 +441,31 @@ async def get_photos_for_export(
     return all_photos
 
 
+async def photos_data_version(db: AsyncSession, request: PhotoExportRequest) -> str:
+    """
+    Version d'un export de photos : empreinte des points exportés (photos et
+    métadonnées reprises dans l'archive).
+    """
+    conditions, params = compile_point_filters(
+        project_id=request.project_id,
+        lexique_code=request.lexique_code,
+        point_ids=request.point_ids,
+    )
+    conditions += ["photos IS NOT NULL", "jsonb_array_length(photos) > 0"]
+    result = await db.execute(
+        text(f"""
+            SELECT md5(COALESCE(string_agg(t::text, ',' ORDER BY t.id), ''))
+            FROM (
+                SELECT id, name, lexique_code, project_id, geom, created_at, photos
+                FROM geoclic_staging
+                WHERE {join_conditions(conditions)}
+            ) t
+        """),
+        params,
+    )
+    return result.scalar()
+
+
 @router.post("/export/info", response_model=PhotoExportInfo)
 async def get_export_info(
     request: PhotoExportRequest,
@@ -479,6 +501,105 @@ async def get_export_info(
     )
 
 
+async def stream_photos_zip(
+    photos_data: List[dict],
+    filters: dict,
+    progress: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Émet l'archive des photos en flux : photos originales (stockées sans
+    recompression), puis metadata.csv et metadata.json.
+
+    `progress` reçoit 1 par photo traitée (jobs d'export).
+    """
+    archive = ZipStream()
+
+    # Tracking pour les doublons de noms
+    filename_counts = {}
+
+    # Préparer les métadonnées
+    metadata_list = []
+
+    for item in photos_data:
+        if progress:
+            progress(1)
+        photo = item["photo"]
+        photo_url = photo.get("url", "")
+        original_filename = photo.get("filename", "photo.jpg")
+
+        # Gérer les doublons de noms
+        if original_filename in filename_counts:
+            filename_counts[original_filename] += 1
+            name_parts = original_filename.rsplit(".", 1)
+            if len(name_parts) == 2:
+                final_filename = f"{name_parts[0]}_{filename_counts[original_filename]}.{name_parts[1]}"
+            else:
+                final_filename = f"{original_filename}_{filename_counts[original_filename]}"
+        else:
+            filename_counts[original_filename] = 1
+            final_filename = original_filename
+
+        # Extraire le chemin physique depuis l'URL
+        # URL format: /api/photos/2025/01/uuid.jpg
+        file_path = photo_file_path(photo_url)
+        if file_path is None:
+            continue
+
+        # Ajouter la photo au ZIP (lecture dans un thread)
+        try:
+            async for chunk in archive.add_file(final_filename, file_path):
+                yield chunk
+        except OSError:
+            continue
+
+        # Ajouter aux métadonnées
+        metadata_list.append({
+            "filename": final_filename,
+            "original_filename": original_filename,
+            "point_id": item["point_id"],
+            "point_name": item["point_name"],
+            "lexique_code": item["lexique_code"] or "",
+            "project_id": item["project_id"] or "",
+            "latitude": item["latitude"],
+            "longitude": item["longitude"],
+            "date_photo": photo.get("taken_at", ""),
+            "date_point": str(item["point_created_at"]) if item["point_created_at"] else "",
+            "gps_lat_photo": photo.get("gps_lat"),
+            "gps_lng_photo": photo.get("gps_lng"),
+            "gps_accuracy": photo.get("gps_accuracy"),
+            "device_model": photo.get("device_model", ""),
+            "comment": photo.get("comment", ""),
+        })
+
+    # Créer metadata.csv
+    if metadata_list:
+        csv_buffer = io.StringIO()
+        fieldnames = [
+            "filename", "original_filename", "point_id", "point_name",
+            "lexique_code", "project_id", "latitude", "longitude",
+            "date_photo", "date_point", "gps_lat_photo", "gps_lng_photo",
+            "gps_accuracy", "device_model", "comment"
+        ]
+        writer = csv.DictWriter(csv_buffer, fieldnames=fieldnames, delimiter=";")
+        writer.writeheader()
+        for row in metadata_list:
+            writer.writerow(row)
+
+        yield archive.add_bytes("metadata.csv", csv_buffer.getvalue())
+
+    # Créer metadata.json
+    export_date = datetime.now().isoformat()
+    json_data = {
+        "export_date": export_date,
+        "total_photos": len(metadata_list),
+        "total_points": len(set(m["point_id"] for m in metadata_list)),
+        "filters": filters,
+        "photos": metadata_list,
+    }
+    yield archive.add_bytes("metadata.json", json.dumps(json_data, indent=2, default=str))
+    yield archive.close()
+
+
 @router.post("/export")
 async def export_photos(
     request: PhotoExportRequest,
@@ -492,6 +613,8 @@ async def export_photos(
     - Les photos originales (noms conservés)
     - metadata.csv (Excel/QGIS friendly)
     - metadata.json (pour scripts/dev)
+
+    L'archive est émise en flux pendant sa construction.
     """
 
     photos_data = await get_photos_for_export(
@@ -510,105 +633,47 @@ async def export_photos(
             detail=f"Trop de photos ({len(photos_data)}). Maximum: {MAX_PHOTOS_EXPORT}. Affinez vos filtres."
         )
 
-    # Créer le fichier ZIP en mémoire
-    zip_buffer = io.BytesIO()
-
-    # Tracking pour les doublons de noms
-    filename_counts = {}
-
-    # Préparer les métadonnées
-    metadata_list = []
-
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for item in photos_data:
-            photo = item["photo"]
-            photo_url = photo.get("url", "")
-            original_filename = photo.get("filename", "photo.jpg")
-
-            # Gérer les doublons de noms
-            if original_filename in filename_counts:
-                filename_counts[original_filename] += 1
-                name_parts = original_filename.rsplit(".", 1)
-                if len(name_parts) == 2:
-                    final_filename = f"{name_parts[0]}_{filename_counts[original_filename]}.{name_parts[1]}"
-                else:
-                    final_filename = f"{original_filename}_{filename_counts[original_filename]}"
-            else:
-                filename_counts[original_filename] = 1
-                final_filename = original_filename
-
-            # Extraire le chemin physique depuis l'URL
-            # URL format: /api/photos/2025/01/uuid.jpg
-            url_parts = photo_url.replace("/api/photos/", "").split("/")
-            if len(url_parts) >= 3:
-                year, month, stored_filename = url_parts[0], url_parts[1], "/".join(url_parts[2:])
-                file_path = Path(settings.photo_storage_path) / year / month / stored_filename
-
-                if file_path.exists():
-                    # Ajouter la photo au ZIP
-                    zip_file.write(file_path, final_filename)
-
-                    # Ajouter aux métadonnées
-                    metadata_list.append({
-                        "filename": final_filename,
-                        "original_filename": original_filename,
-                        "point_id": item["point_id"],
-                        "point_name": item["point_name"],
-                        "lexique_code": item["lexique_code"] or "",
-                        "project_id": item["project_id"] or "",
-                        "latitude": item["latitude"],
-                        "longitude": item["longitude"],
-                        "date_photo": photo.get("taken_at", ""),
-                        "date_point": str(item["point_created_at"]) if item["point_created_at"] else "",
-                        "gps_lat_photo": photo.get("gps_lat"),
-                        "gps_lng_photo": photo.get("gps_lng"),
-                        "gps_accuracy": photo.get("gps_accuracy"),
-                        "device_model": photo.get("device_model", ""),
-                        "comment": photo.get("comment", ""),
-                    })
-
-        # Créer metadata.csv
-        if metadata_list:
-            csv_buffer = io.StringIO()
-            fieldnames = [
-                "filename", "original_filename", "point_id", "point_name",
-                "lexique_code", "project_id", "latitude", "longitude",
-                "date_photo", "date_point", "gps_lat_photo", "gps_lng_photo",
-                "gps_accuracy", "device_model", "comment"
-            ]
-            writer = csv.DictWriter(csv_buffer, fieldnames=fieldnames, delimiter=";")
-            writer.writeheader()
-            for row in metadata_list:
-                writer.writerow(row)
-
-            zip_file.writestr("metadata.csv", csv_buffer.getvalue())
-
-        # Créer metadata.json
-        export_date = datetime.now().isoformat()
-        json_data = {
-            "export_date": export_date,
-            "total_photos": len(metadata_list),
-            "total_points": len(set(m["point_id"] for m in metadata_list)),
-            "filters": {
-                "point_ids": request.point_ids,
-                "project_id": request.project_id,
-                "lexique_code": request.lexique_code,
-            },
-            "photos": metadata_list,
-        }
-        zip_file.writestr("metadata.json", json.dumps(json_data, indent=2, default=str))
-
-    # Préparer la réponse
-    zip_buffer.seek(0)
-
     # Nom du fichier ZIP
     date_str = datetime.now().strftime("%Y-%m-%d_%H%M%S")
     zip_filename = f"export_photos_{date_str}.zip"
 
+    filters = {
+        "point_ids": request.point_ids,
+        "project_id": request.project_id,
+        "lexique_code": request.lexique_code,
+    }
+
     return StreamingResponse(
-        zip_buffer,
+        stream_photos_zip(photos_data, filters),
         media_type="application/zip",
         headers={
-            "Content-Disposition": f"attachment; filename={zip_filename}"
+            "Content-Disposition": f"attachment; filename={zip_filename}",
+            "X-Accel-Buffering": "no",
         }
     )
+
+
+async def run_photos_export(request: PhotoExportRequest, progress: ExportProgress):
+    """Export des photos en job (POST /api/exports) : pas de limite MAX_PHOTOS_EXPORT."""
+    async with AsyncSessionLocal() as db:
+        photos_data = await get_photos_for_export(
+            db,
+            point_ids=request.point_ids,
+            project_id=request.project_id,
+            lexique_code=request.lexique_code,
+        )
+    progress.total = len(photos_data)
+    filters = {
+        "point_ids": request.point_ids,
+        "project_id": request.project_id,
+        "lexique_code": request.lexique_code,
+    }
+    async for chunk in stream_photos_zip(photos_data, filters, progress=progress):
+        yield chunk
+
+
+register_exporter(ExportKind.photos_zip.value, ExportSpec(
+    PhotoExportRequest, run_photos_export,
+    lambda params: (f"export_photos_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.zip", "application/zip"),
+    data_version=photos_data_version,
+))
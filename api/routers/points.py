@@ -2,21 +2,16 @@
 Router pour les Points géographiques.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime
-from io import StringIO, BytesIO
-from pathlib import Path
+import base64
+import binascii
 import json
 import uuid
-import csv
-import zipfile
-import os
-
-from config import settings
 
 from database import get_db
 from routers.auth import get_current_user
@@ -28,11 +23,32 @@ from schemas.point import (
     SyncStatus,
     CoordinateSchema,
     PhotoMetadataSchema,
+    GeometryEncoding,
+)
+from services.custom_filters import build_custom_filters_sql
+from services.geometry_encoding import encoded_geometry_sql
+from services.nearest_points import MAX_NEAREST, find_nearest_points
+from services.point_filters import compile_point_filters, join_conditions
+from schemas.export import ExportKind, PointExportParams
+from services.export_jobs import ExportProgress, ExportSpec, register_exporter
+from services.point_export import (
+    count_export_points, stream_csv, stream_geojson, stream_points_zip,
+)
+from services.vector_tiles import (
+    POINTS_LAYER, invalidate_rows, layer_bounds, render_tile, tile_response,
 )
 
 router = APIRouter()
 
 
+def normalize_project_id(project_id) -> Optional[str]:
+    """Forme canonique (UUID en minuscules) d'un id de projet, None s'il est invalide."""
+    try:
+        return str(uuid.UUID(str(project_id)))
+    except ValueError:
+        return None
+
+
 def check_user_permissions(
     current_user: dict,
     project_id: Optional[str] = None,
@@ -51,9 +67,11 @@ def check_user_permissions(
     allowed_projects = user_permissions.get("projets", [])
     allowed_categories = user_permissions.get("categories", [])
 
-    # Vérifier l'accès au projet
+    # Vérifier l'accès au projet (ids comparés sous forme canonique, comme
+    # le périmètre de synchronisation)
     if project_id and allowed_projects:
-        if project_id not in allowed_projects:
+        allowed_ids = {normalize_project_id(p) for p in allowed_projects} - {None}
+        if normalize_project_id(project_id) not in allowed_ids:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Vous n'avez pas accès au projet '{project_id}'. Contactez un administrateur.",
@@ -145,11 +163,77 @@ def row_to_point_response(row: dict) -> PointResponse:
         updated_by=str(row["updated_by"]) if row.get("updated_by") else None,
         created_at=row["created_at"],
         updated_at=row.get("updated_at"),
+        geometry=row.get("geom_encoded"),
         color_value=row.get("color_value"),
         icon_name=row.get("icon_name"),
     )
 
 
+def encode_points_cursor(created_at: datetime, point_id) -> str:
+    """Encode la position (created_at, id) du dernier point d'une page."""
+    raw = f"{created_at.isoformat()}|{point_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_points_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Décode un curseur de liste de points. Lève une HTTPException 400 s'il est invalide."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, point_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), str(uuid.UUID(point_id))
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+# Recherche de points (migration 032) : :search brut, :search_like échappé pour LIKE.
+# Les codes du lexique sont résolus une fois (ANY(ARRAY(...)) = InitPlan) : un
+# IN (SELECT ...) dans le OR deviendrait un SubPlan évalué ligne à ligne, qui
+# empêche le BitmapOr des index et force un parcours séquentiel.
+SEARCH_MATCH_SQL = """
+    search_vector @@ websearch_to_tsquery('geoclic_fr', :search)
+    OR search_text LIKE '%' || geoclic_search_normalize(:search_like) || '%'
+    OR lexique_code = ANY(ARRAY(
+        SELECT code FROM lexique
+        WHERE geoclic_search_normalize(label) LIKE '%' || geoclic_search_normalize(:search_like) || '%'
+    ))
+"""
+SEARCH_RANK_SQL = """(
+    ts_rank(search_vector, websearch_to_tsquery('geoclic_fr', :search))
+    + word_similarity(geoclic_search_normalize(:search), COALESCE(search_text, ''))
+)"""
+
+
+def escape_like(value: str) -> str:
+    """Échappe les caractères spéciaux de LIKE (\\, %, _) d'une saisie utilisateur."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def estimate_points_count(db: AsyncSession, where_sql: str, params: dict) -> int:
+    """
+    Estime le nombre de points correspondant aux filtres sans les compter.
+
+    Sans filtre : pg_class.reltuples (mis à jour par ANALYZE / autovacuum).
+    Avec filtres : nombre de lignes prévu par le planificateur (EXPLAIN).
+    """
+    if where_sql == "1=1":
+        result = await db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'geoclic_staging'::regclass")
+        )
+        estimate = result.scalar() or 0
+        # -1 : table jamais analysée
+        if estimate >= 0:
+            return estimate
+
+    result = await db.execute(
+        text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM geoclic_staging WHERE {where_sql}"),
+        params,
+    )
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
 @router.get("", response_model=PointListResponse)
 async def list_points(
     page: int = Query(1, ge=1),
@@ -158,86 +242,112 @@ async def list_points(
     sync_status: Optional[SyncStatus] = None,
     type_filter: Optional[str] = None,
     lexique_code: Optional[str] = None,
-    search: Optional[str] = Query(None, min_length=1, description="Recherche dans nom et commentaire"),
-    custom_filters: Optional[str] = Query(None, description="Filtres données techniques JSON: {\"Matériau\":\"Bois\"}"),
+    lexique_subtree: Optional[str] = Query(None, description="Catégorie(s) lexique, descendants inclus (codes séparés par des virgules)"),
+    search: Optional[str] = Query(None, min_length=1, description="Recherche dans nom, commentaire, données techniques et libellé lexique"),
+    custom_filters: Optional[str] = Query(
+        None,
+        description="Filtres données techniques JSON: {\"Matériau\":\"Bois\", \"Couleur\":[\"Vert\",\"Gris\"], \"Hauteur\":{\"min\":4,\"max\":8}}",
+    ),
+    geometry_encoding: Optional[GeometryEncoding] = Query(None, description="twkb ou wkb : géométrie encodée (base64) au lieu de coordinates"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la page précédente (remplace page)"),
+    total_mode: str = Query("exact", pattern="^(exact|estimated)$", description="estimated : total approché (statistiques PostgreSQL)"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    """Liste les points avec pagination, filtres et recherche."""
+    """
+    Liste les points avec pagination, filtres et recherche.
+
+    Deux modes de pagination :
+    - `page` : LIMIT/OFFSET, le coût croît avec le numéro de page ;
+    - `cursor` : pagination par clé sur (created_at, id), coût constant
+      quelle que soit la profondeur. Chaque réponse fournit `next_cursor`.
+    Avec total_mode=estimated, le total est estimé par le planificateur au
+    lieu d'un COUNT(*) exact (grandes bases).
+    Avec `search` (sans curseur), les résultats sont classés par pertinence.
+    `custom_filters` accepte égalité, liste de valeurs et plages min/max
+    (champs nombre ou date de type_field_configs).
+    `lexique_subtree` inclut toute l'arborescence sous une catégorie sans
+    avoir à lister les codes descendants.
+    """
     offset = (page - 1) * page_size
 
-    # Construction de la requête
-    where_clauses = []
-    params = {"limit": page_size, "offset": offset}
-
-    if project_id:
-        where_clauses.append("project_id = :project_id")
-        params["project_id"] = project_id
-
-    if sync_status:
-        where_clauses.append("sync_status = :sync_status")
-        params["sync_status"] = sync_status.value
-
-    if type_filter:
-        where_clauses.append("type = :type_filter")
-        params["type_filter"] = type_filter
-
-    if lexique_code:
-        # Support comma-separated codes for hierarchical filtering
-        codes = [c.strip() for c in lexique_code.split(',') if c.strip()]
-        if len(codes) == 1:
-            where_clauses.append("lexique_code = :lexique_code")
-            params["lexique_code"] = codes[0]
-        else:
-            lc_placeholders = ", ".join([f":lc_{i}" for i in range(len(codes))])
-            where_clauses.append(f"lexique_code IN ({lc_placeholders})")
-            for i, c in enumerate(codes):
-                params[f"lc_{i}"] = c
+    # Construction de la requête (codes lexique séparés par des virgules :
+    # filtrage hiérarchique)
+    where_clauses, params = compile_point_filters(
+        project_id=project_id,
+        sync_status=sync_status,
+        type_filter=type_filter,
+        lexique_code=lexique_code,
+        lexique_subtree=lexique_subtree,
+    )
+    params.update({"limit": page_size + 1, "offset": offset})
 
     if search:
-        # Recherche insensible à la casse dans nom et commentaire
-        where_clauses.append("(LOWER(name) LIKE :search OR LOWER(comment) LIKE :search)")
-        params["search"] = f"%{search.lower()}%"
+        # Plein texte français sans accents (mots entiers), trigrammes (fragments)
+        # et libellés du lexique ; index GIN, cf. migration 032
+        where_clauses.append(f"({SEARCH_MATCH_SQL})")
+        params["search"] = search
+        params["search_like"] = escape_like(search)
 
     if custom_filters:
         try:
-            import json as json_mod
-            cf = json_mod.loads(custom_filters) if isinstance(custom_filters, str) else custom_filters
-            if isinstance(cf, dict):
-                # Use JSONB containment operator @> for safe parameterized filtering
-                # Each filter: custom_properties @> '{"key": "value"}'::jsonb
-                for i, (key, value) in enumerate(cf.items()):
-                    param_name = f"cf_{i}"
-                    where_clauses.append(f"custom_properties @> CAST(:{param_name} AS jsonb)")
-                    params[param_name] = json_mod.dumps({key: str(value)})
-        except (ValueError, TypeError):
-            pass  # Invalid JSON, ignore
+            cf = json.loads(custom_filters)
+        except ValueError:
+            cf = None  # JSON invalide, ignoré
+        if isinstance(cf, dict):
+            # Égalité / IN par @> (index GIN), plages typées selon type_field_configs
+            where_clauses.extend(await build_custom_filters_sql(db, cf, params))
 
     # Sécurité : les where_clauses ci-dessus sont toutes des littérales du code
     # avec valeurs paramétrées (:param). Aucune donnée utilisateur dans la structure SQL.
-    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+    where_sql = join_conditions(where_clauses)
 
     # Compter le total
-    count_result = await db.execute(
-        text(f"SELECT COUNT(*) FROM geoclic_staging WHERE {where_sql}"),
-        params,
-    )
-    total = count_result.scalar()
-
-    # Récupérer les points avec coordonnées extraites
+    if total_mode == "estimated":
+        total = await estimate_points_count(db, where_sql, params)
+    else:
+        count_result = await db.execute(
+            text(f"SELECT COUNT(*) FROM geoclic_staging WHERE {where_sql}"),
+            params,
+        )
+        total = count_result.scalar()
+
+    # Pagination par clé : les lignes strictement après le curseur, sans OFFSET
+    page_sql = "LIMIT :limit OFFSET :offset"
+    order_sql = "created_at DESC, id DESC"
+    if search and not cursor:
+        order_sql = f"{SEARCH_RANK_SQL} DESC, {order_sql}"
+    if cursor:
+        params["cursor_created_at"], params["cursor_id"] = decode_points_cursor(cursor)
+        where_sql += " AND (created_at, id) < (:cursor_created_at, CAST(:cursor_id AS uuid))"
+        page_sql = "LIMIT :limit"
+
+    # Récupérer les points avec coordonnées extraites (ou géométrie encodée par PostGIS)
+    if geometry_encoding:
+        geom_select = f"{encoded_geometry_sql(geometry_encoding)} as geom_encoded"
+    else:
+        geom_select = "ST_AsGeoJSON(geom)::json->'coordinates' as geom_coords"
     result = await db.execute(
         text(f"""
             SELECT *,
-                   ST_AsGeoJSON(geom)::json->'coordinates' as geom_coords
+                   {geom_select}
             FROM geoclic_staging
             WHERE {where_sql}
-            ORDER BY created_at DESC
-            LIMIT :limit OFFSET :offset
+            ORDER BY {order_sql}
+            {page_sql}
         """),
         params,
     )
     rows = result.mappings().all()
 
+    # Une ligne de plus que demandé indique une page suivante. Pas de curseur
+    # pour un classement par pertinence : la clé (created_at, id) n'y est pas triée.
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        if order_sql.startswith("created_at"):
+            next_cursor = encode_points_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
     # Convertir les rows
     items = []
     for row in rows:
@@ -253,9 +363,11 @@ async def list_points(
 
     return PointListResponse(
         total=total,
+        total_estimated=total_mode == "estimated",
         page=page,
         page_size=page_size,
         items=items,
+        next_cursor=next_cursor,
     )
 
 
@@ -329,6 +441,7 @@ async def create_point(
         await db.commit()
         row = result.mappings().first()
         row_dict = dict(row)
+        await invalidate_rows(db, POINTS_LAYER, [point_id])
 
         # Convertir les coordonnées
         if row_dict.get("geom_coords"):
@@ -400,254 +513,123 @@ async def check_duplicate(
     }
 
 
-@router.get("/export/geojson")
-async def export_geojson(
+@router.get("/nearest")
+async def get_nearest_points(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    limit: int = Query(10, ge=1, le=MAX_NEAREST),
+    max_distance: Optional[float] = Query(None, gt=0, description="Distance maximale en mètres"),
     project_id: Optional[str] = None,
     sync_status: Optional[SyncStatus] = None,
-    lexique_code: Optional[str] = None,
-    date_start: Optional[str] = None,
-    date_end: Optional[str] = None,
+    type_filter: Optional[str] = None,
+    lexique_subtree: Optional[str] = Query(None, description="Catégorie(s) lexique, descendants inclus (codes séparés par des virgules)"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    """Exporte les points en GeoJSON avec tous les champs dynamiques."""
-    where_clauses = []
-    params = {}
-
-    if project_id:
-        where_clauses.append("project_id = :project_id")
-        params["project_id"] = project_id
-
-    if sync_status:
-        where_clauses.append("sync_status = :sync_status")
-        params["sync_status"] = sync_status.value
-
-    if lexique_code:
-        # Support comma-separated codes for hierarchical filtering
-        codes = [c.strip() for c in lexique_code.split(',') if c.strip()]
-        if len(codes) == 1:
-            where_clauses.append("lexique_code = :lexique_code")
-            params["lexique_code"] = codes[0]
-        else:
-            lc_placeholders = ", ".join([f":lc_{i}" for i in range(len(codes))])
-            where_clauses.append(f"lexique_code IN ({lc_placeholders})")
-            for i, c in enumerate(codes):
-                params[f"lc_{i}"] = c
+    """
+    Points les plus proches d'une position, du plus proche au plus éloigné.
 
-    if date_start:
-        where_clauses.append("created_at >= :date_start")
-        params["date_start"] = date_start
+    Parcours KNN de l'index spatial (opérateur <->) : seuls les candidats
+    retenus ont leur distance (en mètres) calculée.
+    """
+    clauses, params = compile_point_filters(
+        project_id=project_id,
+        sync_status=sync_status,
+        type_filter=type_filter,
+        lexique_subtree=lexique_subtree,
+    )
+    points = await find_nearest_points(db, lat, lng, limit, clauses, params, max_distance)
 
-    if date_end:
-        where_clauses.append("created_at <= :date_end")
-        params["date_end"] = f"{date_end} 23:59:59"
+    return {
+        "latitude": lat,
+        "longitude": lng,
+        "points": points,
+    }
 
-    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
 
-    result = await db.execute(
-        text(f"""
-            SELECT id, name, type, subtype, lexique_code,
-                   condition_state, point_status, sync_status,
-                   comment, photos, custom_properties,
-                   materiau, hauteur, largeur,
-                   created_at, updated_at,
-                   ST_AsGeoJSON(geom)::json as geometry
-            FROM geoclic_staging
-            WHERE {where_sql}
-            ORDER BY created_at DESC
-        """),
-        params,
+def build_export_filters(
+    project_id: Optional[str],
+    sync_status: Optional[SyncStatus],
+    lexique_code: Optional[str],
+    date_start: Optional[str],
+    date_end: Optional[str],
+) -> Tuple[str, dict]:
+    """Conditions WHERE communes aux exports (valeurs paramétrées)."""
+    clauses, params = compile_point_filters(
+        project_id=project_id,
+        sync_status=sync_status,
+        lexique_code=lexique_code,
+        date_start=date_start,
+        date_end=date_end,
     )
-    rows = result.mappings().all()
-
-    features = []
-    for row in rows:
-        # Propriétés de base
-        properties = {
-            "name": row["name"],
-            "type": row["type"],
-            "subtype": row["subtype"],
-            "lexique_code": row["lexique_code"],
-            "condition_state": row["condition_state"],
-            "point_status": row["point_status"],
-            "sync_status": row["sync_status"],
-            "comment": row["comment"],
-            "materiau": row["materiau"],
-            "hauteur": row["hauteur"],
-            "largeur": row["largeur"],
-            "photos": row["photos"],
-            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
-            "updated_at": row["updated_at"].isoformat() if row["updated_at"] else None,
-        }
+    return join_conditions(clauses), params
 
-        # Ajouter les champs dynamiques (custom_properties)
-        if row["custom_properties"]:
-            custom = row["custom_properties"]
-            if isinstance(custom, str):
-                custom = json.loads(custom)
-            for key, value in custom.items():
-                properties[f"custom_{key}"] = value
 
-        feature = {
-            "type": "Feature",
-            "id": str(row["id"]),
-            "geometry": row["geometry"],
-            "properties": properties,
-        }
-        features.append(feature)
+@router.get("/export/geojson")
+async def export_geojson(
+    project_id: Optional[str] = None,
+    sync_status: Optional[SyncStatus] = None,
+    lexique_code: Optional[str] = None,
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Exporte les points en GeoJSON avec tous les champs dynamiques.
 
-    geojson = {
-        "type": "FeatureCollection",
-        "features": features,
-    }
+    La FeatureCollection est émise en flux, par paquets lus sur un curseur
+    serveur : la mémoire reste constante quelle que soit la taille de l'export.
+    """
+    where_sql, params = build_export_filters(
+        project_id, sync_status, lexique_code, date_start, date_end,
+    )
+    filename = f"geoclic_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.geojson"
 
-    return geojson
+    return StreamingResponse(
+        stream_geojson(where_sql, params),
+        media_type="application/geo+json",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Accel-Buffering": "no",
+        },
+    )
 
 
 @router.get("/export/csv")
 async def export_csv(
+    request: Request,
     project_id: Optional[str] = None,
     sync_status: Optional[SyncStatus] = None,
     lexique_code: Optional[str] = None,
     date_start: Optional[str] = None,
     date_end: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    """Exporte les points en CSV avec tous les champs dynamiques."""
-    where_clauses = []
-    params = {}
-
-    if project_id:
-        where_clauses.append("project_id = :project_id")
-        params["project_id"] = project_id
-
-    if sync_status:
-        where_clauses.append("sync_status = :sync_status")
-        params["sync_status"] = sync_status.value
-
-    if lexique_code:
-        # Support comma-separated codes for hierarchical filtering
-        codes = [c.strip() for c in lexique_code.split(',') if c.strip()]
-        if len(codes) == 1:
-            where_clauses.append("lexique_code = :lexique_code")
-            params["lexique_code"] = codes[0]
-        else:
-            lc_placeholders = ", ".join([f":lc_{i}" for i in range(len(codes))])
-            where_clauses.append(f"lexique_code IN ({lc_placeholders})")
-            for i, c in enumerate(codes):
-                params[f"lc_{i}"] = c
-
-    if date_start:
-        where_clauses.append("created_at >= :date_start")
-        params["date_start"] = date_start
-
-    if date_end:
-        where_clauses.append("created_at <= :date_end")
-        params["date_end"] = f"{date_end} 23:59:59"
-
-    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+    """
+    Exporte les points en CSV avec tous les champs dynamiques.
 
-    result = await db.execute(
-        text(f"""
-            SELECT id, name, type, subtype, lexique_code,
-                   condition_state, point_status, sync_status,
-                   comment, materiau, hauteur, largeur,
-                   photos, custom_properties,
-                   ST_Y(geom::geometry) as latitude,
-                   ST_X(geom::geometry) as longitude,
-                   created_at, updated_at
-            FROM geoclic_staging
-            WHERE {where_sql}
-            ORDER BY created_at DESC
-        """),
-        params,
+    Les lignes sont émises en flux depuis un curseur serveur, compressées en
+    gzip à la volée si le client l'accepte (Accept-Encoding).
+    """
+    where_sql, params = build_export_filters(
+        project_id, sync_status, lexique_code, date_start, date_end,
     )
-    rows = result.mappings().all()
-
-    # Collecter tous les champs dynamiques uniques
-    all_custom_keys = set()
-    parsed_rows = []
-    for row in rows:
-        row_dict = dict(row)
-        custom = row["custom_properties"]
-        if custom:
-            if isinstance(custom, str):
-                custom = json.loads(custom)
-            row_dict["_custom"] = custom
-            all_custom_keys.update(custom.keys())
-        else:
-            row_dict["_custom"] = {}
-        parsed_rows.append(row_dict)
-
-    # Trier les clés custom pour cohérence
-    custom_keys_sorted = sorted(all_custom_keys)
-
-    output = StringIO()
-    writer = csv.writer(output, delimiter=';')
-
-    # En-têtes de base + champs dynamiques
-    base_headers = [
-        "ID", "Nom", "Type", "Sous-type", "Code Lexique",
-        "État", "Statut", "Sync", "Commentaire",
-        "Matériau", "Hauteur", "Largeur",
-        "Latitude", "Longitude", "Photos",
-        "Date création", "Date modification"
-    ]
-    headers = base_headers + [f"[{k}]" for k in custom_keys_sorted]
-    writer.writerow(headers)
-
-    # Données
-    for row in parsed_rows:
-        # Gérer les photos (liste → chaîne)
-        photos_str = ""
-        if row["photos"]:
-            photos = row["photos"]
-            if isinstance(photos, str):
-                photos = json.loads(photos)
-            if isinstance(photos, list):
-                photos_str = " | ".join(str(p) for p in photos)
-
-        base_data = [
-            str(row["id"]),
-            row["name"] or "",
-            row["type"] or "",
-            row["subtype"] or "",
-            row["lexique_code"] or "",
-            row["condition_state"] or "",
-            row["point_status"] or "",
-            row["sync_status"] or "",
-            row["comment"] or "",
-            row["materiau"] or "",
-            str(row["hauteur"]) if row["hauteur"] else "",
-            str(row["largeur"]) if row["largeur"] else "",
-            str(row["latitude"]) if row["latitude"] else "",
-            str(row["longitude"]) if row["longitude"] else "",
-            photos_str,
-            row["created_at"].isoformat() if row["created_at"] else "",
-            row["updated_at"].isoformat() if row["updated_at"] else "",
-        ]
-
-        # Ajouter les valeurs des champs dynamiques
-        custom_data = []
-        for key in custom_keys_sorted:
-            value = row["_custom"].get(key, "")
-            # Convertir les listes en chaîne
-            if isinstance(value, list):
-                value = " | ".join(str(v) for v in value)
-            custom_data.append(str(value) if value else "")
-
-        writer.writerow(base_data + custom_data)
-
-    output.seek(0)
+    compress = "gzip" in request.headers.get("accept-encoding", "").lower()
 
     # Nom du fichier avec date
     filename = f"geoclic_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Vary": "Accept-Encoding",
+        "X-Accel-Buffering": "no",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
 
     return StreamingResponse(
-        iter([output.getvalue()]),
+        stream_csv(where_sql, params, compress=compress),
         media_type="text/csv; charset=utf-8",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        headers=headers,
     )
 
 
@@ -658,8 +640,8 @@ async def export_zip_with_photos(
     lexique_code: Optional[str] = None,
     date_start: Optional[str] = None,
     date_end: Optional[str] = None,
-    max_points: int = Query(100, ge=1, le=500, description="Nombre max de points à exporter"),
-    max_photos: int = Query(200, ge=1, le=1000, description="Nombre max de photos à inclure"),
+    max_points: Optional[int] = Query(None, ge=1, description="Nombre max de points à exporter (défaut : tous)"),
+    max_photos: Optional[int] = Query(None, ge=1, description="Nombre max de photos à inclure (défaut : toutes)"),
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
@@ -672,224 +654,120 @@ async def export_zip_with_photos(
     - photos/ : Dossier contenant les fichiers photos
 
     Les fichiers photos sont nommés: {id_point_court}_{numero}.jpg
-    """
-    # Construire les filtres
-    where_clauses = []
-    params = {}
-
-    if project_id:
-        where_clauses.append("project_id = :project_id")
-        params["project_id"] = project_id
-
-    if sync_status:
-        where_clauses.append("sync_status = :sync_status")
-        params["sync_status"] = sync_status.value
-
-    if lexique_code:
-        # Support comma-separated codes for hierarchical filtering
-        codes = [c.strip() for c in lexique_code.split(',') if c.strip()]
-        if len(codes) == 1:
-            where_clauses.append("lexique_code = :lexique_code")
-            params["lexique_code"] = codes[0]
-        else:
-            lc_placeholders = ", ".join([f":lc_{i}" for i in range(len(codes))])
-            where_clauses.append(f"lexique_code IN ({lc_placeholders})")
-            for i, c in enumerate(codes):
-                params[f"lc_{i}"] = c
-
-    if date_start:
-        where_clauses.append("created_at >= :date_start")
-        params["date_start"] = date_start
-
-    if date_end:
-        where_clauses.append("created_at <= :date_end")
-        params["date_end"] = f"{date_end} 23:59:59"
 
-    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-
-    # Récupérer les points (limité)
-    result = await db.execute(
-        text(f"""
-            SELECT id, name, type, subtype, lexique_code,
-                   condition_state, point_status, sync_status,
-                   comment, photos, custom_properties,
-                   materiau, hauteur, largeur,
-                   created_at, updated_at,
-                   ST_AsGeoJSON(geom)::json as geometry,
-                   ST_X(geom::geometry) as longitude,
-                   ST_Y(geom::geometry) as latitude
-            FROM geoclic_staging
-            WHERE {where_sql}
-            ORDER BY created_at DESC
-            LIMIT :max_points
-        """),
-        {**params, "max_points": max_points},
+    L'archive est émise en flux pendant sa construction (photos stockées sans
+    recompression) : un projet complet s'exporte sans limite de mémoire.
+    """
+    where_sql, params = build_export_filters(
+        project_id, sync_status, lexique_code, date_start, date_end,
     )
-    rows = result.mappings().all()
 
-    if not rows:
+    # Vérifier avant d'envoyer les en-têtes : une fois le flux commencé, le
+    # statut ne peut plus changer
+    exists = await db.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM geoclic_staging WHERE {where_sql})"),
+        params,
+    )
+    if not exists.scalar():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Aucun point trouvé avec ces critères"
         )
 
-    # Créer le ZIP en mémoire
-    zip_buffer = BytesIO()
-    photos_added = 0
-    photos_errors = []
-
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Préparer les données GeoJSON et CSV
-        features = []
-        csv_rows = []
-        csv_headers = ["id", "name", "type", "lexique_code", "latitude", "longitude",
-                       "condition_state", "point_status", "sync_status", "comment",
-                       "photos_count", "created_at"]
-
-        for row in rows:
-            point_id = str(row["id"])
-            short_id = point_id[:8]  # ID court pour les noms de fichiers
-
-            # Traiter les photos
-            photos_data = row["photos"] or []
-            if isinstance(photos_data, str):
-                try:
-                    photos_data = json.loads(photos_data)
-                except:
-                    photos_data = []
-
-            photo_files_in_zip = []
-            for idx, photo in enumerate(photos_data):
-                if photos_added >= max_photos:
-                    break
-
-                # Extraire l'URL de la photo
-                photo_url = photo.get("url") if isinstance(photo, dict) else photo
-                if not photo_url:
-                    continue
-
-                # Construire le chemin du fichier physique
-                # URL format: /api/photos/2026/01/filename.jpg
-                if photo_url.startswith("/api/photos/"):
-                    relative_path = photo_url.replace("/api/photos/", "")
-                    file_path = Path(settings.photo_storage_path) / relative_path
-                else:
-                    continue
-
-                # Ajouter au ZIP si le fichier existe
-                if file_path.exists():
-                    # Extension du fichier original
-                    ext = file_path.suffix or ".jpg"
-                    zip_filename = f"photos/{short_id}_{idx + 1}{ext}"
-
-                    try:
-                        zip_file.write(file_path, zip_filename)
-                        photo_files_in_zip.append(zip_filename)
-                        photos_added += 1
-                    except Exception as e:
-                        photos_errors.append(f"{point_id}: {str(e)}")
-                else:
-                    photos_errors.append(f"{point_id}: fichier non trouvé {file_path}")
-
-            # Préparer le feature GeoJSON
-            properties = {
-                "id": point_id,
-                "name": row["name"],
-                "type": row["type"],
-                "subtype": row["subtype"],
-                "lexique_code": row["lexique_code"],
-                "condition_state": row["condition_state"],
-                "point_status": row["point_status"],
-                "sync_status": row["sync_status"],
-                "comment": row["comment"],
-                "materiau": row["materiau"],
-                "hauteur": row["hauteur"],
-                "largeur": row["largeur"],
-                "photos": photo_files_in_zip,  # Chemins relatifs dans le ZIP
-                "photos_metadata": photos_data,  # Métadonnées originales
-                "created_at": row["created_at"].isoformat() if row["created_at"] else None,
-                "updated_at": row["updated_at"].isoformat() if row["updated_at"] else None,
-            }
-
-            # Ajouter les champs dynamiques
-            if row["custom_properties"]:
-                custom = row["custom_properties"]
-                if isinstance(custom, str):
-                    custom = json.loads(custom)
-                for key, value in custom.items():
-                    properties[f"custom_{key}"] = value
-
-            feature = {
-                "type": "Feature",
-                "id": point_id,
-                "geometry": row["geometry"],
-                "properties": properties,
-            }
-            features.append(feature)
-
-            # Préparer la ligne CSV
-            csv_rows.append({
-                "id": point_id,
-                "name": row["name"],
-                "type": row["type"],
-                "lexique_code": row["lexique_code"],
-                "latitude": row["latitude"],
-                "longitude": row["longitude"],
-                "condition_state": row["condition_state"],
-                "point_status": row["point_status"],
-                "sync_status": row["sync_status"],
-                "comment": row["comment"],
-                "photos_count": len(photo_files_in_zip),
-                "created_at": row["created_at"].isoformat() if row["created_at"] else None,
-            })
-
-        # Écrire le GeoJSON
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features,
-            "metadata": {
-                "exported_at": datetime.now().isoformat(),
-                "points_count": len(features),
-                "photos_count": photos_added,
-                "photos_errors": len(photos_errors),
-            }
-        }
-        zip_file.writestr("data.geojson", json.dumps(geojson, ensure_ascii=False, indent=2))
-
-        # Écrire le CSV
-        csv_output = StringIO()
-        writer = csv.DictWriter(csv_output, fieldnames=csv_headers, delimiter=';')
-        writer.writeheader()
-        writer.writerows(csv_rows)
-        zip_file.writestr("data.csv", csv_output.getvalue())
-
-        # Écrire un fichier README
-        readme_content = f"""# Export GéoClic Data
-Exporté le: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-## Contenu
-- data.geojson : {len(features)} points au format GeoJSON
-- data.csv : {len(features)} points au format CSV (séparateur: ;)
-- photos/ : {photos_added} fichiers photos
-
-## Format des noms de photos
-Les photos sont nommées: {{id_point_court}}_{{numero}}.jpg
-Exemple: 3a32b799_1.jpg = première photo du point 3a32b799-xxxx-xxxx-xxxx
-
-## Erreurs photos ({len(photos_errors)})
-{chr(10).join(photos_errors) if photos_errors else "Aucune erreur"}
-"""
-        zip_file.writestr("README.txt", readme_content)
-
-    # Retourner le ZIP
-    zip_buffer.seek(0)
     filename = f"geoclic_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
 
     return StreamingResponse(
-        iter([zip_buffer.getvalue()]),
+        stream_points_zip(where_sql, params, max_points, max_photos),
         media_type="application/zip",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+# ============================================================================
+# EXPORTS EN ARRIÈRE-PLAN (POST /api/exports, cf. services/export_jobs.py)
+# ============================================================================
+
+def _export_filters(params: PointExportParams) -> Tuple[str, dict]:
+    return build_export_filters(
+        params.project_id, params.sync_status, params.lexique_code,
+        params.date_start, params.date_end,
+    )
+
+
+async def run_geojson_export(params: PointExportParams, progress: ExportProgress):
+    where_sql, sql_params = _export_filters(params)
+    progress.total = await count_export_points(where_sql, sql_params)
+    async for chunk in stream_geojson(where_sql, sql_params, progress=progress):
+        yield chunk
+
+
+async def run_csv_export(params: PointExportParams, progress: ExportProgress):
+    where_sql, sql_params = _export_filters(params)
+    progress.total = await count_export_points(where_sql, sql_params)
+    async for chunk in stream_csv(where_sql, sql_params, progress=progress):
+        yield chunk
+
+
+async def run_zip_export(params: PointExportParams, progress: ExportProgress):
+    where_sql, sql_params = _export_filters(params)
+    total = await count_export_points(where_sql, sql_params)
+    progress.total = min(total, params.max_points) if params.max_points else total
+    async for chunk in stream_points_zip(
+        where_sql, sql_params, params.max_points, params.max_photos, progress=progress,
+    ):
+        yield chunk
+
+
+def _export_filename(extension: str) -> str:
+    return f"geoclic_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+
+register_exporter(ExportKind.points_geojson.value, ExportSpec(
+    PointExportParams, run_geojson_export,
+    lambda params: (_export_filename("geojson"), "application/geo+json"),
+))
+register_exporter(ExportKind.points_csv.value, ExportSpec(
+    PointExportParams, run_csv_export,
+    lambda params: (_export_filename("csv"), "text/csv; charset=utf-8"),
+))
+register_exporter(ExportKind.points_zip.value, ExportSpec(
+    PointExportParams, run_zip_export,
+    lambda params: (_export_filename("zip"), "application/zip"),
+))
+
+
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+async def get_points_tile(
+    z: int,
+    x: int,
+    y: int,
+    project_id: Optional[str] = None,
+    sync_status: Optional[SyncStatus] = None,
+    type_filter: Optional[str] = None,
+    lexique_code: Optional[str] = None,
+    lexique_subtree: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Attributs des objets (séparés par des virgules)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Tuile vectorielle (MVT) des points.
+
+    Mêmes filtres que la liste des points ; `fields` choisit les attributs
+    (par défaut id, name, type, lexique_code, sync_status).
+    """
+    clauses, params = compile_point_filters(
+        project_id=project_id,
+        sync_status=sync_status,
+        type_filter=type_filter,
+        lexique_code=lexique_code,
+        lexique_subtree=lexique_subtree,
     )
+    tile = await render_tile(db, POINTS_LAYER, z, x, y, fields, clauses, params)
+    return tile_response(tile)
 
 
 # ============================================================================
@@ -998,6 +876,8 @@ async def update_point(
     import logging
     logger = logging.getLogger(__name__)
 
+    previous_bounds = await layer_bounds(db, POINTS_LAYER, [point_id])
+
     try:
         sql = f"""
             UPDATE geoclic_staging
@@ -1014,6 +894,7 @@ async def update_point(
             raise HTTPException(status_code=404, detail="Point non trouvé après mise à jour")
 
         row_dict = dict(row)
+        await invalidate_rows(db, POINTS_LAYER, [point_id], previous_bounds)
 
         if row_dict.get("geom_coords"):
             coords = row_dict["geom_coords"]
@@ -1064,11 +945,13 @@ async def delete_point(
                 detail=f"Point en statut '{sync_status}'. Utilisez force=true ou connectez-vous en admin/modérateur pour supprimer.",
             )
 
+    previous_bounds = await layer_bounds(db, POINTS_LAYER, [point_id])
     await db.execute(
         text("DELETE FROM geoclic_staging WHERE id = :id"),
         {"id": point_id},
     )
     await db.commit()
+    await invalidate_rows(db, POINTS_LAYER, [], previous_bounds)
 
 
 @router.post("/{point_id}/submit", response_model=PointResponse)
@@ -1097,6 +980,7 @@ async def submit_for_validation(
         )
 
     row_dict = dict(row)
+    await invalidate_rows(db, POINTS_LAYER, [point_id])
     if row_dict.get("geom_coords"):
         coords = row_dict["geom_coords"]
         if row_dict.get("geom_type") == "POINT":
@@ -1136,6 +1020,7 @@ async def validate_point(
         )
 
     row_dict = dict(row)
+    await invalidate_rows(db, POINTS_LAYER, [point_id])
     if row_dict.get("geom_coords"):
         coords = row_dict["geom_coords"]
         if row_dict.get("geom_type") == "POINT":
@@ -1176,6 +1061,7 @@ async def reject_point(
         )
 
     row_dict = dict(row)
+    await invalidate_rows(db, POINTS_LAYER, [point_id])
     if row_dict.get("geom_coords"):
         coords = row_dict["geom_coords"]
         if row_dict.get("geom_type") == "POINT":
@@ -14,6 +14,7 @@ import asyncpg
 
 from database import get_db
 from routers.auth import get_current_user
+from services.vector_tiles import POINTS_LAYER, invalidate_rows
 
 router = APIRouter()
 
@@ -561,6 +562,7 @@ async def import_from_postgis(
         skipped = 0
         errors = 0
         error_details = []
+        imported_ids = []
 
         # Helper pour extraire une valeur mappée
         def get_mapped(target: str, row_dict: dict, default=None):
@@ -692,12 +694,14 @@ async def import_from_postgis(
                     }
                 )
                 imported += 1
+                imported_ids.append(point_id)
 
             except Exception as e:
                 errors += 1
                 error_details.append(f"Ligne {i+1}: {str(e)}")
 
         await db.commit()
+        await invalidate_rows(db, POINTS_LAYER, imported_ids)
 
         return PostGISImportResult(
             success=errors == 0,
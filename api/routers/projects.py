@@ -9,6 +9,7 @@ from typing import List
 
 from database import get_db
 from routers.auth import get_current_user
+from services.lexique_version import invalidate_lexique_version
 from schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
 
 router = APIRouter()
@@ -151,6 +152,7 @@ async def create_project(
         },
     )
     await db.commit()
+    invalidate_lexique_version()
     row = result.mappings().first()
 
     return ProjectResponse(
@@ -223,6 +225,7 @@ async def update_project(
         params,
     )
     await db.commit()
+    invalidate_lexique_version()
     row = result.mappings().first()
 
     if not row:
@@ -285,5 +288,6 @@ async def delete_project(
         {"id": project_id}
     )
     await db.commit()
+    invalidate_lexique_version()
 
     return None
@@ -1,9 +1,12 @@
 """
 Router pour le portail citoyen public.
 Endpoints SANS authentification pour consultation et signalements.
+
+Les consultations (GET) sont servies par le cache des réponses publiques
+(services/response_cache.py), invalidé par étiquette lors des écritures.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
@@ -29,13 +32,21 @@ from schemas.public import (
     # Carte
     MapMarker,
     MapBounds,
+    MapCluster,
     MapDataResponse,
+    NearbyEquipment,
     # Utilitaires
     generate_tracking_number,
     int_to_hex_color,
     STATUT_LABELS,
 )
 
+from services.map_clusters import bbox_condition, fetch_clusters, use_clusters
+from services.nearest_points import MAX_NEAREST, find_nearest_points
+from services.point_filters import compile_point_filters
+from services.response_cache import cached_response
+from services.scan_counter import record_scan
+
 router = APIRouter()
 
 
@@ -45,150 +56,154 @@ router = APIRouter()
 
 @router.get("/equipment/{identifier}", response_model=EquipmentPublic)
 async def get_equipment(
+    request: Request,
     identifier: str,
-    db: AsyncSession = Depends(get_db),
 ):
     """
     Récupère les informations publiques d'un équipement.
     L'identifiant peut être un short_code (GC-XXXXXX) ou un UUID.
     Utilisé lors du scan d'un QR code.
     """
-    try:
-        # Déterminer si c'est un short_code ou un UUID
-        is_short_code = identifier.startswith("GC-")
+    async def build(db: AsyncSession):
+        try:
+            # Déterminer si c'est un short_code ou un UUID
+            is_short_code = identifier.startswith("GC-")
+
+            if is_short_code:
+                # Rechercher par short_code
+                result = await db.execute(text("""
+                    SELECT sc.short_code, sc.point_id,
+                           p.id, p.name, p.type, p.subtype, p.condition_state,
+                           p.zone_name, p.photos, p.custom_properties,
+                           p.updated_at, p.lexique_code,
+                           ST_Y(p.geom) as latitude, ST_X(p.geom) as longitude,
+                           l.label as type_label, l.icon_name, l.color_value
+                    FROM short_codes sc
+                    JOIN geoclic_staging p ON sc.point_id = p.id
+                    LEFT JOIN lexique l ON p.lexique_code = l.code
+                    WHERE sc.short_code = :code
+                """), {"code": identifier})
+            else:
+                # Rechercher par UUID
+                result = await db.execute(text("""
+                    SELECT sc.short_code,
+                           p.id, p.name, p.type, p.subtype, p.condition_state,
+                           p.zone_name, p.photos, p.custom_properties,
+                           p.updated_at, p.lexique_code,
+                           ST_Y(p.geom) as latitude, ST_X(p.geom) as longitude,
+                           l.label as type_label, l.icon_name, l.color_value
+                    FROM geoclic_staging p
+                    LEFT JOIN short_codes sc ON sc.point_id = p.id
+                    LEFT JOIN lexique l ON p.lexique_code = l.code
+                    WHERE p.id = :id
+                """), {"id": identifier})
 
-        if is_short_code:
-            # Rechercher par short_code
-            result = await db.execute(text("""
-                SELECT sc.short_code, sc.point_id,
-                       p.id, p.name, p.type, p.subtype, p.condition_state,
-                       p.zone_name, p.photos, p.custom_properties,
-                       p.updated_at, p.lexique_code,
-                       ST_Y(p.geom) as latitude, ST_X(p.geom) as longitude,
-                       l.label as type_label, l.icon_name, l.color_value
-                FROM short_codes sc
-                JOIN geoclic_staging p ON sc.point_id = p.id
-                LEFT JOIN lexique l ON p.lexique_code = l.code
-                WHERE sc.short_code = :code
-            """), {"code": identifier})
-
-            # Incrémenter le compteur de scans
-            await db.execute(text("""
-                UPDATE short_codes
-                SET scans_count = scans_count + 1, last_scanned_at = CURRENT_TIMESTAMP
-                WHERE short_code = :code
-            """), {"code": identifier})
-            await db.commit()
-        else:
-            # Rechercher par UUID
-            result = await db.execute(text("""
-                SELECT sc.short_code,
-                       p.id, p.name, p.type, p.subtype, p.condition_state,
-                       p.zone_name, p.photos, p.custom_properties,
-                       p.updated_at, p.lexique_code,
-                       ST_Y(p.geom) as latitude, ST_X(p.geom) as longitude,
-                       l.label as type_label, l.icon_name, l.color_value
-                FROM geoclic_staging p
-                LEFT JOIN short_codes sc ON sc.point_id = p.id
-                LEFT JOIN lexique l ON p.lexique_code = l.code
-                WHERE p.id = :id
-            """), {"id": identifier})
+            row = result.fetchone()
+            if not row:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Équipement non trouvé",
+                )
 
-        row = result.fetchone()
-        if not row:
+            # Parser les photos
+            photos = []
+            if row.photos:
+                photos_data = row.photos if isinstance(row.photos, list) else json.loads(row.photos)
+                for photo in photos_data[:5]:  # Max 5 photos publiques
+                    if isinstance(photo, dict):
+                        photos.append(PhotoPublic(
+                            url=photo.get('url', ''),
+                            thumbnail_url=photo.get('thumbnail_url'),
+                            caption=photo.get('caption'),
+                        ))
+                    elif isinstance(photo, str):
+                        photos.append(PhotoPublic(url=photo))
+
+            # Construire la réponse
+            return EquipmentPublic(
+                id=str(row.id),
+                short_code=row.short_code,
+                name=row.name,
+                category=row.type_label or row.type,
+                subcategory=row.subtype,
+                photos=photos,
+                condition=row.condition_state,
+                location=row.zone_name,
+                latitude=row.latitude,
+                longitude=row.longitude,
+                custom_fields={},  # À filtrer selon configuration de visibilité
+                last_updated=row.updated_at,
+                can_report=True,
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Équipement non trouvé",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erreur lors de la récupération: {str(e)}",
             )
 
-        # Parser les photos
-        photos = []
-        if row.photos:
-            photos_data = row.photos if isinstance(row.photos, list) else json.loads(row.photos)
-            for photo in photos_data[:5]:  # Max 5 photos publiques
-                if isinstance(photo, dict):
-                    photos.append(PhotoPublic(
-                        url=photo.get('url', ''),
-                        thumbnail_url=photo.get('thumbnail_url'),
-                        caption=photo.get('caption'),
-                    ))
-                elif isinstance(photo, str):
-                    photos.append(PhotoPublic(url=photo))
-
-        # Construire la réponse
-        return EquipmentPublic(
-            id=str(row.id),
-            short_code=row.short_code,
-            name=row.name,
-            category=row.type_label or row.type,
-            subcategory=row.subtype,
-            photos=photos,
-            condition=row.condition_state,
-            location=row.zone_name,
-            latitude=row.latitude,
-            longitude=row.longitude,
-            custom_fields={},  # À filtrer selon configuration de visibilité
-            last_updated=row.updated_at,
-            can_report=True,
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur lors de la récupération: {str(e)}",
-        )
+    response = await cached_response(request, build, tags=["points"], ttl=60)
+    if identifier.startswith("GC-"):
+        # Compter le scan une fois la fiche trouvée (un code inconnu lève un
+        # 404 avant), y compris quand elle vient du cache ; écrit en base par
+        # lots (services/scan_counter.py)
+        record_scan(identifier)
+    return response
 
 
 @router.get("/equipment/{identifier}/photos", response_model=List[PhotoPublic])
 async def get_equipment_photos(
+    request: Request,
     identifier: str,
-    db: AsyncSession = Depends(get_db),
 ):
     """Récupère les photos publiques d'un équipement."""
-    try:
-        is_short_code = identifier.startswith("GC-")
+    async def build(db: AsyncSession):
+        try:
+            is_short_code = identifier.startswith("GC-")
+
+            if is_short_code:
+                result = await db.execute(text("""
+                    SELECT p.photos
+                    FROM short_codes sc
+                    JOIN geoclic_staging p ON sc.point_id = p.id
+                    WHERE sc.short_code = :code
+                """), {"code": identifier})
+            else:
+                result = await db.execute(text("""
+                    SELECT photos FROM geoclic_staging WHERE id = :id
+                """), {"id": identifier})
 
-        if is_short_code:
-            result = await db.execute(text("""
-                SELECT p.photos
-                FROM short_codes sc
-                JOIN geoclic_staging p ON sc.point_id = p.id
-                WHERE sc.short_code = :code
-            """), {"code": identifier})
-        else:
-            result = await db.execute(text("""
-                SELECT photos FROM geoclic_staging WHERE id = :id
-            """), {"id": identifier})
+            row = result.fetchone()
+            if not row:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Équipement non trouvé",
+                )
 
-        row = result.fetchone()
-        if not row:
+            photos = []
+            if row.photos:
+                photos_data = row.photos if isinstance(row.photos, list) else json.loads(row.photos)
+                for photo in photos_data:
+                    if isinstance(photo, dict):
+                        photos.append(PhotoPublic(
+                            url=photo.get('url', ''),
+                            thumbnail_url=photo.get('thumbnail_url'),
+                            caption=photo.get('caption'),
+                        ))
+                    elif isinstance(photo, str):
+                        photos.append(PhotoPublic(url=photo))
+
+            return photos
+        except HTTPException:
+            raise
+        except Exception as e:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Équipement non trouvé",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erreur: {str(e)}",
             )
 
-        photos = []
-        if row.photos:
-            photos_data = row.photos if isinstance(row.photos, list) else json.loads(row.photos)
-            for photo in photos_data:
-                if isinstance(photo, dict):
-                    photos.append(PhotoPublic(
-                        url=photo.get('url', ''),
-                        thumbnail_url=photo.get('thumbnail_url'),
-                        caption=photo.get('caption'),
-                    ))
-                elif isinstance(photo, str):
-                    photos.append(PhotoPublic(url=photo))
-
-        return photos
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur: {str(e)}",
-        )
+    return await cached_response(request, build, tags=["points"], ttl=300)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -353,6 +368,7 @@ async def get_report_status(
 
 @router.get("/map/points", response_model=MapDataResponse)
 async def get_map_points(
+    request: Request,
     project_id: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
     min_lat: Optional[float] = Query(None),
@@ -360,90 +376,208 @@ async def get_map_points(
     min_lng: Optional[float] = Query(None),
     max_lng: Optional[float] = Query(None),
     limit: int = Query(500, le=2000),
-    db: AsyncSession = Depends(get_db),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Zoom de la carte : regroupement en dessous du zoom rue"),
 ):
     """
     Récupère les points pour affichage sur la carte publique.
     Données simplifiées pour performance.
+
+    Avec `zoom` inférieur au zoom rue (16), les points de l'emprise sont
+    regroupés en SQL par maille : `clusters` (position, nombre, répartition
+    par catégorie) remplace `markers`.
     """
-    try:
-        query = """
-            SELECT p.id, sc.short_code, p.name, p.type,
-                   ST_Y(p.geom) as latitude, ST_X(p.geom) as longitude,
-                   l.icon_name, l.color_value
-            FROM geoclic_staging p
-            LEFT JOIN short_codes sc ON sc.point_id = p.id
-            LEFT JOIN lexique l ON p.lexique_code = l.code
-            WHERE p.sync_status IN ('validated', 'published')
-        """
-        params = {}
-
-        if project_id:
-            query += " AND p.project_id = :project_id"
-            params["project_id"] = project_id
-
-        if category:
-            query += " AND (p.type = :category OR p.lexique_code = :category OR p.lexique_code LIKE :category_prefix)"
-            params["category"] = category
-            params["category_prefix"] = f"{category}%"
-
-        # Filtre géographique
-        if all([min_lat, max_lat, min_lng, max_lng]):
-            query += """
-                AND ST_Intersects(
-                    p.geom,
-                    ST_MakeEnvelope(:min_lng, :min_lat, :max_lng, :max_lat, 4326)
-                )
+    async def build(db: AsyncSession):
+        if use_clusters(zoom):
+            return await get_map_clusters(db, project_id, category, (min_lng, min_lat, max_lng, max_lat), zoom)
+
+        try:
+            query = """
+                SELECT p.id, sc.short_code, p.name, p.type,
+                       ST_Y(p.geom) as latitude, ST_X(p.geom) as longitude,
+                       l.icon_name, l.color_value
+                FROM geoclic_staging p
+                LEFT JOIN short_codes sc ON sc.point_id = p.id
+                LEFT JOIN lexique l ON p.lexique_code = l.code
+                WHERE p.sync_status IN ('validated', 'published')
             """
-            params.update({
-                "min_lat": min_lat,
-                "max_lat": max_lat,
-                "min_lng": min_lng,
-                "max_lng": max_lng,
-            })
-
-        query += f" LIMIT {limit}"
-
-        result = await db.execute(text(query), params)
-        rows = result.fetchall()
-
-        markers = []
-        for row in rows:
-            if row.latitude and row.longitude:
-                markers.append(MapMarker(
-                    id=str(row.id),
-                    short_code=row.short_code,
-                    name=row.name,
-                    category=row.type,
-                    latitude=row.latitude,
-                    longitude=row.longitude,
-                    icon=row.icon_name,
-                    color=int_to_hex_color(row.color_value),
-                ))
-
-        # Calculer les bounds si des points existent
-        bounds = None
-        if markers:
-            lats = [m.latitude for m in markers]
-            lngs = [m.longitude for m in markers]
-            bounds = MapBounds(
-                min_lat=min(lats),
-                max_lat=max(lats),
-                min_lng=min(lngs),
-                max_lng=max(lngs),
+            params = {}
+
+            if project_id:
+                query += " AND p.project_id = :project_id"
+                params["project_id"] = project_id
+
+            if category:
+                # Catégorie et ses descendants : chemin matérialisé (migration 036)
+                query += " AND (p.type = :category OR p.lexique_path @> ARRAY[CAST(:category AS text)])"
+                params["category"] = category
+
+            # Filtre géographique
+            if all([min_lat, max_lat, min_lng, max_lng]):
+                query += """
+                    AND ST_Intersects(
+                        p.geom,
+                        ST_MakeEnvelope(:min_lng, :min_lat, :max_lng, :max_lat, 4326)
+                    )
+                """
+                params.update({
+                    "min_lat": min_lat,
+                    "max_lat": max_lat,
+                    "min_lng": min_lng,
+                    "max_lng": max_lng,
+                })
+
+            query += f" LIMIT {limit}"
+
+            result = await db.execute(text(query), params)
+            rows = result.fetchall()
+
+            markers = []
+            for row in rows:
+                if row.latitude and row.longitude:
+                    markers.append(MapMarker(
+                        id=str(row.id),
+                        short_code=row.short_code,
+                        name=row.name,
+                        category=row.type,
+                        latitude=row.latitude,
+                        longitude=row.longitude,
+                        icon=row.icon_name,
+                        color=int_to_hex_color(row.color_value),
+                    ))
+
+            # Calculer les bounds si des points existent
+            bounds = None
+            if markers:
+                lats = [m.latitude for m in markers]
+                lngs = [m.longitude for m in markers]
+                bounds = MapBounds(
+                    min_lat=min(lats),
+                    max_lat=max(lats),
+                    min_lng=min(lngs),
+                    max_lng=max(lngs),
+                )
+
+            return MapDataResponse(
+                markers=markers,
+                bounds=bounds,
+                total=len(markers),
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erreur: {str(e)}",
             )
 
-        return MapDataResponse(
-            markers=markers,
-            bounds=bounds,
-            total=len(markers),
+    return await cached_response(request, build, tags=["points"], ttl=60)
+
+
+@router.get("/map/nearest", response_model=List[NearbyEquipment])
+async def get_nearest_equipment(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    limit: int = Query(5, ge=1, le=MAX_NEAREST),
+    max_distance: Optional[float] = Query(None, gt=0, description="Distance maximale en mètres"),
+    project_id: Optional[str] = Query(None),
+    category: Optional[str] = Query(None, description="Catégorie lexique, descendants inclus"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Équipements publics les plus proches d'une position (« le plus proche
+    de moi »), avec leur distance en mètres.
+
+    Non mis en cache : la position change à chaque appel.
+    """
+    clauses, params = compile_point_filters(project_id=project_id)
+    clauses.append("sync_status IN ('validated', 'published')")
+    if category:
+        # Même filtre de catégorie que la carte publique
+        clauses.append("(type = :category OR lexique_path @> ARRAY[CAST(:category AS text)])")
+        params["category"] = category
+
+    points = await find_nearest_points(db, lat, lng, limit, clauses, params, max_distance)
+    return [
+        NearbyEquipment(
+            id=point["id"],
+            short_code=point["short_code"],
+            name=point["name"],
+            category=point["type"],
+            latitude=point["latitude"],
+            longitude=point["longitude"],
+            distance=point["distance"],
         )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur: {str(e)}",
+        for point in points
+    ]
+
+
+def cluster_to_response(row: dict) -> MapCluster:
+    """Convertit un regroupement SQL en MapCluster."""
+    return MapCluster(
+        latitude=row["latitude"],
+        longitude=row["longitude"],
+        count=row["count"],
+        categories=row["categories"] or {},
+        bounds=MapBounds(
+            min_lat=row["min_lat"],
+            max_lat=row["max_lat"],
+            min_lng=row["min_lng"],
+            max_lng=row["max_lng"],
+        ),
+        id=row["id"],
+    )
+
+
+async def get_map_clusters(
+    db: AsyncSession,
+    project_id: Optional[str],
+    category: Optional[str],
+    bbox: tuple,
+    zoom: int,
+) -> MapDataResponse:
+    """Points publics de l'emprise regroupés par maille (mode regroupé de /map/points)."""
+    conditions = ["p.sync_status IN ('validated', 'published')"]
+    params = {}
+
+    if project_id:
+        conditions.append("p.project_id = CAST(:project_id AS uuid)")
+        params["project_id"] = project_id
+
+    if category:
+        conditions.append("(p.type = :category OR p.lexique_path @> ARRAY[CAST(:category AS text)])")
+        params["category"] = category
+
+    bbox_sql = bbox_condition("p.geom", bbox if None not in bbox else None, params)
+    if bbox_sql:
+        conditions.append(bbox_sql)
+
+    rows = await fetch_clusters(
+        db,
+        f"""
+            SELECT p.id, ST_Centroid(p.geom) AS pt, p.type AS category
+            FROM geoclic_staging p
+            WHERE {' AND '.join(conditions)}
+        """,
+        params,
+        zoom,
+    )
+    clusters = [cluster_to_response(row) for row in rows]
+
+    bounds = None
+    if clusters:
+        bounds = MapBounds(
+            min_lat=min(c.bounds.min_lat for c in clusters),
+            max_lat=max(c.bounds.max_lat for c in clusters),
+            min_lng=min(c.bounds.min_lng for c in clusters),
+            max_lng=max(c.bounds.max_lng for c in clusters),
         )
 
+    return MapDataResponse(
+        markers=[],
+        bounds=bounds,
+        total=sum(c.count for c in clusters),
+        clustered=True,
+        clusters=clusters,
+    )
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # ENDPOINTS CATÉGORIES
@@ -451,67 +585,75 @@ async def get_map_points(
 
 @router.get("/categories", response_model=CategoriesResponse)
 async def get_public_categories(
+    request: Request,
     project_id: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db),
 ):
     """
     Récupère les catégories visibles publiquement.
     Pour les filtres de la carte et des signalements.
     """
-    try:
-        query = """
-            SELECT DISTINCT l.code, l.label, l.level, l.parent_code,
-                   l.icon_name, l.color_value
-            FROM lexique l
-            WHERE l.is_active = TRUE
-        """
-        params = {}
-
-        if project_id:
-            query += " AND (l.project_id = :project_id OR l.project_id IS NULL)"
-            params["project_id"] = project_id
-
-        query += " ORDER BY l.level, l.display_order"
-
-        result = await db.execute(text(query), params)
-        rows = result.fetchall()
-
-        # Construire l'arbre
-        categories_map = {}
-        root_categories = []
-
-        for row in rows:
-            cat = CategoryPublic(
-                code=row.code,
-                label=row.label,
-                icon=row.icon_name,
-                color=int_to_hex_color(row.color_value),
-                children=[],
-            )
-            categories_map[row.code] = cat
+    async def build(db: AsyncSession):
+        try:
+            query = """
+                SELECT DISTINCT l.code, l.label, l.level, l.parent_code,
+                       l.icon_name, l.color_value
+                FROM lexique l
+                WHERE l.is_active = TRUE
+            """
+            params = {}
 
-            if row.parent_code is None:
-                root_categories.append(cat)
-            elif row.parent_code in categories_map:
-                categories_map[row.parent_code].children.append(cat)
+            if project_id:
+                query += " AND (l.project_id = :project_id OR l.project_id IS NULL)"
+                params["project_id"] = project_id
 
-        return CategoriesResponse(categories=root_categories)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur: {str(e)}",
-        )
+            query += " ORDER BY l.level, l.display_order"
+
+            result = await db.execute(text(query), params)
+            rows = result.fetchall()
+
+            # Construire l'arbre
+            categories_map = {}
+            root_categories = []
+
+            for row in rows:
+                cat = CategoryPublic(
+                    code=row.code,
+                    label=row.label,
+                    icon=row.icon_name,
+                    color=int_to_hex_color(row.color_value),
+                    children=[],
+                )
+                categories_map[row.code] = cat
+
+                if row.parent_code is None:
+                    root_categories.append(cat)
+                elif row.parent_code in categories_map:
+                    categories_map[row.parent_code].children.append(cat)
+
+            return CategoriesResponse(categories=root_categories)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erreur: {str(e)}",
+            )
+
+    return await cached_response(request, build, tags=["lexique"], ttl=300)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # ENDPOINT TYPES DE PROBLÈMES
 # ═══════════════════════════════════════════════════════════════════════════════
 
+# Listes fixes : le navigateur et les proxys les gardent une heure
+STATIC_LIST_CACHE_CONTROL = "public, max-age=3600"
+
+
 @router.get("/report-types", response_model=List[dict])
-async def get_report_types():
+async def get_report_types(response: Response):
     """
     Récupère la liste des types de problèmes pour les signalements.
     """
+    response.headers["Cache-Control"] = STATIC_LIST_CACHE_CONTROL
     return [
         {"code": "Dégradation", "label": "Dégradation / Vandalisme", "icon": "mdi-hammer"},
         {"code": "Panne", "label": "Panne / Dysfonctionnement", "icon": "mdi-flash-off"},
@@ -523,10 +665,11 @@ async def get_report_types():
 
 
 @router.get("/urgency-levels", response_model=List[dict])
-async def get_urgency_levels():
+async def get_urgency_levels(response: Response):
     """
     Récupère la liste des niveaux d'urgence pour les signalements.
     """
+    response.headers["Cache-Control"] = STATIC_LIST_CACHE_CONTROL
     return [
         {"code": "faible", "label": "Faible - Peut attendre", "color": "#4CAF50"},
         {"code": "normal", "label": "Normal", "color": "#2196F3"},
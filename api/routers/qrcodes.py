@@ -10,10 +10,15 @@ from typing import List
 from pydantic import BaseModel
 import qrcode
 from io import BytesIO
+import asyncio
+import hashlib
+import json
 
-from database import get_db
+from database import get_db, AsyncSessionLocal
 from routers.auth import get_current_user
 from config import settings
+from schemas.export import ExportKind
+from services.export_jobs import ExportProgress, ExportSpec, register_exporter
 
 router = APIRouter()
 
@@ -78,6 +83,96 @@ async def generate_qr_for_point(
     )
 
 
+def build_qr_zip(rows: list, base_url: str, progress=None) -> bytes:
+    """Archive ZIP des QR codes PNG (PNG déjà compressés : stockés tels quels)."""
+    import zipfile
+
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zip_file:
+        for row in rows:
+            point_url = f"{base_url}/point/{row['id']}"
+            qr_image = generate_qr_image(point_url)
+
+            # Nettoyer le nom pour le fichier
+            safe_name = "".join(c for c in row['name'] if c.isalnum() or c in (' ', '-', '_')).rstrip()
+            filename = f"qr_{safe_name}_{str(row['id'])[:8]}.png"
+
+            zip_file.writestr(filename, qr_image)
+            if progress:
+                progress(1)
+
+    return zip_buffer.getvalue()
+
+
+def build_qr_pdf(rows: list, base_url: str, progress=None) -> bytes:
+    """
+    Planche PDF A4 des QR codes (3 colonnes x 8 lignes).
+
+    Raises:
+        ImportError si reportlab n'est pas installé
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import cm
+    from reportlab.lib.utils import ImageReader
+
+    pdf_buffer = BytesIO()
+    c = canvas.Canvas(pdf_buffer, pagesize=A4)
+    width, height = A4
+
+    # Configuration: 3 colonnes x 8 lignes
+    cols = 3
+    rows_per_page = 8
+    qr_size = 4 * cm
+    margin_x = 2 * cm
+    margin_y = 1.5 * cm
+    spacing_x = (width - 2 * margin_x - cols * qr_size) / (cols - 1) if cols > 1 else 0
+    spacing_y = (height - 2 * margin_y - rows_per_page * (qr_size + 1 * cm)) / (rows_per_page - 1) if rows_per_page > 1 else 0
+
+    for i, row in enumerate(rows):
+        if i > 0 and i % (cols * rows_per_page) == 0:
+            c.showPage()
+
+        page_index = i % (cols * rows_per_page)
+        col = page_index % cols
+        page_row = page_index // cols
+
+        x = margin_x + col * (qr_size + spacing_x)
+        y = height - margin_y - (page_row + 1) * (qr_size + 1 * cm)
+
+        # Générer le QR
+        point_url = f"{base_url}/point/{row['id']}"
+        qr_image = generate_qr_image(point_url, size=300)
+
+        # Ajouter l'image au PDF
+        img = ImageReader(BytesIO(qr_image))
+        c.drawImage(img, x, y + 0.5 * cm, width=qr_size, height=qr_size)
+
+        # Ajouter le nom sous le QR
+        c.setFont("Helvetica", 8)
+        name_text = row['name'][:30] + "..." if len(row['name']) > 30 else row['name']
+        c.drawCentredString(x + qr_size / 2, y, name_text)
+        if progress:
+            progress(1)
+
+    c.save()
+    return pdf_buffer.getvalue()
+
+
+async def get_batch_rows(db: AsyncSession, point_ids: List[str]) -> list:
+    """Points (id, name) d'un lot de QR codes."""
+    # Sécurité : les placeholders sont des paramètres nommés (:id_0, :id_1, ...).
+    # Les valeurs (point_ids) sont passées en paramètres, pas interpolées dans le SQL.
+    placeholders = ", ".join([f":id_{i}" for i in range(len(point_ids))])
+    params = {f"id_{i}": pid for i, pid in enumerate(point_ids)}
+
+    result = await db.execute(
+        text(f"SELECT id, name FROM geoclic_staging WHERE id IN ({placeholders})"),
+        params,
+    )
+    return [dict(row) for row in result.mappings().all()]
+
+
 @router.post("/batch")
 async def generate_batch_qr(
     request: BatchQRRequest,
@@ -89,16 +184,7 @@ async def generate_batch_qr(
         raise HTTPException(status_code=400, detail="Aucun point sélectionné")
 
     # Récupérer les infos des points
-    # Sécurité : les placeholders sont des paramètres nommés (:id_0, :id_1, ...).
-    # Les valeurs (point_ids) sont passées en paramètres, pas interpolées dans le SQL.
-    placeholders = ", ".join([f":id_{i}" for i in range(len(request.point_ids))])
-    params = {f"id_{i}": pid for i, pid in enumerate(request.point_ids)}
-
-    result = await db.execute(
-        text(f"SELECT id, name FROM geoclic_staging WHERE id IN ({placeholders})"),
-        params,
-    )
-    rows = result.mappings().all()
+    rows = await get_batch_rows(db, request.point_ids)
 
     if not rows:
         raise HTTPException(status_code=404, detail="Aucun point trouvé")
@@ -106,24 +192,10 @@ async def generate_batch_qr(
     base_url = getattr(settings, 'frontend_url', 'http://localhost:3000')
 
     if request.format == "png":
-        # Retourner un ZIP avec les images
-        import zipfile
-
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for row in rows:
-                point_url = f"{base_url}/point/{row['id']}"
-                qr_image = generate_qr_image(point_url)
-
-                # Nettoyer le nom pour le fichier
-                safe_name = "".join(c for c in row['name'] if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                filename = f"qr_{safe_name}_{row['id'][:8]}.png"
-
-                zip_file.writestr(filename, qr_image)
-
-        zip_buffer.seek(0)
+        # Retourner un ZIP avec les images (génération dans un thread)
+        content = await asyncio.to_thread(build_qr_zip, rows, base_url)
         return StreamingResponse(
-            zip_buffer,
+            iter([content]),
             media_type="application/zip",
             headers={"Content-Disposition": 'attachment; filename="qrcodes.zip"'}
         )
@@ -131,60 +203,49 @@ async def generate_batch_qr(
     else:
         # Générer un PDF avec les QR codes
         try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.pdfgen import canvas
-            from reportlab.lib.units import cm
-
-            pdf_buffer = BytesIO()
-            c = canvas.Canvas(pdf_buffer, pagesize=A4)
-            width, height = A4
-
-            # Configuration: 3 colonnes x 8 lignes
-            cols = 3
-            rows_per_page = 8
-            qr_size = 4 * cm
-            margin_x = 2 * cm
-            margin_y = 1.5 * cm
-            spacing_x = (width - 2 * margin_x - cols * qr_size) / (cols - 1) if cols > 1 else 0
-            spacing_y = (height - 2 * margin_y - rows_per_page * (qr_size + 1 * cm)) / (rows_per_page - 1) if rows_per_page > 1 else 0
-
-            for i, row in enumerate(rows):
-                if i > 0 and i % (cols * rows_per_page) == 0:
-                    c.showPage()
-
-                page_index = i % (cols * rows_per_page)
-                col = page_index % cols
-                page_row = page_index // cols
-
-                x = margin_x + col * (qr_size + spacing_x)
-                y = height - margin_y - (page_row + 1) * (qr_size + 1 * cm)
-
-                # Générer le QR
-                point_url = f"{base_url}/point/{row['id']}"
-                qr_image = generate_qr_image(point_url, size=300)
-
-                # Ajouter l'image au PDF
-                from reportlab.lib.utils import ImageReader
-                img = ImageReader(BytesIO(qr_image))
-                c.drawImage(img, x, y + 0.5 * cm, width=qr_size, height=qr_size)
-
-                # Ajouter le nom sous le QR
-                c.setFont("Helvetica", 8)
-                name_text = row['name'][:30] + "..." if len(row['name']) > 30 else row['name']
-                c.drawCentredString(x + qr_size / 2, y, name_text)
-
-            c.save()
-            pdf_buffer.seek(0)
-
-            return StreamingResponse(
-                pdf_buffer,
-                media_type="application/pdf",
-                headers={"Content-Disposition": 'attachment; filename="qrcodes.pdf"'}
-            )
-
+            content = await asyncio.to_thread(build_qr_pdf, rows, base_url)
         except ImportError:
             # Si reportlab n'est pas installé, retourner un ZIP
             raise HTTPException(
                 status_code=500,
                 detail="reportlab non installé. Utilisez format=png"
             )
+
+        return StreamingResponse(
+            iter([content]),
+            media_type="application/pdf",
+            headers={"Content-Disposition": 'attachment; filename="qrcodes.pdf"'}
+        )
+
+
+async def run_qrcodes_export(request: BatchQRRequest, progress: ExportProgress):
+    """Lot de QR codes en job (POST /api/exports)."""
+    if not request.point_ids:
+        raise ValueError("Aucun point sélectionné")
+    async with AsyncSessionLocal() as db:
+        rows = await get_batch_rows(db, request.point_ids)
+    progress.total = len(rows)
+
+    base_url = getattr(settings, 'frontend_url', 'http://localhost:3000')
+    build = build_qr_zip if request.format == "png" else build_qr_pdf
+    yield await asyncio.to_thread(build, rows, base_url, progress)
+
+
+async def qrcodes_data_version(db: AsyncSession, request: BatchQRRequest) -> str:
+    """Version d'un lot de QR codes : points sélectionnés (id, nom) et URL encodée."""
+    rows = await get_batch_rows(db, request.point_ids) if request.point_ids else []
+    base_url = getattr(settings, 'frontend_url', 'http://localhost:3000')
+    canonical = json.dumps(
+        [base_url, sorted((str(row["id"]), row["name"] or "") for row in rows)],
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+register_exporter(ExportKind.qrcodes.value, ExportSpec(
+    BatchQRRequest, run_qrcodes_export,
+    lambda params: (
+        ("qrcodes.zip", "application/zip") if params.format == "png"
+        else ("qrcodes.pdf", "application/pdf")
+    ),
+    data_version=qrcodes_data_version,
+))
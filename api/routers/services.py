@@ -44,6 +44,7 @@ from schemas.services import (
     ServiceStats,
     ServiceStatsAgent,
 )
+from services.vector_tiles import DEMANDES_LAYER, invalidate_rows
 
 router = APIRouter()
 
@@ -706,6 +707,7 @@ async def update_demande_statut(
         params,
     )
     await db.commit()
+    await invalidate_rows(db, DEMANDES_LAYER, [demande_id])
 
     return {"message": "Statut mis à jour", "statut": data.statut}
 
@@ -777,6 +779,7 @@ async def update_demande_agent(
         {"id": demande_id, "agent_id": data.agent_service_id},
     )
     await db.commit()
+    await invalidate_rows(db, DEMANDES_LAYER, [demande_id])
 
     # Envoyer une notification push à l'agent assigné
     if data.agent_service_id:
@@ -4,7 +4,7 @@ Fournit les endpoints pour la synchronisation bidirectionnelle
 entre GéoClic SIG Desktop et l'écosystème Data.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query, UploadFile, File
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
@@ -21,6 +21,12 @@ import shutil
 
 from database import get_db
 from routers.auth import get_current_user, get_current_user_optional
+from services.lexique_version import get_lexique_version, get_projects_version, invalidate_lexique_version
+from services.offline_package import get_offline_artifact, artifact_response
+from services.response_cache import invalidate_public_cache
+from services.geometry_encoding import encoded_geometry_sql
+from services.vector_tiles import POINTS_LAYER, invalidate_rows, layer_bounds
+from schemas.point import GeometryEncoding
 from schemas.sig import (
     # Types Format B
     TypeFormatB,
@@ -265,6 +271,7 @@ async def create_project(
         })
 
         await db.commit()
+        invalidate_lexique_version()
         row = result.fetchone()
 
         return ProjectResponse(
@@ -400,6 +407,8 @@ async def sync_types(
                 subtypes_count += 1
 
         await db.commit()
+        invalidate_lexique_version()
+        await invalidate_public_cache("lexique")
 
         # Calculer la version
         version = int(datetime.now().timestamp()) % 1000000
@@ -602,6 +611,7 @@ async def sync_field_configs(
             count += 1
 
         await db.commit()
+        invalidate_lexique_version()
         return {"success": True, "count": count}
     except Exception as e:
         await db.rollback()
@@ -622,13 +632,22 @@ async def get_points(
     type: Optional[str] = Query(None),
     limit: int = Query(1000, le=10000),
     offset: int = Query(0),
+    geometry_encoding: Optional[GeometryEncoding] = Query(None, description="twkb ou wkb : géométrie encodée (base64) au lieu de coordinates"),
     db: AsyncSession = Depends(get_db),
 ):
-    """Récupère les points au format SIG Desktop."""
+    """
+    Récupère les points au format SIG Desktop.
+    Avec geometry_encoding, la géométrie est encodée par PostGIS et transmise
+    telle quelle dans `geometry` (coordinates vide) : pas de parsing WKT.
+    """
     try:
-        query = """
+        if geometry_encoding:
+            geom_select = f"NULL as wkt, {encoded_geometry_sql(geometry_encoding)} as geom_encoded"
+        else:
+            geom_select = "ST_AsText(geom) as wkt, NULL as geom_encoded"
+        query = f"""
             SELECT id, name, type, subtype, condition_state, point_status,
-                   comment, zone_name, geom_type, ST_AsText(geom) as wkt,
+                   comment, zone_name, geom_type, {geom_select},
                    gps_precision, gps_source,
                    materiau, hauteur, largeur, date_installation,
                    duree_vie_annees, marque_modele,
@@ -674,6 +693,7 @@ async def get_points(
                 zone_name=row.zone_name,
                 geom_type=row.geom_type or "POINT",
                 coordinates=coords,
+                geometry=row.geom_encoded,
                 gps_precision=row.gps_precision,
                 gps_source=row.gps_source,
                 materiau=row.materiau,
@@ -717,6 +737,9 @@ async def sync_points(
     errors = []
     server_ids = {}
 
+    # Emprises d'avant modification (cache de tuiles)
+    previous_bounds = await layer_bounds(db, POINTS_LAYER, [p.id for p in request.points if p.id])
+
     try:
         for point in request.points:
             try:
@@ -847,6 +870,7 @@ async def sync_points(
                 errors.append(f"Point {point.name}: {str(e)}")
 
         await db.commit()
+        await invalidate_rows(db, POINTS_LAYER, server_ids.values(), previous_bounds)
 
         return PointSyncResponse(
             success=failed == 0,
@@ -871,6 +895,7 @@ async def delete_point(
     current_user: dict = Depends(get_current_user),
 ):
     """Supprime un point."""
+    previous_bounds = await layer_bounds(db, POINTS_LAYER, [point_id])
     try:
         result = await db.execute(text("""
             DELETE FROM geoclic_staging WHERE id = :id RETURNING id
@@ -878,6 +903,7 @@ async def delete_point(
 
         await db.commit()
         row = result.fetchone()
+        await invalidate_rows(db, POINTS_LAYER, [], previous_bounds)
 
         if not row:
             raise HTTPException(
@@ -1010,16 +1036,14 @@ async def get_short_code(
 # ENDPOINT OFFLINE PACKAGE
 # ═══════════════════════════════════════════════════════════════════════════════
 
-@router.get("/offline-package/{project_id}", response_model=OfflinePackage)
-async def get_offline_package(
+async def build_offline_package(
+    db: AsyncSession,
     project_id: str,
-    include_points: bool = Query(True),
-    radius_km: Optional[float] = Query(None, description="Rayon en km autour du centre du projet"),
-    db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(get_current_user),
-):
+    include_points: bool,
+    radius_km: Optional[float],
+) -> OfflinePackage:
     """
-    Récupère un package complet pour le mode offline.
+    Construit le package offline d'un projet.
     Inclut: projet, lexique, champs dynamiques, et optionnellement les points.
     """
     try:
@@ -1183,10 +1207,8 @@ async def get_offline_package(
 
             total_points = len(points)
 
-        # Calculer la version du lexique
-        lexique_version = hashlib.md5(
-            json.dumps([e.code for e in lexique_entries]).encode()
-        ).hexdigest()[:8]
+        # Version du lexique (compteur tenu par trigger, cf. migration 026)
+        lexique_version = await get_lexique_version(db, project_id)
 
         return OfflinePackage(
             server_time=datetime.now(),
@@ -1206,6 +1228,45 @@ async def get_offline_package(
         )
 
 
+@router.get("/offline-package/{project_id}", response_model=OfflinePackage)
+async def get_offline_package(
+    request: Request,
+    project_id: str,
+    include_points: bool = Query(True),
+    radius_km: Optional[float] = Query(None, description="Rayon en km autour du centre du projet"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Récupère un package complet pour le mode offline.
+    Inclut: projet, lexique, champs dynamiques, et optionnellement les points.
+
+    Le package est pré-construit et compressé, puis resservi tel quel tant que
+    le lexique, les projets et (si inclus) les points du projet n'ont pas
+    changé. Avec If-None-Match, un client déjà à jour reçoit un 304.
+    server_time est l'heure de construction du package ; l'heure du serveur
+    est dans l'en-tête X-Server-Time.
+    """
+    version = f"{await get_lexique_version(db, project_id)}:{await get_projects_version(db)}"
+    if include_points:
+        # Dernière modification des points du projet (journal de sync, migration 025)
+        result = await db.execute(text("""
+            SELECT txid, seq FROM geoclic_staging_changes
+            WHERE project_id = CAST(:project_id AS uuid)
+            ORDER BY txid DESC, seq DESC
+            LIMIT 1
+        """), {"project_id": project_id})
+        last_change = result.fetchone()
+        version += f":{last_change.txid}.{last_change.seq}" if last_change else ":0"
+
+    key = f"sig:{project_id.lower()}:{int(include_points)}:{radius_km or ''}"
+    artifact = await get_offline_artifact(
+        key, version,
+        lambda: build_offline_package(db, project_id, include_points, radius_km),
+    )
+    return artifact_response(request, artifact)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # ENDPOINT IMPORT DE FICHIERS (Shapefile, GeoPackage, GeoJSON)
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -2,37 +2,35 @@
 Router pour la synchronisation Mobile ↔ Serveur.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Optional, Tuple
+import base64
+import binascii
 import json
+import time
 import uuid
-import hashlib
 
-from database import get_db
+from database import get_db, AsyncSessionLocal
 from routers.auth import get_current_user
+from routers.points import check_user_permissions, normalize_project_id
+from services.lexique_version import get_lexique_version, get_projects_version
+from services.offline_package import get_offline_artifact, artifact_response, permissions_fingerprint
 from schemas.sync import (
     SyncRequest, SyncResponse, SyncStatusResponse,
     LexiqueEntrySync, ChampDynamiqueSync, ProjectSync,
-    OfflinePackageResponse
+    OfflinePackageResponse, SyncPerformanceStats, SyncPerformanceResponse,
 )
-from schemas.point import PointResponse, CoordinateSchema, PhotoMetadataSchema
+from schemas.point import PointResponse, CoordinateSchema, PhotoMetadataSchema, GeometryEncoding
+from services.geometry_encoding import encoded_geometry_sql
+from services.vector_tiles import POINTS_LAYER, invalidate_rows, layer_bounds
 
 router = APIRouter()
 
 
-async def get_lexique_version(db: AsyncSession) -> str:
-    """Calcule un hash MD5 du lexique pour détecter les changements."""
-    result = await db.execute(
-        text("SELECT code, label, created_at FROM lexique ORDER BY code")
-    )
-    rows = result.fetchall()
-    content = "|".join([f"{r[0]}:{r[1]}:{r[2]}" for r in rows])
-    return hashlib.md5(content.encode()).hexdigest()[:16]
-
-
 async def get_lexique_entries(db: AsyncSession, project_id: str = None) -> list:
     """Récupère les entrées du lexique (filtrées par projet si spécifié)."""
     if project_id:
@@ -155,24 +153,39 @@ async def get_champs_dynamiques(db: AsyncSession, project_id: str = None) -> lis
         return []
 
 
-async def get_projects(db: AsyncSession, user_permissions: dict = None) -> list:
-    """Récupère les projets (filtrés par permissions si fourni)."""
+def get_user_project_scope(current_user: dict) -> Optional[list]:
+    """
+    Projets accessibles à l'utilisateur pour la synchronisation.
+
+    Retourne None si l'utilisateur n'est pas restreint (admin, ou pas de liste
+    "projets" dans ses permissions, comme check_user_permissions), sinon la
+    liste des identifiants de projets autorisés.
+    """
+    if current_user.get("is_super_admin") or current_user.get("role_data") == "admin":
+        return None
+    allowed = (current_user.get("permissions") or {}).get("projets") or []
+    scope = [pid for pid in map(normalize_project_id, allowed) if pid]
+    return scope if allowed else None
+
+
+async def get_projects(db: AsyncSession, allowed_projects: Optional[list] = None) -> list:
+    """Récupère les projets actifs (limités à allowed_projects si fourni)."""
     query = """
         SELECT id, name, description, collectivite_name, status, is_active
         FROM projects
         WHERE is_active = TRUE
-        ORDER BY name
     """
-    result = await db.execute(text(query))
+    params = {}
+    if allowed_projects is not None:
+        query += " AND id = ANY(CAST(:allowed_projects AS uuid[]))"
+        params["allowed_projects"] = allowed_projects
+    query += " ORDER BY name"
+
+    result = await db.execute(text(query), params)
     projects = []
     for row in result.mappings().all():
-        project_id = str(row["id"])
-        # Filtrer par permissions si l'utilisateur n'est pas admin
-        if user_permissions and user_permissions.get("projets"):
-            if project_id not in user_permissions["projets"]:
-                continue
         projects.append(ProjectSync(
-            id=project_id,
+            id=str(row["id"]),
             name=row["name"],
             description=row.get("description"),
             collectivite=row.get("collectivite_name"),
@@ -183,6 +196,175 @@ async def get_projects(db: AsyncSession, user_permissions: dict = None) -> list:
     return projects
 
 
+def elapsed_ms(start: float) -> float:
+    """Durée écoulée depuis start (time.perf_counter), en millisecondes."""
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def encode_sync_cursor(txid: int, seq: int) -> str:
+    """Encode une position du journal de sync en curseur opaque pour le mobile."""
+    raw = f"{txid}:{seq}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> Tuple[int, int]:
+    """Décode un curseur de sync. Lève une HTTPException 400 s'il est invalide."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        txid, seq = base64.urlsafe_b64decode(padded).decode().split(":")
+        return int(txid), int(seq)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Curseur de synchronisation invalide")
+
+
+def row_to_sync_point(row_dict: dict) -> PointResponse:
+    """Convertit une ligne geoclic_staging (avec geom_coords) en PointResponse."""
+    # Convertir les coordonnées
+    if row_dict.get("geom_coords"):
+        coords = row_dict["geom_coords"]
+        if row_dict.get("geom_type") == "POINT":
+            row_dict["geom_coords"] = [[coords[1], coords[0]]]
+        elif isinstance(coords[0], list):
+            row_dict["geom_coords"] = [[c[1], c[0]] for c in coords]
+
+    # Parser les photos
+    photos = []
+    if row_dict.get("photos"):
+        try:
+            photos_data = json.loads(row_dict["photos"]) if isinstance(row_dict["photos"], str) else row_dict["photos"]
+            photos = [PhotoMetadataSchema(**p) for p in photos_data]
+        except:
+            pass
+
+    # Convertir les coordonnées
+    coordinates = []
+    if row_dict.get("geom_coords"):
+        coords_data = row_dict["geom_coords"]
+        coordinates = [CoordinateSchema(latitude=c[0], longitude=c[1]) for c in coords_data]
+
+    return PointResponse(
+        id=str(row_dict["id"]),
+        name=row_dict["name"],
+        lexique_code=row_dict.get("lexique_code"),
+        type=row_dict["type"],
+        subtype=row_dict.get("subtype"),
+        geom_type=row_dict.get("geom_type", "POINT"),
+        coordinates=coordinates,
+        gps_precision=row_dict.get("gps_precision"),
+        condition_state=row_dict.get("condition_state"),
+        point_status=row_dict.get("point_status"),
+        sync_status=row_dict.get("sync_status", "draft"),
+        comment=row_dict.get("comment"),
+        materiau=row_dict.get("materiau"),
+        hauteur=row_dict.get("hauteur"),
+        photos=photos,
+        project_id=str(row_dict["project_id"]) if row_dict.get("project_id") else None,
+        zone_name=row_dict.get("zone_name"),
+        created_by=str(row_dict["created_by"]) if row_dict.get("created_by") else None,
+        created_at=row_dict["created_at"],
+        updated_at=row_dict.get("updated_at"),
+        geometry=row_dict.get("geom_encoded"),
+    )
+
+
+async def get_changes_page(
+    db: AsyncSession,
+    cursor: Optional[str],
+    last_sync_at: Optional[datetime],
+    project_id: Optional[str],
+    page_size: int,
+    allowed_projects: Optional[list] = None,
+    geometry_encoding: Optional[GeometryEncoding] = None,
+) -> dict:
+    """
+    Lit une page du journal geoclic_staging_changes après le curseur.
+
+    Seules les transactions terminées (txid < xmin du snapshot) sont lues :
+    l'ensemble ne peut plus évoluer et le curseur ne saute aucune modification.
+    Sans curseur, last_sync_at (ancien protocole) sert de point de départ.
+    allowed_projects limite la lecture aux projets autorisés (None = tous).
+    geometry_encoding remplace les coordonnées par la géométrie encodée en SQL.
+    Retourne les points à jour, les ids supprimés, le curseur suivant et has_more.
+    """
+    where_clauses = [
+        "(txid, seq) > (:txid, :seq)",
+        "txid < txid_snapshot_xmin(txid_current_snapshot())",
+    ]
+    params = {"txid": 0, "seq": 0, "limit": page_size + 1}
+
+    if cursor:
+        params["txid"], params["seq"] = decode_sync_cursor(cursor)
+    elif last_sync_at:
+        where_clauses.append("changed_at > :last_sync")
+        params["last_sync"] = last_sync_at
+
+    if project_id:
+        where_clauses.append("project_id = CAST(:project_id AS uuid)")
+        params["project_id"] = project_id
+    if allowed_projects is not None:
+        where_clauses.append("project_id = ANY(CAST(:allowed_projects AS uuid[]))")
+        params["allowed_projects"] = allowed_projects
+
+    # Sécurité : where_clauses ne contient que des littéraux du code
+    result = await db.execute(
+        text(f"""
+            SELECT txid, seq, point_id, operation
+            FROM geoclic_staging_changes
+            WHERE {' AND '.join(where_clauses)}
+            ORDER BY txid, seq
+            LIMIT :limit
+        """),
+        params,
+    )
+    changes = result.fetchall()
+
+    has_more = len(changes) > page_size
+    changes = changes[:page_size]
+
+    if changes:
+        next_cursor = encode_sync_cursor(changes[-1][0], changes[-1][1])
+    elif cursor:
+        next_cursor = cursor
+    else:
+        next_cursor = encode_sync_cursor(params["txid"], params["seq"])
+
+    # Seule la dernière opération de la page compte pour chaque point
+    last_operation = {}
+    for change in changes:
+        point_id = str(change[2])
+        last_operation.pop(point_id, None)
+        last_operation[point_id] = change[3]
+
+    deleted_ids = [pid for pid, op in last_operation.items() if op == "D"]
+    upserted_ids = [pid for pid, op in last_operation.items() if op != "D"]
+
+    points = []
+    if upserted_ids:
+        if geometry_encoding:
+            geom_select = f"{encoded_geometry_sql(geometry_encoding)} as geom_encoded"
+        else:
+            geom_select = "ST_AsGeoJSON(geom)::json->'coordinates' as geom_coords"
+        rows_result = await db.execute(
+            text(f"""
+                SELECT *, {geom_select}
+                FROM geoclic_staging
+                WHERE id = ANY(CAST(:ids AS uuid[]))
+            """),
+            {"ids": upserted_ids},
+        )
+        rows_by_id = {str(row["id"]): dict(row) for row in rows_result.mappings().all()}
+        # Respecter l'ordre du journal ; un point absent a été supprimé depuis
+        # et son tombstone arrivera dans une page suivante.
+        points = [row_to_sync_point(rows_by_id[pid]) for pid in upserted_ids if pid in rows_by_id]
+
+    return {
+        "points": points,
+        "deleted_ids": deleted_ids,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
 def coords_to_wkt(coords, geom_type: str) -> str:
     """Convertit des coordonnées en WKT."""
     if not coords:
@@ -200,13 +382,329 @@ def coords_to_wkt(coords, geom_type: str) -> str:
     return None
 
 
+# Colonnes modifiables via points_to_update, avec leur type SQL
+# (liste blanche : les clés servent à construire le SET)
+SYNC_UPDATE_COLUMNS = {
+    "name": "varchar",
+    "lexique_code": "varchar",
+    "type": "varchar",
+    "subtype": "varchar",
+    "geom_type": "varchar",
+    "gps_precision": "double precision",
+    "gps_source": "varchar",
+    "altitude": "double precision",
+    "condition_state": "varchar",
+    "point_status": "varchar",
+    "sync_status": "sync_status_enum",
+    "rejection_comment": "text",
+    "comment": "text",
+    "materiau": "varchar",
+    "hauteur": "double precision",
+    "largeur": "double precision",
+    "date_installation": "date",
+    "priorite": "varchar",
+    "cout_remplacement": "double precision",
+    "custom_properties": "jsonb",
+    "photos": "jsonb",
+    "color_value": "integer",
+    "icon_name": "varchar",
+}
+
+MIN_COORDS_BY_GEOM_TYPE = {"POINT": 1, "LINESTRING": 2, "POLYGON": 3}
+
+SYNC_INSERT_SQL = """
+    INSERT INTO geoclic_staging (
+        id, project_id, name, lexique_code, type, subtype,
+        geom_type, geom, gps_precision, gps_source, altitude,
+        condition_state, point_status, sync_status, comment,
+        materiau, hauteur, largeur, date_installation,
+        priorite, cout_remplacement, custom_properties,
+        photos, color_value, icon_name, created_by
+    )
+    SELECT
+        r.id, r.project_id, r.name, r.lexique_code, r.type, r.subtype,
+        r.geom_type, ST_GeomFromText(r.wkt, 4326), r.gps_precision, r.gps_source, r.altitude,
+        r.condition_state, r.point_status, 'pending', r.comment,
+        r.materiau, r.hauteur, r.largeur, r.date_installation,
+        r.priorite, r.cout_remplacement, r.custom_properties,
+        COALESCE(r.photos, '[]'::jsonb), r.color_value, r.icon_name, CAST(:created_by AS uuid)
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+        id uuid, project_id uuid, name varchar, lexique_code varchar, type varchar, subtype varchar,
+        geom_type varchar, wkt text, gps_precision double precision, gps_source varchar, altitude double precision,
+        condition_state varchar, point_status varchar, comment text,
+        materiau varchar, hauteur double precision, largeur double precision, date_installation date,
+        priorite varchar, cout_remplacement double precision, custom_properties jsonb,
+        photos jsonb, color_value integer, icon_name varchar
+    )
+    ON CONFLICT (id) DO NOTHING
+    RETURNING id
+"""
+
+
+def check_coordinates(coords, geom_type: str) -> None:
+    """Vérifie qu'une géométrie a assez de sommets. Lève ValueError sinon."""
+    minimum = MIN_COORDS_BY_GEOM_TYPE.get(geom_type, 1)
+    if len(coords or []) < minimum:
+        raise ValueError(f"{geom_type} nécessite au moins {minimum} coordonnée(s)")
+
+
+def prepare_upload_rows(points: list) -> Tuple[list, list]:
+    """
+    Valide un lot de points à créer et les convertit en lignes JSON
+    pour jsonb_to_recordset. Retourne (lignes valides, erreurs).
+    L'identifiant fourni par le mobile est conservé (renvoi sans doublon).
+    """
+    rows = []
+    errors = []
+    for point in points:
+        try:
+            if point.project_id:
+                uuid.UUID(str(point.project_id))
+            client_id = getattr(point, "id", None)
+            point_id = str(uuid.UUID(str(client_id))) if client_id else str(uuid.uuid4())
+            check_coordinates(point.coordinates, point.geom_type.value)
+            rows.append({
+                "id": point_id,
+                "project_id": point.project_id,
+                "name": point.name,
+                "lexique_code": point.lexique_code,
+                "type": point.type,
+                "subtype": point.subtype,
+                "geom_type": point.geom_type.value,
+                "wkt": coords_to_wkt(list(point.coordinates), point.geom_type.value),
+                "gps_precision": point.gps_precision,
+                "gps_source": point.gps_source,
+                "altitude": point.altitude,
+                "condition_state": point.condition_state,
+                "point_status": point.point_status,
+                "comment": point.comment,
+                "materiau": point.materiau,
+                "hauteur": point.hauteur,
+                "largeur": point.largeur,
+                "date_installation": point.date_installation.date().isoformat() if point.date_installation else None,
+                "priorite": point.priorite,
+                "cout_remplacement": point.cout_remplacement,
+                "custom_properties": point.custom_properties or None,
+                "photos": [p.model_dump(mode="json") for p in point.photos] if point.photos else [],
+                "color_value": point.color_value,
+                "icon_name": point.icon_name,
+            })
+        except ValueError as e:
+            errors.append(f"Erreur upload {point.name}: {str(e)}")
+    return rows, errors
+
+
+async def split_upload_conflicts(
+    db: AsyncSession, rows: list, inserted_ids: set, user_id: str,
+) -> Tuple[list, list]:
+    """
+    Classe les points écartés par ON CONFLICT (id) DO NOTHING.
+
+    Un point déjà créé par le même utilisateur est un renvoi (déjà reçu) ;
+    un identifiant pris par un autre point est une erreur.
+    Retourne (ids déjà reçus, erreurs).
+    """
+    skipped = [row for row in rows if row["id"] not in inserted_ids]
+    if not skipped:
+        return [], []
+
+    result = await db.execute(
+        text("""
+            SELECT id::text, created_by::text FROM geoclic_staging
+            WHERE id = ANY(CAST(:ids AS uuid[]))
+        """),
+        {"ids": [row["id"] for row in skipped]},
+    )
+    owners = dict(result.fetchall())
+
+    already_uploaded, errors = [], []
+    for row in skipped:
+        if owners.get(row["id"]) == user_id:
+            already_uploaded.append(row["id"])
+        else:
+            errors.append(f"Erreur upload {row['name']}: identifiant {row['id']} déjà utilisé")
+    return already_uploaded, errors
+
+
+async def upload_points_bulk(db: AsyncSession, points: list, user_id: str) -> Tuple[list, list, list]:
+    """
+    Crée un lot de points en un seul INSERT ... SELECT FROM jsonb_to_recordset.
+
+    Le lot est validé en Python (UUID, nombre de sommets) puis les projets
+    inexistants sont écartés en une requête. Si l'INSERT groupé échoue malgré
+    tout, on rejoue ligne par ligne pour attribuer l'erreur au bon point.
+    Un point dont l'identifiant existe déjà n'est pas recréé : il est signalé
+    comme déjà reçu (renvoi) ou en erreur (cf. split_upload_conflicts).
+    Retourne (ids des points créés, y compris ceux générés par le serveur
+    pour les anciens clients, erreurs par point, ids déjà reçus).
+    """
+    if not points:
+        return [], [], []
+
+    rows, errors = prepare_upload_rows(points)
+
+    # Vérifier l'existence des projets en une seule requête
+    project_ids = list({r["project_id"] for r in rows if r["project_id"]})
+    if project_ids:
+        result = await db.execute(
+            text("SELECT id FROM projects WHERE id = ANY(CAST(:ids AS uuid[]))"),
+            {"ids": project_ids},
+        )
+        known_projects = {str(r[0]) for r in result.fetchall()}
+        valid_rows = []
+        for row in rows:
+            if row["project_id"] and str(uuid.UUID(row["project_id"])) not in known_projects:
+                errors.append(f"Erreur upload {row['name']}: projet {row['project_id']} inconnu")
+            else:
+                valid_rows.append(row)
+        rows = valid_rows
+
+    if not rows:
+        return [], errors, []
+
+    inserted_ids = None
+    try:
+        async with db.begin_nested():
+            result = await db.execute(
+                text(SYNC_INSERT_SQL),
+                {"rows": json.dumps(rows), "created_by": user_id},
+            )
+        inserted_ids = {str(r[0]) for r in result.fetchall()}
+    except Exception:
+        pass
+
+    if inserted_ids is None:
+        # Repli : une ligne à la fois, chacune dans son savepoint
+        inserted_ids = set()
+        attempted = []
+        for row in rows:
+            try:
+                async with db.begin_nested():
+                    result = await db.execute(
+                        text(SYNC_INSERT_SQL),
+                        {"rows": json.dumps([row]), "created_by": user_id},
+                    )
+                inserted_ids.update(str(r[0]) for r in result.fetchall())
+                attempted.append(row)
+            except Exception as e:
+                errors.append(f"Erreur upload {row['name']}: {str(e)}")
+        rows = attempted
+
+    already_uploaded, conflict_errors = await split_upload_conflicts(db, rows, inserted_ids, user_id)
+    errors.extend(conflict_errors)
+    return sorted(inserted_ids), errors, already_uploaded
+
+
+def prepare_update_entry(update: dict) -> dict:
+    """
+    Valide une entrée de points_to_update et la convertit en ligne JSON typée.
+    Lève ValueError si l'id, un champ ou une valeur est invalide.
+    """
+    row = {"id": str(uuid.UUID(str(update.get("id"))))}
+    for key, value in update.items():
+        if key == "id":
+            continue
+        if key == "coordinates":
+            if not value:
+                continue
+            geom_type = update.get("geom_type") or "POINT"
+            coords = [CoordinateSchema(**c) if isinstance(c, dict) else c for c in value]
+            check_coordinates(coords, geom_type)
+            row["wkt"] = coords_to_wkt(coords, geom_type)
+            continue
+        sql_type = SYNC_UPDATE_COLUMNS.get(key)
+        if sql_type is None:
+            raise ValueError(f"champ '{key}' non modifiable")
+        if value is None or sql_type in ("jsonb", "varchar", "text", "sync_status_enum"):
+            row[key] = value
+        elif sql_type == "double precision":
+            row[key] = float(value)
+        elif sql_type == "integer":
+            row[key] = int(value)
+        elif sql_type == "date":
+            row[key] = datetime.fromisoformat(str(value)).date().isoformat()
+    return row
+
+
+def build_update_sql(columns: tuple) -> str:
+    """Construit l'UPDATE groupé pour un ensemble de colonnes (toutes en liste blanche)."""
+    set_clauses = ["updated_by = CAST(:updated_by AS uuid)"]
+    record_types = ["id uuid"]
+    for column in columns:
+        if column == "wkt":
+            set_clauses.append("geom = ST_GeomFromText(r.wkt, 4326)")
+            record_types.append("wkt text")
+        else:
+            set_clauses.append(f"{column} = r.{column}")
+            record_types.append(f"{column} {SYNC_UPDATE_COLUMNS[column]}")
+    return f"""
+        UPDATE geoclic_staging s
+        SET {', '.join(set_clauses)}
+        FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r({', '.join(record_types)})
+        WHERE s.id = r.id
+        RETURNING s.id
+    """
+
+
+async def update_points_bulk(db: AsyncSession, updates: list, user_id: str) -> Tuple[int, list]:
+    """
+    Applique points_to_update par UPDATE ... FROM jsonb_to_recordset,
+    une requête par ensemble de champs modifiés (en pratique 1 à 3 par lot).
+    Retourne (nombre de points modifiés, erreurs par point).
+    """
+    errors = []
+    groups = {}
+    for update in updates:
+        if not update.get("id"):
+            continue
+        try:
+            row = prepare_update_entry(update)
+        except (ValueError, TypeError) as e:
+            errors.append(f"Erreur update {update.get('id')}: {str(e)}")
+            continue
+        columns = tuple(sorted(k for k in row if k != "id"))
+        groups.setdefault(columns, []).append(row)
+
+    points_updated = 0
+    for columns, rows in groups.items():
+        sql = text(build_update_sql(columns))
+        failed = set()
+        try:
+            async with db.begin_nested():
+                result = await db.execute(sql, {"rows": json.dumps(rows), "updated_by": user_id})
+                found = {str(r[0]) for r in result.fetchall()}
+        except Exception:
+            # Repli : une ligne à la fois pour isoler la valeur fautive
+            found = set()
+            for row in rows:
+                try:
+                    async with db.begin_nested():
+                        result = await db.execute(sql, {"rows": json.dumps([row]), "updated_by": user_id})
+                        found.update(str(r[0]) for r in result.fetchall())
+                except Exception as e:
+                    errors.append(f"Erreur update {row['id']}: {str(e)}")
+                    failed.add(row["id"])
+        for row in rows:
+            if row["id"] not in found and row["id"] not in failed:
+                errors.append(f"Erreur update {row['id']}: point non trouvé")
+        points_updated += len(found)
+    return points_updated, errors
+
+
 @router.get("/status", response_model=SyncStatusResponse)
 async def get_sync_status(
     device_id: Optional[str] = None,
+    project_id: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    """Récupère le statut de synchronisation."""
+    """
+    Récupère le statut de synchronisation.
+    Les compteurs sont limités au projet demandé et aux projets autorisés.
+    """
+    check_user_permissions(current_user, project_id)
+    allowed_projects = get_user_project_scope(current_user)
+
     # Dernière sync pour cet utilisateur
     result = await db.execute(
         text("""
@@ -224,19 +722,29 @@ async def get_sync_status(
     # Points en attente d'upload (drafts locaux - géré côté mobile)
     pending_uploads = 0
 
-    # Points à télécharger (modifiés depuis dernière sync)
+    # Points à télécharger (modifiés depuis dernière sync, dans le périmètre)
+    # Index (project_id, updated_at), cf. migration 028
+    where_clauses = ["TRUE"]
+    params = {}
+    if last_sync:
+        where_clauses.append("updated_at > :last_sync")
+        params["last_sync"] = last_sync
+    if project_id:
+        where_clauses.append("project_id = CAST(:project_id AS uuid)")
+        params["project_id"] = project_id
+    if allowed_projects is not None:
+        where_clauses.append("project_id = ANY(CAST(:allowed_projects AS uuid[]))")
+        params["allowed_projects"] = allowed_projects
+
+    # Sécurité : where_clauses ne contient que des littéraux du code
     downloads_result = await db.execute(
-        text("""
-            SELECT COUNT(*)
-            FROM geoclic_staging
-            WHERE updated_at > :last_sync OR :last_sync IS NULL
-        """),
-        {"last_sync": last_sync},
+        text(f"SELECT COUNT(*) FROM geoclic_staging WHERE {' AND '.join(where_clauses)}"),
+        params,
     )
     pending_downloads = downloads_result.scalar() or 0
 
     # Version du lexique
-    lexique_version = await get_lexique_version(db)
+    lexique_version = await get_lexique_version(db, project_id)
 
     # Compteurs
     lexique_count_result = await db.execute(
@@ -244,10 +752,7 @@ async def get_sync_status(
     )
     lexique_count = lexique_count_result.scalar() or 0
 
-    projects_count_result = await db.execute(
-        text("SELECT COUNT(*) FROM projects WHERE is_active = TRUE")
-    )
-    projects_count = projects_count_result.scalar() or 0
+    projects_count = len(await get_projects(db, allowed_projects))
 
     return SyncStatusResponse(
         last_sync_at=last_sync,
@@ -260,8 +765,80 @@ async def get_sync_status(
     )
 
 
+# Regroupements de GET /api/sync/stats : (clé, libellé, jointure)
+SYNC_STATS_GROUPS = {
+    "device": ("h.device_id", "NULL", ""),
+    "user": (
+        "h.user_id::text",
+        "MAX(CONCAT_WS(' ', u.prenom, u.nom))",
+        "LEFT JOIN geoclic_users u ON u.id = h.user_id",
+    ),
+    "project": (
+        "h.project_id::text",
+        "MAX(p.name)",
+        "LEFT JOIN projects p ON p.id = h.project_id",
+    ),
+}
+
+
+@router.get("/stats", response_model=SyncPerformanceResponse)
+async def get_sync_stats(
+    group_by: str = Query("device", pattern="^(device|user|project)$"),
+    days: int = Query(7, ge=1, le=90),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Percentiles de performance des synchronisations (admin).
+
+    Pour chaque appareil, utilisateur ou projet : p50 / p95 de la durée totale,
+    p95 de chaque phase (upload, update, delete, download, lexique) et taille
+    des échanges, sur les `days` derniers jours. Les groupes les plus lents
+    (p95) viennent en premier.
+    """
+    if not current_user.get("is_super_admin") and current_user.get("role_data") != "admin":
+        raise HTTPException(status_code=403, detail="Permissions insuffisantes")
+
+    key_sql, label_sql, join_sql = SYNC_STATS_GROUPS[group_by]
+
+    # Sécurité : key_sql, label_sql et join_sql sont des littéraux du code
+    result = await db.execute(
+        text(f"""
+            SELECT {key_sql} AS key,
+                   {label_sql} AS label,
+                   COUNT(*) AS syncs,
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY h.total_ms) AS total_p50_ms,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY h.total_ms) AS total_p95_ms,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY h.upload_ms) AS upload_p95_ms,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY h.update_ms) AS update_p95_ms,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY h.delete_ms) AS delete_p95_ms,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY h.download_ms) AS download_p95_ms,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY h.lexique_ms) AS lexique_p95_ms,
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY h.request_bytes) AS request_bytes_p50,
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY h.response_bytes) AS response_bytes_p50,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY h.response_bytes) AS response_bytes_p95
+            FROM sync_history h
+            {join_sql}
+            WHERE h.started_at > CURRENT_TIMESTAMP - make_interval(days => :days)
+              AND h.total_ms IS NOT NULL
+            GROUP BY {key_sql}
+            ORDER BY total_p95_ms DESC NULLS LAST
+            LIMIT :limit
+        """),
+        {"days": days, "limit": limit},
+    )
+
+    return SyncPerformanceResponse(
+        group_by=group_by,
+        days=days,
+        items=[SyncPerformanceStats(**dict(row)) for row in result.mappings().all()],
+    )
+
+
 @router.get("/offline-package", response_model=OfflinePackageResponse)
 async def get_offline_package(
+    request: Request,
     project_id: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
@@ -271,246 +848,274 @@ async def get_offline_package(
     Inclut: lexique, champs dynamiques, projets, permissions utilisateur.
     Si project_id est fourni, filtre le lexique et les champs par projet.
     À appeler une fois lors de la première connexion ou après une longue absence.
+
+    Le package est pré-construit et compressé (gzip, brotli si disponible) ;
+    il n'est reconstruit que lorsque le lexique, les champs ou les projets
+    changent. Un client qui renvoie l'ETag reçu (If-None-Match) obtient un 304.
+    server_time est l'heure de construction du package ; l'heure du serveur
+    est dans l'en-tête X-Server-Time.
     """
-    # Récupérer les permissions utilisateur
-    user_permissions = current_user.get("permissions", {})
-    user_role = current_user.get("role", "viewer")
+    # Projets accessibles (None pour les admins)
+    check_user_permissions(current_user, project_id)
+    allowed_projects = get_user_project_scope(current_user)
 
-    # Pour les admins, pas de filtrage des projets
-    if user_role == "admin":
-        user_permissions = None
+    # Version des sources : lexique/champs du projet + table projects
+    lexique_version = await get_lexique_version(db, project_id)
+    version = f"{lexique_version}:{await get_projects_version(db)}"
+    # Les permissions sont recopiées dans le package : elles font partie de la clé
+    user_permissions = current_user.get("permissions") or {}
+    key = f"sync:{project_id or 'all'}:{permissions_fingerprint(allowed_projects, user_permissions)}"
 
-    # Récupérer toutes les données (filtrées par projet si spécifié)
-    lexique_version = await get_lexique_version(db)
-    lexique_entries = await get_lexique_entries(db, project_id)
-    champs_dynamiques = await get_champs_dynamiques(db, project_id)
-    projects = await get_projects(db, user_permissions)
+    async def build():
+        return OfflinePackageResponse(
+            server_time=datetime.utcnow(),
+            lexique_version=lexique_version,
+            lexique_entries=await get_lexique_entries(db, project_id),
+            champs_dynamiques=await get_champs_dynamiques(db, project_id),
+            projects=await get_projects(db, allowed_projects),
+            user_permissions=user_permissions,
+        )
 
-    return OfflinePackageResponse(
-        server_time=datetime.utcnow(),
-        lexique_version=lexique_version,
-        lexique_entries=lexique_entries,
-        champs_dynamiques=champs_dynamiques,
-        projects=projects,
-        user_permissions=current_user.get("permissions", {}),
+    artifact = await get_offline_artifact(key, version, build)
+    return artifact_response(request, artifact)
+
+
+# Taille des pages lues dans le journal pendant un téléchargement en flux
+STREAM_PAGE_SIZE = 500
+
+
+async def stream_changes_ndjson(
+    cursor: Optional[str],
+    last_sync_at: Optional[datetime],
+    project_id: Optional[str],
+    allowed_projects: Optional[list] = None,
+    geometry_encoding: Optional[GeometryEncoding] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Parcourt le journal page par page et émet une ligne JSON par modification.
+
+    Lignes émises:
+    - {"type": "point", "point": {...}}       point créé ou modifié
+    - {"type": "deleted", "id": "..."}        point supprimé (tombstone)
+    - {"type": "checkpoint", "cursor": "..."} fin de page : le mobile peut
+      enregistrer ce curseur une fois les lignes précédentes appliquées
+    - {"type": "end", "cursor": "..."}        fin du flux
+
+    Une seule page est en mémoire à la fois. Le générateur ouvre sa propre
+    session : il s'exécute après le retour de l'endpoint.
+    """
+    async with AsyncSessionLocal() as db:
+        while True:
+            page = await get_changes_page(
+                db,
+                cursor=cursor,
+                last_sync_at=last_sync_at,
+                project_id=project_id,
+                page_size=STREAM_PAGE_SIZE,
+                allowed_projects=allowed_projects,
+                geometry_encoding=geometry_encoding,
+            )
+            lines = [
+                '{"type":"point","point":' + point.model_dump_json() + "}"
+                for point in page["points"]
+            ]
+            lines.extend(
+                json.dumps({"type": "deleted", "id": point_id})
+                for point_id in page["deleted_ids"]
+            )
+            cursor = page["next_cursor"]
+            if not page["has_more"]:
+                lines.append(json.dumps({"type": "end", "cursor": cursor}))
+                yield ("\n".join(lines) + "\n").encode()
+                return
+            lines.append(json.dumps({"type": "checkpoint", "cursor": cursor}))
+            yield ("\n".join(lines) + "\n").encode()
+            # Libérer le snapshot entre deux pages
+            await db.commit()
+
+
+@router.get("/download")
+async def download_changes_stream(
+    cursor: Optional[str] = None,
+    last_sync_at: Optional[datetime] = None,
+    project_id: Optional[str] = Query(None),
+    geometry_encoding: Optional[GeometryEncoding] = Query(None, description="twkb ou wkb : géométrie encodée au lieu de coordinates"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Téléchargement en flux (NDJSON) des modifications serveur.
+
+    Équivalent de la phase download de POST /api/sync, sans limite de page :
+    le serveur enchaîne les pages du journal et envoie une ligne par point,
+    le mobile les applique au fil de l'eau. La mémoire serveur et le délai
+    avant le premier octet ne dépendent plus du nombre de points modifiés.
+    Les envois (upload, update, delete) restent sur POST /api/sync.
+    """
+    # Rejeter un curseur invalide ou un projet interdit avant de commencer le flux
+    if cursor:
+        decode_sync_cursor(cursor)
+    check_user_permissions(current_user, project_id)
+
+    return StreamingResponse(
+        stream_changes_ndjson(
+            cursor, last_sync_at, project_id,
+            get_user_project_scope(current_user), geometry_encoding,
+        ),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
     )
 
 
 @router.post("", response_model=SyncResponse)
 async def sync_data(
     request: SyncRequest,
+    http_request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    """Synchronisation bidirectionnelle."""
+    """
+    Synchronisation bidirectionnelle.
+
+    Le téléchargement suit le journal geoclic_staging_changes : le mobile renvoie
+    `next_cursor` à chaque appel et rappelle tant que `has_more` est vrai.
+    Les suppressions serveur arrivent dans `points_deleted_ids`.
+
+    Avec `batch_id`, un lot déjà appliqué (réponse perdue puis renvoi) n'est pas
+    rejoué : son résultat d'origine est renvoyé avec `replayed=True`. La page
+    de téléchargement est recalculée depuis le curseur envoyé.
+
+    La durée de chaque phase et la taille des échanges sont enregistrées dans
+    sync_history (cf. GET /api/sync/stats).
+    """
+    started = time.perf_counter()
+    timings = {}
     errors = []
-    points_uploaded = 0
-    points_updated = 0
     points_deleted = 0
+    already_uploaded = []
+    user_id = str(current_user["id"])
 
-    # Créer une entrée dans l'historique
+    # Rejeter un curseur invalide ou un projet interdit avant toute écriture
+    if request.cursor:
+        decode_sync_cursor(request.cursor)
+    check_user_permissions(current_user, request.project_id)
+    allowed_projects = get_user_project_scope(current_user)
+
+    # Créer une entrée dans l'historique, qui sert aussi de registre des lots
+    # (migration 029). Un renvoi concurrent du même lot attend ici la fin du premier.
     sync_result = await db.execute(
         text("""
-            INSERT INTO sync_history (user_id, device_id, sync_type)
-            VALUES (:user_id, :device_id, 'full')
+            INSERT INTO sync_history (user_id, device_id, sync_type, batch_id)
+            VALUES (:user_id, :device_id, 'full', :batch_id)
+            ON CONFLICT (user_id, batch_id) WHERE batch_id IS NOT NULL DO NOTHING
             RETURNING id
         """),
-        {"user_id": str(current_user["id"]), "device_id": request.device_id},
+        {"user_id": user_id, "device_id": request.device_id, "batch_id": request.batch_id},
     )
     sync_id = sync_result.scalar()
+    replayed = sync_id is None
+    written_ids = []
+    previous_bounds = []
 
-    # 1. UPLOAD - Créer les nouveaux points
-    for point in request.points_to_upload:
-        try:
-            # Utiliser un savepoint pour isoler chaque INSERT
-            # Si un INSERT échoue, on rollback au savepoint sans affecter les autres
-            async with db.begin_nested():
-                point_id = str(uuid.uuid4())
-                wkt = coords_to_wkt(point.coordinates, point.geom_type.value)
-                photos_json = json.dumps([p.model_dump() for p in point.photos]) if point.photos else "[]"
-                custom_props_json = json.dumps(point.custom_properties) if point.custom_properties else None
-
-                await db.execute(
-                    text("""
-                        INSERT INTO geoclic_staging (
-                            id, project_id, name, lexique_code, type, subtype,
-                            geom_type, geom, gps_precision, gps_source, altitude,
-                            condition_state, point_status, sync_status, comment,
-                            materiau, hauteur, largeur, date_installation,
-                            priorite, cout_remplacement, custom_properties,
-                            photos, color_value, icon_name, created_by
-                        ) VALUES (
-                            :id, :project_id, :name, :lexique_code, :type, :subtype,
-                            :geom_type, ST_GeomFromText(:wkt, 4326), :gps_precision, :gps_source, :altitude,
-                            :condition_state, :point_status, 'pending', :comment,
-                            :materiau, :hauteur, :largeur, :date_installation,
-                            :priorite, :cout_remplacement, CAST(:custom_properties AS jsonb),
-                            CAST(:photos AS jsonb), :color_value, :icon_name, :created_by
-                        )
-                    """),
-                    {
-                        "id": point_id,
-                        "project_id": point.project_id,
-                        "name": point.name,
-                        "lexique_code": point.lexique_code,
-                        "type": point.type,
-                        "subtype": point.subtype,
-                        "geom_type": point.geom_type.value,
-                        "wkt": wkt,
-                        "gps_precision": point.gps_precision,
-                        "gps_source": point.gps_source,
-                        "altitude": point.altitude,
-                        "condition_state": point.condition_state,
-                        "point_status": point.point_status,
-                        "comment": point.comment,
-                        "materiau": point.materiau,
-                        "hauteur": point.hauteur,
-                        "largeur": point.largeur,
-                        "date_installation": point.date_installation,
-                        "priorite": point.priorite,
-                        "cout_remplacement": point.cout_remplacement,
-                        "custom_properties": custom_props_json,
-                        "photos": photos_json,
-                        "color_value": point.color_value,
-                        "icon_name": point.icon_name,
-                        "created_by": str(current_user["id"]),
-                    },
-                )
-            points_uploaded += 1
-        except Exception as e:
-            errors.append(f"Erreur upload {point.name}: {str(e)}")
+    if replayed:
+        # Lot déjà appliqué : reprendre son résultat sans rejouer les écritures
+        ledger_result = await db.execute(
+            text("""
+                SELECT id, batch_result FROM sync_history
+                WHERE user_id = :user_id AND batch_id = :batch_id
+            """),
+            {"user_id": user_id, "batch_id": request.batch_id},
+        )
+        ledger = ledger_result.one()
+        sync_id = ledger.id
+        batch_result = ledger.batch_result or {}
+        points_uploaded = batch_result.get("points_uploaded", 0)
+        points_updated = batch_result.get("points_updated", 0)
+        points_deleted = batch_result.get("points_deleted", 0)
+        errors = batch_result.get("errors", [])
+        already_uploaded = batch_result.get("points_already_uploaded", [])
+    else:
+        # Emprises d'avant écriture des points modifiés ou supprimés (cache de tuiles)
+        written_ids = [u.get("id") for u in request.points_to_update]
+        previous_bounds = await layer_bounds(
+            db, POINTS_LAYER,
+            [u.get("id") for u in request.points_to_update] + list(request.points_to_delete),
+        )
 
-    # 2. UPDATE - Mettre à jour les points existants
-    for update in request.points_to_update:
-        point_id = update.pop("id", None)
-        if not point_id:
-            continue
-        try:
-            async with db.begin_nested():
-                # Construire les updates
-                set_clauses = ["updated_by = :updated_by"]
-                params = {"id": point_id, "updated_by": str(current_user["id"])}
-
-                for key, value in update.items():
-                    if key == "coordinates" and value:
-                        wkt = coords_to_wkt(value, "POINT")
-                        set_clauses.append("geom = ST_GeomFromText(:wkt, 4326)")
-                        params["wkt"] = wkt
-                    else:
-                        set_clauses.append(f"{key} = :{key}")
-                        params[key] = value
-
-                await db.execute(
-                    text(f"""
-                        UPDATE geoclic_staging
-                        SET {', '.join(set_clauses)}
-                        WHERE id = :id
-                    """),
-                    params,
-                )
-            points_updated += 1
-        except Exception as e:
-            errors.append(f"Erreur update {point_id}: {str(e)}")
-
-    # 3. DELETE - Supprimer les points
-    for point_id in request.points_to_delete:
-        try:
-            async with db.begin_nested():
-                await db.execute(
-                    text("""
-                        DELETE FROM geoclic_staging
-                        WHERE id = :id AND sync_status = 'draft'
-                    """),
-                    {"id": point_id},
-                )
-            points_deleted += 1
-        except Exception as e:
-            errors.append(f"Erreur delete {point_id}: {str(e)}")
-
-    # 4. DOWNLOAD - Récupérer les points modifiés
-    download_result = await db.execute(
-        text("""
-            SELECT *, ST_AsGeoJSON(geom)::json->'coordinates' as geom_coords
-            FROM geoclic_staging
-            WHERE (updated_at > :last_sync OR :last_sync IS NULL)
-            ORDER BY updated_at DESC
-            LIMIT 1000
-        """),
-        {"last_sync": request.last_sync_at},
-    )
-    download_rows = download_result.mappings().all()
-
-    points_to_download = []
-    for row in download_rows:
-        row_dict = dict(row)
-        # Convertir les coordonnées
-        if row_dict.get("geom_coords"):
-            coords = row_dict["geom_coords"]
-            if row_dict.get("geom_type") == "POINT":
-                row_dict["geom_coords"] = [[coords[1], coords[0]]]
-            elif isinstance(coords[0], list):
-                row_dict["geom_coords"] = [[c[1], c[0]] for c in coords]
-
-        # Parser les photos
-        photos = []
-        if row_dict.get("photos"):
+        # 1. UPLOAD - Créer les nouveaux points (un seul INSERT pour tout le lot)
+        phase_start = time.perf_counter()
+        uploaded_ids, upload_errors, already_uploaded = await upload_points_bulk(
+            db, request.points_to_upload, user_id,
+        )
+        # Ids réellement insérés : générés par le serveur si le client n'en envoie pas
+        points_uploaded = len(uploaded_ids)
+        written_ids += uploaded_ids
+        errors.extend(upload_errors)
+        timings["upload_ms"] = elapsed_ms(phase_start)
+
+        # 2. UPDATE - Mettre à jour les points existants (un UPDATE par jeu de champs)
+        phase_start = time.perf_counter()
+        points_updated, update_errors = await update_points_bulk(db, request.points_to_update, user_id)
+        errors.extend(update_errors)
+        timings["update_ms"] = elapsed_ms(phase_start)
+
+        # 3. DELETE - Supprimer les brouillons en une requête
+        phase_start = time.perf_counter()
+        delete_ids = []
+        for point_id in request.points_to_delete:
             try:
-                photos_data = json.loads(row_dict["photos"]) if isinstance(row_dict["photos"], str) else row_dict["photos"]
-                photos = [PhotoMetadataSchema(**p) for p in photos_data]
-            except:
-                pass
-
-        # Convertir les coordonnées
-        coordinates = []
-        if row_dict.get("geom_coords"):
-            coords_data = row_dict["geom_coords"]
-            coordinates = [CoordinateSchema(latitude=c[0], longitude=c[1]) for c in coords_data]
-
-        points_to_download.append(PointResponse(
-            id=str(row_dict["id"]),
-            name=row_dict["name"],
-            lexique_code=row_dict.get("lexique_code"),
-            type=row_dict["type"],
-            subtype=row_dict.get("subtype"),
-            geom_type=row_dict.get("geom_type", "POINT"),
-            coordinates=coordinates,
-            gps_precision=row_dict.get("gps_precision"),
-            condition_state=row_dict.get("condition_state"),
-            point_status=row_dict.get("point_status"),
-            sync_status=row_dict.get("sync_status", "draft"),
-            comment=row_dict.get("comment"),
-            materiau=row_dict.get("materiau"),
-            hauteur=row_dict.get("hauteur"),
-            photos=photos,
-            project_id=str(row_dict["project_id"]) if row_dict.get("project_id") else None,
-            zone_name=row_dict.get("zone_name"),
-            created_by=str(row_dict["created_by"]) if row_dict.get("created_by") else None,
-            created_at=row_dict["created_at"],
-            updated_at=row_dict.get("updated_at"),
-        ))
+                delete_ids.append(str(uuid.UUID(point_id)))
+            except ValueError:
+                errors.append(f"Erreur delete {point_id}: identifiant invalide")
+        if delete_ids:
+            delete_result = await db.execute(
+                text("""
+                    DELETE FROM geoclic_staging
+                    WHERE id = ANY(CAST(:ids AS uuid[])) AND sync_status = 'draft'
+                    RETURNING id
+                """),
+                {"ids": delete_ids},
+            )
+            points_deleted = len(delete_result.fetchall())
+        timings["delete_ms"] = elapsed_ms(phase_start)
 
-    # Mettre à jour l'historique
-    await db.execute(
-        text("""
-            UPDATE sync_history
-            SET completed_at = CURRENT_TIMESTAMP,
-                points_uploaded = :uploaded,
-                points_downloaded = :downloaded,
-                points_failed = :failed
-            WHERE id = :id
-        """),
-        {
-            "id": sync_id,
-            "uploaded": points_uploaded,
-            "downloaded": len(points_to_download),
-            "failed": len(errors),
-        },
-    )
+        # Résultat enregistré dans la même transaction que les écritures
+        await db.execute(
+            text("UPDATE sync_history SET batch_result = CAST(:result AS jsonb) WHERE id = :id"),
+            {
+                "id": sync_id,
+                "result": json.dumps({
+                    "points_uploaded": points_uploaded,
+                    "points_updated": points_updated,
+                    "points_deleted": points_deleted,
+                    "points_already_uploaded": already_uploaded,
+                    "errors": errors,
+                }),
+            },
+        )
 
+    # Valider les écritures avant de lire le journal : une transaction encore
+    # ouverte bloque le xmin du snapshot et masquerait nos propres modifications.
     await db.commit()
+    if not replayed:
+        await invalidate_rows(db, POINTS_LAYER, written_ids, previous_bounds)
 
-    # Vérifier si le lexique a changé
-    current_lexique_version = await get_lexique_version(db)
+    # 4. DOWNLOAD - Page suivante du journal des modifications
+    phase_start = time.perf_counter()
+    changes_page = await get_changes_page(
+        db,
+        cursor=request.cursor,
+        last_sync_at=request.last_sync_at,
+        project_id=request.project_id,
+        page_size=request.page_size,
+        allowed_projects=allowed_projects,
+        geometry_encoding=request.geometry_encoding,
+    )
+    points_to_download = changes_page["points"]
+    timings["download_ms"] = elapsed_ms(phase_start)
+
+    # 5. LEXIQUE - Vérifier si le lexique a changé
+    phase_start = time.perf_counter()
+    current_lexique_version = await get_lexique_version(db, request.project_id)
     lexique_updated = (
         request.lexique_version is not None and
         request.lexique_version != current_lexique_version
@@ -528,19 +1133,22 @@ async def sync_data(
         champs_dynamiques = await get_champs_dynamiques(db, request.project_id)
 
     if request.include_projects:
-        user_permissions = current_user.get("permissions", {})
-        if current_user.get("role") == "admin":
-            user_permissions = None
-        projects = await get_projects(db, user_permissions)
+        projects = await get_projects(db, allowed_projects)
+    timings["lexique_ms"] = elapsed_ms(phase_start)
 
-    return SyncResponse(
+    response = SyncResponse(
         success=len(errors) == 0,
         sync_id=sync_id,
         server_time=datetime.utcnow(),
+        replayed=replayed,
         points_uploaded=points_uploaded,
+        points_already_uploaded=already_uploaded,
         points_updated=points_updated,
         points_deleted=points_deleted,
         points_to_download=points_to_download,
+        points_deleted_ids=changes_page["deleted_ids"],
+        next_cursor=changes_page["next_cursor"],
+        has_more=changes_page["has_more"],
         lexique_updated=lexique_updated,
         lexique_version=current_lexique_version,
         lexique_entries=lexique_entries,
@@ -548,3 +1156,47 @@ async def sync_data(
         projects=projects,
         errors=errors,
     )
+    # Sérialiser ici pour connaître la taille envoyée
+    body = response.model_dump_json().encode()
+
+    # Mettre à jour l'historique ; un renvoi garde la ligne du lot d'origine
+    # (durées, projet et date de fin de la synchronisation qui a écrit)
+    if not replayed:
+        content_length = http_request.headers.get("content-length")
+        await db.execute(
+            text("""
+                UPDATE sync_history
+                SET completed_at = CURRENT_TIMESTAMP,
+                    points_uploaded = :uploaded,
+                    points_downloaded = :downloaded,
+                    points_failed = :failed,
+                    project_id = CAST(:project_id AS uuid),
+                    upload_ms = :upload_ms,
+                    update_ms = :update_ms,
+                    delete_ms = :delete_ms,
+                    download_ms = :download_ms,
+                    lexique_ms = :lexique_ms,
+                    total_ms = :total_ms,
+                    request_bytes = :request_bytes,
+                    response_bytes = :response_bytes
+                WHERE id = :id
+            """),
+            {
+                "id": sync_id,
+                "uploaded": points_uploaded,
+                "downloaded": len(points_to_download),
+                "failed": len(errors),
+                "project_id": request.project_id,
+                "upload_ms": timings.get("upload_ms"),
+                "update_ms": timings.get("update_ms"),
+                "delete_ms": timings.get("delete_ms"),
+                "download_ms": timings["download_ms"],
+                "lexique_ms": timings["lexique_ms"],
+                "total_ms": elapsed_ms(started),
+                "request_bytes": int(content_length) if content_length and content_length.isdigit() else None,
+                "response_bytes": len(body),
+            },
+        )
+        await db.commit()
+
+    return Response(content=body, media_type="application/json")
@@ -26,6 +26,9 @@ from schemas.zones import (
     ZoneStatsResponse, ZonePointHierarchy,
     IRISImportRequest, IRISImportResponse, ZoneOverlapCheck
 )
+from services.vector_tiles import (
+    ZONES_LAYER, invalidate_rows, layer_bounds, render_tile, tile_response,
+)
 
 router = APIRouter()
 
@@ -245,6 +248,8 @@ async def import_iris(
     imported = 0
     ignored = 0
     commune_id = None
+    imported_ids = []
+    deleted_bounds = []
 
     try:
         async with httpx.AsyncClient(timeout=30.0) as client:
@@ -268,12 +273,14 @@ async def import_iris(
 
             # Supprimer les existants si demandé
             if request.remplacer_existants:
-                await db.execute(text("""
+                deleted = await db.execute(text("""
                     DELETE FROM perimetres
                     WHERE code_insee = :code_insee
                        OR code = :code_commune
                        OR metadata->>'code_insee' = :code_insee
+                    RETURNING ST_XMin(geom), ST_YMin(geom), ST_XMax(geom), ST_YMax(geom)
                 """), {"code_insee": code_commune, "code_commune": code_commune})
+                deleted_bounds = [tuple(r) for r in deleted.fetchall()]
 
             # 2. Créer la commune (level=1)
             if commune_geom:
@@ -306,6 +313,7 @@ async def import_iris(
                 row = result.fetchone()
                 if row:
                     commune_id = str(row.id)
+                    imported_ids.append(commune_id)
                     imported += 1
 
             # 3. Récupérer et importer les IRIS
@@ -317,6 +325,7 @@ async def import_iris(
             if iris_response.status_code != 200:
                 # Commune sans IRIS (< 5000 hab)
                 await db.commit()
+                await invalidate_rows(db, ZONES_LAYER, imported_ids, deleted_bounds)
                 return IRISImportResponse(
                     success=True,
                     commune_id=commune_id,
@@ -341,7 +350,7 @@ async def import_iris(
 
                     geojson_str = json.dumps(geom)
 
-                    await db.execute(text("""
+                    result = await db.execute(text("""
                         INSERT INTO perimetres (
                             name, code, perimetre_type, level, parent_id,
                             is_global, project_id, code_iris, code_insee,
@@ -353,6 +362,7 @@ async def import_iris(
                             :metadata,
                             ST_SetSRID(ST_GeomFromGeoJSON(:geojson), 4326)
                         )
+                        RETURNING id
                     """), {
                         "name": iris_nom,
                         "code": iris_code,
@@ -369,6 +379,7 @@ async def import_iris(
                         "geojson": geojson_str,
                     })
 
+                    imported_ids.append(str(result.scalar()))
                     imported += 1
 
                 except Exception as e:
@@ -376,6 +387,7 @@ async def import_iris(
                     ignored += 1
 
             await db.commit()
+            await invalidate_rows(db, ZONES_LAYER, imported_ids, deleted_bounds)
 
             return IRISImportResponse(
                 success=True,
@@ -490,6 +502,50 @@ async def list_zones(
     ]
 
 
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+async def get_zones_tile(
+    z: int,
+    x: int,
+    y: int,
+    zone_type: Optional[str] = Query(None, description="Filtrer par type"),
+    level: Optional[int] = Query(None, ge=1, le=3, description="Filtrer par niveau"),
+    project_id: Optional[str] = Query(None, description="Filtrer par projet"),
+    include_global: bool = Query(True, description="Inclure les zones globales"),
+    fields: Optional[str] = Query(None, description="Attributs des zones (séparés par des virgules)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Tuile vectorielle (MVT) des zones, simplifiées au pixel du niveau de zoom.
+
+    Mêmes filtres que /geojson ; `fields` choisit les attributs (par défaut
+    id, name, code, zone_type, level).
+    """
+    filters = []
+    params = {}
+
+    if zone_type:
+        filters.append("perimetre_type = :zone_type")
+        params["zone_type"] = zone_type
+
+    if level is not None:
+        filters.append("level = :level")
+        params["level"] = level
+
+    project_filter_parts = []
+    if project_id:
+        project_filter_parts.append("project_id = CAST(:project_id AS uuid)")
+        params["project_id"] = project_id
+    if include_global:
+        project_filter_parts.append("is_global = TRUE")
+        project_filter_parts.append("project_id IS NULL")
+
+    if project_filter_parts:
+        filters.append(f"({' OR '.join(project_filter_parts)})")
+
+    tile = await render_tile(db, ZONES_LAYER, z, x, y, fields, filters, params)
+    return tile_response(tile, cache_control="public, max-age=300")
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # ROUTES AVEC PARAMÈTRES (APRÈS LES ROUTES STATIQUES)
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -745,6 +801,7 @@ async def create_zone(
 
     row = result.fetchone()
     await db.commit()
+    await invalidate_rows(db, ZONES_LAYER, [row.id])
 
     return await get_zone(str(row.id), db)
 
@@ -834,11 +891,13 @@ async def update_zone(
                 raise HTTPException(status_code=400, detail=f"Colonne non autorisée: {col_name}")
 
         updates.append("updated_at = CURRENT_TIMESTAMP")
+        previous_bounds = await layer_bounds(db, ZONES_LAYER, [zone_id])
         await db.execute(
             text(f"UPDATE perimetres SET {', '.join(updates)} WHERE id = CAST(:zone_id AS uuid)"),
             params
         )
         await db.commit()
+        await invalidate_rows(db, ZONES_LAYER, [zone_id], previous_bounds)
 
     return await get_zone(zone_id, db)
 
@@ -869,9 +928,12 @@ async def delete_zone(
             detail=f"Cette zone a {children_count} zone(s) enfant(s). Utilisez force=true pour supprimer quand même."
         )
 
+    # Emprises supprimées (cache de tuiles)
+    deleted_bounds = []
+
     # Supprimer les enfants d'abord si force=true
     if force and children_count > 0:
-        await db.execute(text("""
+        deleted = await db.execute(text("""
             WITH RECURSIVE descendants AS (
                 SELECT id FROM perimetres WHERE parent_id = CAST(:zone_id AS uuid)
                 UNION ALL
@@ -879,18 +941,26 @@ async def delete_zone(
                 JOIN descendants d ON p.parent_id = d.id
             )
             DELETE FROM perimetres WHERE id IN (SELECT id FROM descendants)
+            RETURNING ST_XMin(geom), ST_YMin(geom), ST_XMax(geom), ST_YMax(geom)
         """), {"zone_id": zone_id})
+        deleted_bounds.extend(tuple(r) for r in deleted.fetchall())
 
     # Supprimer la zone
     result = await db.execute(
-        text("DELETE FROM perimetres WHERE id = CAST(:zone_id AS uuid) RETURNING id"),
+        text("""
+            DELETE FROM perimetres WHERE id = CAST(:zone_id AS uuid)
+            RETURNING id, ST_XMin(geom), ST_YMin(geom), ST_XMax(geom), ST_YMax(geom)
+        """),
         {"zone_id": zone_id}
     )
+    row = result.fetchone()
 
-    if not result.fetchone():
+    if not row:
         raise HTTPException(status_code=404, detail="Zone non trouvée")
 
     await db.commit()
+    deleted_bounds.append(tuple(row)[1:])
+    await invalidate_rows(db, ZONES_LAYER, [], deleted_bounds)
 
     deleted_count = 1 + (children_count if force else 0)
     return {"message": f"Zone supprimée ({deleted_count} zone(s) au total)"}
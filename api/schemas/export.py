@@ -0,0 +1,62 @@
+"""
+Schémas Pydantic pour les exports asynchrones.
+"""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+from datetime import datetime
+from enum import Enum
+
+from .point import SyncStatus
+
+
+class ExportKind(str, Enum):
+    """Types d'export exécutables en arrière-plan."""
+    points_geojson = "points_geojson"  # /points/export/geojson
+    points_csv = "points_csv"          # /points/export/csv
+    points_zip = "points_zip"          # /points/export/zip
+    photos_zip = "photos_zip"          # /photos/export
+    qrcodes = "qrcodes"                # /qrcodes/batch
+
+
+class ExportJobStatus(str, Enum):
+    """Statut d'un job d'export."""
+    pending = "pending"
+    running = "running"
+    done = "done"
+    error = "error"
+
+
+class PointExportParams(BaseModel):
+    """Filtres des exports de points (mêmes paramètres que /points/export/*)."""
+    project_id: Optional[str] = None
+    sync_status: Optional[SyncStatus] = None
+    lexique_code: Optional[str] = None
+    date_start: Optional[str] = None
+    date_end: Optional[str] = None
+    max_points: Optional[int] = Field(None, ge=1)  # ZIP uniquement
+    max_photos: Optional[int] = Field(None, ge=1)  # ZIP uniquement
+
+
+class ExportJobCreate(BaseModel):
+    """Demande d'export : mêmes paramètres que l'endpoint d'export synchrone."""
+    kind: ExportKind
+    params: Dict[str, Any] = {}
+
+
+class ExportJobResponse(BaseModel):
+    """État d'un job d'export."""
+    id: str
+    kind: ExportKind
+    status: ExportJobStatus
+    progress_done: int = 0
+    progress_total: Optional[int] = None
+    progress: Optional[float] = None  # 0..1 quand le total est connu
+    bytes_written: int = 0
+    filename: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False  # Résultat existant réutilisé (mêmes paramètres, données inchangées)
+    download_url: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
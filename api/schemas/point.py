@@ -26,6 +26,12 @@ class GeometryType(str, Enum):
     polygon = "POLYGON"
 
 
+class GeometryEncoding(str, Enum):
+    """Encodages compacts de la géométrie (base64), en option des listes de points."""
+    twkb = "twkb"  # Tiny WKB : entiers delta-encodés, le plus compact
+    wkb = "wkb"    # WKB standard (EPSG:4326, sans SRID)
+
+
 class PhotoMetadataSchema(BaseModel):
     """Métadonnées d'une photo."""
     id: str
@@ -122,6 +128,7 @@ class PointResponse(PointBase):
     updated_by: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
+    geometry: Optional[str] = None  # Géométrie encodée si geometry_encoding demandé (coordinates vide)
 
     class Config:
         from_attributes = True
@@ -130,6 +137,8 @@ class PointResponse(PointBase):
 class PointListResponse(BaseModel):
     """Réponse paginée pour liste de points."""
     total: int
+    total_estimated: bool = False  # True si total vient des statistiques du planificateur
     page: int
     page_size: int
     items: List[PointResponse]
+    next_cursor: Optional[str] = None  # À passer en `cursor` pour la page suivante
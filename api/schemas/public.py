@@ -184,6 +184,17 @@ class MapMarker(BaseModel):
     color: Optional[str] = None
 
 
+class NearbyEquipment(BaseModel):
+    """Équipement proche d'une position."""
+    id: str
+    short_code: Optional[str] = None
+    name: str
+    category: str
+    latitude: float
+    longitude: float
+    distance: float  # Mètres
+
+
 class MapBounds(BaseModel):
     """Limites de la carte."""
     min_lat: float
@@ -192,11 +203,23 @@ class MapBounds(BaseModel):
     max_lng: float
 
 
+class MapCluster(BaseModel):
+    """Regroupement de marqueurs (petits niveaux de zoom)."""
+    latitude: float
+    longitude: float
+    count: int
+    categories: Dict[str, int] = {}  # Nombre d'objets par catégorie
+    bounds: MapBounds  # Emprise des objets regroupés (zoom au clic)
+    id: Optional[str] = None  # Objet isolé (count = 1)
+
+
 class MapDataResponse(BaseModel):
     """Données pour affichage sur la carte."""
     markers: List[MapMarker]
     bounds: Optional[MapBounds] = None
     total: int
+    clustered: bool = False  # True : `clusters` remplace `markers`
+    clusters: List[MapCluster] = []
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
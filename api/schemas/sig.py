@@ -191,6 +191,7 @@ class PointSIG(BaseModel):
     zone_name: Optional[str] = None
     geom_type: GeomType = GeomType.POINT
     coordinates: List[CoordinateSIG]
+    geometry: Optional[str] = None  # Géométrie encodée si geometry_encoding demandé (coordinates vide)
     gps_precision: Optional[float] = None
     gps_source: Optional[str] = "Desktop"
     image_path: Optional[str] = None
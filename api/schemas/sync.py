@@ -2,18 +2,27 @@
 Schémas Pydantic pour la synchronisation.
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 
-from .point import PointCreate, PointResponse, PointUpdate
+from .point import GeometryEncoding, PointCreate, PointResponse, PointUpdate
+
+
+class SyncPointCreate(PointCreate):
+    """Point créé sur le mobile, avec son identifiant généré côté client."""
+    id: Optional[str] = None  # UUID client : un renvoi du même point ne crée pas de doublon
 
 
 class SyncRequest(BaseModel):
     """Requête de synchronisation depuis Mobile."""
     device_id: str
-    last_sync_at: Optional[datetime] = None
-    points_to_upload: List[PointCreate] = []
+    batch_id: Optional[str] = Field(None, max_length=64)  # Clé d'idempotence, identique à chaque renvoi du lot
+    last_sync_at: Optional[datetime] = None  # Ancien protocole, ignoré si cursor est fourni
+    cursor: Optional[str] = None  # Curseur opaque renvoyé par la sync précédente
+    page_size: int = Field(500, ge=1, le=1000)  # Nombre max d'entrées du journal par page
+    geometry_encoding: Optional[GeometryEncoding] = None  # twkb/wkb : géométrie compacte au lieu de coordinates
+    points_to_upload: List[SyncPointCreate] = []
     points_to_update: List[dict] = []  # {id: str, ...changes}
     points_to_delete: List[str] = []
     # Options pour la sync
@@ -73,10 +82,16 @@ class SyncResponse(BaseModel):
     success: bool
     sync_id: int
     server_time: datetime
+    replayed: bool = False  # True si le lot (batch_id) avait déjà été appliqué
     points_uploaded: int = 0
+    # Points reçus lors d'une sync précédente (même id, même auteur), non recréés
+    points_already_uploaded: List[str] = []
     points_updated: int = 0
     points_deleted: int = 0
     points_to_download: List[PointResponse] = []
+    points_deleted_ids: List[str] = []  # Tombstones : points supprimés côté serveur
+    next_cursor: Optional[str] = None  # À renvoyer tel quel à la prochaine sync
+    has_more: bool = False  # True si d'autres pages restent à télécharger
     # Données pour offline
     lexique_updated: bool = False
     lexique_version: Optional[str] = None
@@ -97,6 +112,30 @@ class SyncStatusResponse(BaseModel):
     projects_count: int = 0
 
 
+class SyncPerformanceStats(BaseModel):
+    """Percentiles de durée (ms) et de taille (octets) d'un groupe de synchronisations."""
+    key: Optional[str] = None  # device_id, id utilisateur ou id projet
+    label: Optional[str] = None  # Nom de l'utilisateur ou du projet
+    syncs: int
+    total_p50_ms: Optional[float] = None
+    total_p95_ms: Optional[float] = None
+    upload_p95_ms: Optional[float] = None
+    update_p95_ms: Optional[float] = None
+    delete_p95_ms: Optional[float] = None
+    download_p95_ms: Optional[float] = None
+    lexique_p95_ms: Optional[float] = None
+    request_bytes_p50: Optional[float] = None
+    response_bytes_p50: Optional[float] = None
+    response_bytes_p95: Optional[float] = None
+
+
+class SyncPerformanceResponse(BaseModel):
+    """Statistiques de performance de la synchronisation."""
+    group_by: str
+    days: int
+    items: List[SyncPerformanceStats]
+
+
 class OfflinePackageResponse(BaseModel):
     """Package complet pour mode offline."""
     server_time: datetime
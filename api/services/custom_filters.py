@@ -0,0 +1,289 @@
+"""
+Filtres sur les données techniques - GéoClic Suite
+Traduit le paramètre custom_filters de GET /api/points en conditions SQL sur
+geoclic_staging.custom_properties, typées d'après type_field_configs.
+
+Formats acceptés pour chaque champ :
+- "Bois"                        égalité (format historique)
+- ["Bois", "Acier"]             une des valeurs (IN)
+- {"min": 4, "max": 8}          plage, bornes incluses (champs number/date)
+- {"in": [...]} / {"eq": ...}   formes explicites des deux premiers
+
+Égalité et IN passent par custom_properties @> {...}, servi par l'index GIN
+jsonb_path_ops (migration 033). Les plages utilisent geoclic_jsonb_numeric /
+geoclic_jsonb_date ; les champs les plus filtrés reçoivent un index
+d'expression créé à la demande.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Types de champs (routers/champs.py) comparés comme des nombres ou des dates
+NUMERIC_FIELD_TYPES = {"number", "slider", "calculated"}
+DATE_FIELD_TYPES = {"date"}
+ARRAY_FIELD_TYPES = {"multiselect"}
+
+# Nombre max de valeurs dans un filtre IN
+MAX_FILTER_VALUES = 100
+
+# Nombre de filtres de plage sur un champ avant création de son index d'expression
+HOT_FIELD_THRESHOLD = 20
+
+# Compteurs d'usage des filtres de plage : (kind, field) -> nombre de requêtes
+_range_hits: Dict[tuple, int] = {}
+_indexed_fields: set = set()
+_hits_lock = threading.Lock()
+# Créations d'index en cours (référence gardée jusqu'à la fin de la tâche)
+_index_tasks: set = set()
+
+# Index laissé INVALID par une création interrompue (et pas en cours de construction)
+INVALID_INDEX_SQL = """
+    SELECT 1
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = :name AND NOT i.indisvalid
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_stat_progress_create_index p WHERE p.index_relid = i.indexrelid
+      )
+"""
+
+
+def _sql_literal(value: str) -> str:
+    """Littéral SQL d'un nom de champ (standard_conforming_strings)."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def range_expression(kind: str, field: str) -> str:
+    """
+    Expression SQL d'extraction typée d'un champ.
+
+    Le nom du champ est écrit en littéral et non en paramètre : le planificateur
+    ne rapproche une requête d'un index d'expression que si l'expression est
+    identique. Seuls des noms déclarés dans type_field_configs arrivent ici.
+    """
+    function = "geoclic_jsonb_numeric" if kind == "num" else "geoclic_jsonb_date"
+    return f"{function}(custom_properties, {_sql_literal(field)})"
+
+
+def expression_index_name(kind: str, field: str) -> str:
+    """Nom stable de l'index d'expression d'un champ (les noms de champ sont libres)."""
+    digest = hashlib.md5(field.encode()).hexdigest()[:12]
+    return f"idx_cp_{kind}_{digest}"
+
+
+async def ensure_expression_index(kind: str, field: str) -> None:
+    """
+    Crée l'index d'expression d'un champ très filtré.
+
+    CREATE INDEX CONCURRENTLY ne bloque pas les écritures mais ne peut pas
+    tourner dans une transaction : connexion dédiée en autocommit.
+    IF NOT EXISTS rend l'appel sûr si plusieurs workers le lancent ; un index
+    INVALID laissé par un échec précédent est d'abord supprimé, sinon
+    IF NOT EXISTS le conserverait indéfiniment.
+    """
+    from database import engine
+
+    index_name = expression_index_name(kind, field)
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            invalid = await conn.execute(text(INVALID_INDEX_SQL), {"name": index_name})
+            if invalid.first():
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+            await conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+                f"ON geoclic_staging (({range_expression(kind, field)}))"
+            ))
+        logger.info(f"Index d'expression créé: {index_name} ({kind} {field!r})")
+    except Exception as e:
+        # Un échec laisse un index INVALID : supprimé à la prochaine tentative
+        logger.warning(f"Création de l'index {index_name} impossible: {e}")
+        with _hits_lock:
+            _indexed_fields.discard((kind, field))
+
+
+def _record_range_filter(kind: str, field: str) -> None:
+    """Compte un filtre de plage et lance la création d'index au seuil."""
+    key = (kind, field)
+    with _hits_lock:
+        if key in _indexed_fields:
+            return
+        _range_hits[key] = _range_hits.get(key, 0) + 1
+        if _range_hits[key] < HOT_FIELD_THRESHOLD:
+            return
+        _indexed_fields.add(key)
+        _range_hits.pop(key, None)
+    task = asyncio.create_task(ensure_expression_index(kind, field))
+    _index_tasks.add(task)
+    task.add_done_callback(_index_tasks.discard)
+
+
+def _invalid(field: str, reason: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Filtre invalide sur '{field}': {reason}",
+    )
+
+
+def _to_number(field: str, value: Any) -> Decimal:
+    """
+    Valeur numérique exacte d'un filtre.
+
+    Decimal et non float : la valeur est comparée à une expression NUMERIC,
+    et asyncpg enverrait 0.1 en float comme 0.1000000000000000055…, qui
+    exclurait un 0.1 stocké.
+    """
+    if isinstance(value, bool):
+        raise _invalid(field, "valeur numérique attendue")
+    try:
+        number = Decimal(str(value).replace(",", "."))
+    except (InvalidOperation, ValueError):
+        raise _invalid(field, "valeur numérique attendue")
+    if not number.is_finite():
+        raise _invalid(field, "valeur numérique attendue")
+    return number
+
+
+def _to_date(field: str, value: Any) -> date:
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise _invalid(field, "date AAAA-MM-JJ attendue")
+
+
+def _containment_candidates(field: str, field_type: Optional[str], value: Any) -> List[str]:
+    """
+    Documents JSON à tester par @> pour une valeur.
+
+    Les mobiles enregistrent les nombres tantôt en nombre, tantôt en texte
+    ("6") ; les multiselect sont des listes.
+    """
+    if field_type in ARRAY_FIELD_TYPES:
+        return [json.dumps({field: [value]})]
+    if field_type in NUMERIC_FIELD_TYPES:
+        number = _to_number(field, value)
+        # Nombre JSON écrit depuis le Decimal (json.dumps passerait par un float)
+        as_number = int(number) if number == number.to_integral_value() else number
+        return [
+            "{" + json.dumps(field) + ": " + str(as_number) + "}",
+            json.dumps({field: str(value)}),
+        ]
+    return [json.dumps({field: str(value)})]
+
+
+async def get_field_types(db: AsyncSession, fields: List[str]) -> Dict[str, str]:
+    """
+    Types déclarés des champs (type_field_configs.field_name).
+
+    Un même nom peut exister pour plusieurs types d'objets : un type numérique
+    ou date l'emporte sur le texte, pour que les plages restent possibles.
+    """
+    result = await db.execute(
+        text("""
+            SELECT field_name, field_type FROM type_field_configs
+            WHERE field_name = ANY(:fields)
+        """),
+        {"fields": fields},
+    )
+    types: Dict[str, str] = {}
+    for field_name, field_type in result.fetchall():
+        if field_type in NUMERIC_FIELD_TYPES | DATE_FIELD_TYPES or field_name not in types:
+            types[field_name] = field_type
+    return types
+
+
+async def build_custom_filters_sql(
+    db: AsyncSession,
+    custom_filters: Dict[str, Any],
+    params: dict,
+    prefix: str = "cf",
+) -> List[str]:
+    """
+    Construit les conditions WHERE des filtres sur les données techniques.
+
+    Args:
+        db: Session de base de données (lecture des types de champs)
+        custom_filters: {champ: valeur | [valeurs] | {"min", "max", "in", "eq"}}
+        params: Paramètres de la requête, complétés en place
+        prefix: Préfixe des paramètres liés
+
+    Returns:
+        Liste de conditions SQL (valeurs toujours liées en paramètres)
+
+    Raises:
+        HTTPException 400 si une valeur ne correspond pas au type du champ
+    """
+    if not custom_filters:
+        return []
+
+    field_types = await get_field_types(db, [str(key) for key in custom_filters])
+    clauses: List[str] = []
+
+    for i, (field, spec) in enumerate(custom_filters.items()):
+        field = str(field)
+        field_type = field_types.get(field)
+
+        values = None
+        bounds = None
+        if isinstance(spec, dict):
+            unknown = set(spec) - {"min", "max", "in", "eq"}
+            if unknown:
+                raise _invalid(field, f"opérateur inconnu {sorted(unknown)}")
+            if "in" in spec:
+                values = spec["in"] if isinstance(spec["in"], list) else [spec["in"]]
+            elif "eq" in spec:
+                values = [spec["eq"]]
+            if "min" in spec or "max" in spec:
+                bounds = (spec.get("min"), spec.get("max"))
+        elif isinstance(spec, list):
+            values = spec
+        else:
+            values = [spec]
+
+        if values is not None:
+            if not values or len(values) > MAX_FILTER_VALUES:
+                raise _invalid(field, f"entre 1 et {MAX_FILTER_VALUES} valeurs attendues")
+            candidates = [
+                candidate
+                for value in values
+                for candidate in _containment_candidates(field, field_type, value)
+            ]
+            # Une condition @> par valeur : chacune utilise l'index GIN (BitmapOr)
+            ors = []
+            for j, candidate in enumerate(candidates):
+                param_name = f"{prefix}_{i}_{j}"
+                params[param_name] = candidate
+                ors.append(f"custom_properties @> CAST(:{param_name} AS jsonb)")
+            clauses.append(ors[0] if len(ors) == 1 else f"({' OR '.join(ors)})")
+
+        if bounds is not None:
+            if field_type in NUMERIC_FIELD_TYPES:
+                kind, convert = "num", _to_number
+            elif field_type in DATE_FIELD_TYPES:
+                kind, convert = "date", _to_date
+            else:
+                raise _invalid(field, "plage possible uniquement sur un champ nombre ou date")
+
+            expression = range_expression(kind, field)
+            low, high = bounds
+            if low is not None:
+                params[f"{prefix}_{i}_min"] = convert(field, low)
+                clauses.append(f"{expression} >= :{prefix}_{i}_min")
+            if high is not None:
+                params[f"{prefix}_{i}_max"] = convert(field, high)
+                clauses.append(f"{expression} <= :{prefix}_{i}_max")
+            _record_range_filter(kind, field)
+
+    return clauses
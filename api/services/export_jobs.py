@@ -0,0 +1,323 @@
+"""
+Jobs d'export asynchrones - GéoClic Suite
+Exécute les exports volumineux (points, photos, QR codes) en arrière-plan au
+lieu de les produire pendant la requête, ce qui dépassait les délais du proxy.
+
+- POST /api/exports crée un job ; le client suit sa progression puis
+  télécharge le fichier (Range : un téléchargement interrompu reprend).
+- Un résultat est réutilisé pour le même utilisateur et les mêmes paramètres
+  tant que les données n'ont pas changé : chaque export déclare sa version
+  des données (par défaut le dernier seq du journal geoclic_staging_changes),
+  incluse dans la clé de cache.
+- Les jobs passent par un pool borné (settings.export_workers par worker
+  uvicorn) : les exports n'affament pas le trafic interactif.
+
+L'état des jobs est en base (export_jobs, migration 034) pour être visible de
+tous les workers ; les fichiers sont écrits dans settings.export_storage_path.
+
+Les routers enregistrent leurs exports avec register_exporter().
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Fréquence max d'écriture de la progression en base
+PROGRESS_UPDATE_SECONDS = 1.0
+
+# Un job pending/running sans mise à jour depuis ce délai est considéré interrompu
+EXPORT_JOB_STALE_MINUTES = 15
+
+
+class ExportProgress:
+    """Compteur de progression passé aux exporteurs."""
+
+    def __init__(self):
+        self.done = 0
+        self.total: Optional[int] = None
+
+    def __call__(self, count: int = 1) -> None:
+        self.done += count
+
+
+class ExportSpec:
+    """
+    Export enregistré.
+
+    Args:
+        params_model: Modèle Pydantic validant les paramètres du job
+        run: Générateur async (params, progress) -> morceaux de fichier
+        file_info: params -> (nom de fichier, type MIME)
+        data_version: (session, params) -> version des données exportées ;
+            un résultat n'est réutilisé qu'à version égale (par défaut
+            get_data_version)
+    """
+
+    def __init__(
+        self,
+        params_model: Type[BaseModel],
+        run: Callable[[BaseModel, ExportProgress], AsyncIterator[bytes]],
+        file_info: Callable[[BaseModel], Tuple[str, str]],
+        data_version: Optional[Callable[[AsyncSession, BaseModel], Awaitable[str]]] = None,
+    ):
+        self.params_model = params_model
+        self.run = run
+        self.file_info = file_info
+        self.data_version = data_version
+
+
+_exporters: Dict[str, ExportSpec] = {}
+_pool: Optional[asyncio.Semaphore] = None
+_running_tasks: set = set()
+
+
+def register_exporter(kind: str, spec: ExportSpec) -> None:
+    """Déclare un export exécutable en job (appelé à l'import des routers)."""
+    _exporters[kind] = spec
+
+
+def _get_pool() -> asyncio.Semaphore:
+    global _pool
+    if _pool is None:
+        _pool = asyncio.Semaphore(settings.export_workers)
+    return _pool
+
+
+def export_cache_key(kind: str, params: dict, version: str = "") -> str:
+    """Clé de cache d'un export : type + paramètres normalisés + version des données."""
+    canonical = json.dumps(
+        {"kind": kind, "params": params, "version": version}, sort_keys=True, default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def get_data_version(db: AsyncSession) -> Tuple[int, int]:
+    """
+    Version des données exportables : dernière position (txid, seq) du journal
+    des points parmi les transactions terminées, comme le curseur de sync.
+
+    MAX(seq) seul ne suffit pas : une séquence est attribuée avant le commit
+    (migration 025), une transaction de seq inférieur validée après la lecture
+    ne le ferait pas bouger. Une transaction terminée après coup a un txid
+    au-dessus de tous ceux déjà comptés (ils sont sous l'ancien xmin).
+    """
+    result = await db.execute(text("""
+        SELECT txid, seq FROM geoclic_staging_changes
+        WHERE txid < txid_snapshot_xmin(txid_current_snapshot())
+        ORDER BY txid DESC, seq DESC
+        LIMIT 1
+    """))
+    row = result.first()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+async def _update_job(job_id: str, **fields) -> None:
+    """Met à jour un job (session dédiée : le job survit à la requête qui l'a créé)."""
+    assignments = ", ".join(f"{name} = :{name}" for name in fields)
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(f"""
+                UPDATE export_jobs
+                SET {assignments}, updated_at = CURRENT_TIMESTAMP
+                WHERE id = CAST(:job_id AS uuid)
+            """),
+            {"job_id": job_id, **fields},
+        )
+        await db.commit()
+
+
+async def _run_job(job_id: str, spec: ExportSpec, params: BaseModel, file_path: Path) -> None:
+    """Exécute un job dans le pool borné et écrit le résultat sur disque."""
+    async with _get_pool():
+        progress = ExportProgress()
+        part_path = file_path.with_name(file_path.name + ".part")
+        written = 0
+        try:
+            await _update_job(job_id, status="running", started_at=datetime.now(timezone.utc))
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            last_update = time.monotonic()
+
+            with open(part_path, "wb") as output:
+                async for chunk in spec.run(params, progress):
+                    await asyncio.to_thread(output.write, chunk)
+                    written += len(chunk)
+                    if time.monotonic() - last_update >= PROGRESS_UPDATE_SECONDS:
+                        await _update_job(
+                            job_id,
+                            progress_done=progress.done,
+                            progress_total=progress.total,
+                            bytes_written=written,
+                        )
+                        last_update = time.monotonic()
+
+            os.replace(part_path, file_path)
+            await _update_job(
+                job_id,
+                status="done",
+                progress_done=progress.done,
+                progress_total=progress.total if progress.total is not None else progress.done,
+                bytes_written=written,
+                finished_at=datetime.now(timezone.utc),
+            )
+            logger.info(f"Export {job_id} terminé ({written} o)")
+        except Exception as e:
+            logger.exception(f"Export {job_id} en échec")
+            part_path.unlink(missing_ok=True)
+            await _update_job(
+                job_id,
+                status="error",
+                error=str(e)[:500],
+                finished_at=datetime.now(timezone.utc),
+            )
+
+
+async def purge_expired_exports(db: AsyncSession) -> None:
+    """Supprime les jobs expirés et leurs fichiers, marque les jobs interrompus."""
+    result = await db.execute(
+        text("""
+            DELETE FROM export_jobs
+            WHERE expires_at < CURRENT_TIMESTAMP
+            RETURNING file_path
+        """)
+    )
+    for (file_path,) in result.fetchall():
+        if file_path:
+            Path(file_path).unlink(missing_ok=True)
+
+    # Worker arrêté pendant un export : le job ne sera jamais terminé
+    await db.execute(
+        text("""
+            UPDATE export_jobs
+            SET status = 'error', error = 'Export interrompu', finished_at = CURRENT_TIMESTAMP
+            WHERE status IN ('pending', 'running')
+              AND updated_at < CURRENT_TIMESTAMP - make_interval(mins => :stale)
+        """),
+        {"stale": EXPORT_JOB_STALE_MINUTES},
+    )
+
+
+async def submit_export(
+    db: AsyncSession,
+    kind: str,
+    raw_params: dict,
+    user_id: Optional[str],
+) -> Tuple[dict, bool]:
+    """
+    Crée un job d'export, ou retourne un job existant pour les mêmes paramètres.
+
+    Returns:
+        (ligne export_jobs, True si un job existant est réutilisé)
+
+    Raises:
+        HTTPException 400 si le type ou les paramètres sont invalides
+    """
+    spec = _exporters.get(kind)
+    if spec is None:
+        raise HTTPException(status_code=400, detail=f"Type d'export inconnu: {kind}")
+    try:
+        params = spec.params_model(**raw_params)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Paramètres d'export invalides: {e.errors()}")
+
+    params_json = params.model_dump(mode="json")
+
+    await purge_expired_exports(db)
+    txid, seq = await get_data_version(db)
+    data_version = txid
+    if spec.data_version:
+        version = await spec.data_version(db, params)
+    else:
+        version = f"{txid}:{seq}"
+    cache_key = export_cache_key(kind, params_json, version)
+
+    # Même export déjà produit (ou en cours) pour ce même utilisateur sur les mêmes données
+    result = await db.execute(
+        text("""
+            SELECT * FROM export_jobs
+            WHERE cache_key = :cache_key
+              AND data_version = :data_version
+              AND created_by IS NOT DISTINCT FROM CAST(:created_by AS uuid)
+              AND status IN ('pending', 'running', 'done')
+            ORDER BY created_at DESC
+            LIMIT 1
+        """),
+        {"cache_key": cache_key, "data_version": data_version, "created_by": user_id},
+    )
+    existing = result.mappings().first()
+    if existing and (existing["status"] != "done" or Path(existing["file_path"]).exists()):
+        await db.commit()
+        return dict(existing), True
+
+    filename, media_type = spec.file_info(params)
+    result = await db.execute(
+        text("""
+            INSERT INTO export_jobs (
+                kind, params, cache_key, data_version, filename, media_type,
+                created_by, expires_at
+            ) VALUES (
+                :kind, CAST(:params AS jsonb), :cache_key, :data_version, :filename, :media_type,
+                CAST(:created_by AS uuid), CURRENT_TIMESTAMP + make_interval(hours => :ttl)
+            )
+            RETURNING *
+        """),
+        {
+            "kind": kind,
+            "params": json.dumps(params_json),
+            "cache_key": cache_key,
+            "data_version": data_version,
+            "filename": filename,
+            "media_type": media_type,
+            "created_by": user_id,
+            "ttl": settings.export_job_ttl_hours,
+        },
+    )
+    job = dict(result.mappings().first())
+
+    file_path = Path(settings.export_storage_path) / f"{job['id']}{Path(filename).suffix}"
+    await db.execute(
+        text("UPDATE export_jobs SET file_path = :file_path WHERE id = :id"),
+        {"file_path": str(file_path), "id": job["id"]},
+    )
+    await db.commit()
+    job["file_path"] = str(file_path)
+
+    # Garder une référence : une tâche non référencée peut être collectée
+    task = asyncio.create_task(_run_job(str(job["id"]), spec, params, file_path))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+
+    return job, False
+
+
+async def get_export_job(db: AsyncSession, job_id: str) -> dict:
+    """Retourne un job par son id (404 s'il n'existe pas ou a expiré)."""
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Export non trouvé")
+    result = await db.execute(
+        text("SELECT * FROM export_jobs WHERE id = CAST(:id AS uuid)"),
+        {"id": job_id},
+    )
+    job = result.mappings().first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Export non trouvé")
+    return dict(job)
+
@@ -0,0 +1,28 @@
+"""
+Encodage compact des géométries - GéoClic Suite
+Les listes de points (sync mobile, /api/points, /api/sig/points) peuvent
+renvoyer la géométrie déjà encodée par PostGIS (TWKB ou WKB en base64) au lieu
+d'une liste de coordonnées : la chaîne est transmise telle quelle, sans objet
+Python par sommet. Les réseaux et parcelles (longues lignes, polygones)
+représentent l'essentiel du volume et du temps CPU.
+"""
+
+from schemas.point import GeometryEncoding
+
+# Précision TWKB : 7 décimales en lon/lat (~1 cm), 2 en altitude (cm)
+TWKB_PRECISION_XY = 7
+TWKB_PRECISION_Z = 2
+
+
+def encoded_geometry_sql(encoding: GeometryEncoding, column: str = "geom") -> str:
+    """
+    Expression SQL produisant la géométrie encodée en base64.
+
+    encode(..., 'base64') coupe les lignes à 76 caractères : les retours à la
+    ligne sont retirés pour obtenir une chaîne base64 standard.
+    """
+    if encoding == GeometryEncoding.twkb:
+        binary = f"ST_AsTWKB({column}, {TWKB_PRECISION_XY}, {TWKB_PRECISION_Z})"
+    else:
+        binary = f"ST_AsBinary({column})"
+    return f"translate(encode({binary}, 'base64'), E'\\n', '')"
@@ -0,0 +1,71 @@
+"""
+Version du lexique - GéoClic Suite
+Fournit la version du lexique et des champs dynamiques comparée par le mobile
+à chaque synchronisation, ainsi que celle des projets (packages offline).
+
+Les compteurs sont tenus à jour en base par trigger (table lexique_versions,
+migration 026) ; une vérification coûte une lecture par clé primaire. Le
+résultat est gardé quelques secondes en mémoire et invalidé après chaque
+écriture faite par ce processus.
+"""
+
+import threading
+import time
+from typing import Optional, Dict, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+# Durée de vie du cache (les écritures des autres workers sont vues après ce délai)
+LEXIQUE_VERSION_TTL_SECONDS = 10
+
+# Cache en mémoire: clé (project_id, "all" ou "projects") -> (expiration monotonic, version)
+_version_cache: Dict[str, Tuple[float, str]] = {}
+_version_lock = threading.Lock()
+
+
+async def _read_versions(db: AsyncSession, cache_key: str, scopes: List[str]) -> str:
+    """Lit les compteurs des scopes demandés (cache mémoire avec TTL)."""
+    now = time.monotonic()
+    with _version_lock:
+        cached = _version_cache.get(cache_key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    result = await db.execute(
+        text("SELECT scope, version FROM lexique_versions WHERE scope = ANY(:scopes)"),
+        {"scopes": scopes},
+    )
+    versions = {row[0]: row[1] for row in result.fetchall()}
+    version = ".".join(str(versions.get(scope, 0)) for scope in scopes)
+
+    with _version_lock:
+        _version_cache[cache_key] = (now + LEXIQUE_VERSION_TTL_SECONDS, version)
+    return version
+
+
+async def get_lexique_version(db: AsyncSession, project_id: Optional[str] = None) -> str:
+    """
+    Retourne la version du lexique.
+
+    Args:
+        db: Session de base de données
+        project_id: Projet concerné ; None pour la version globale
+
+    Returns:
+        "<projet>.<partagé>" pour un projet, "<all>" sinon
+    """
+    project_id = project_id.lower() if project_id else None
+    if project_id:
+        return await _read_versions(db, project_id, [project_id, "shared"])
+    return await _read_versions(db, "all", ["all"])
+
+
+async def get_projects_version(db: AsyncSession) -> str:
+    """Retourne la version de la table projects (migration 027)."""
+    return await _read_versions(db, "projects", ["projects"])
+
+
+def invalidate_lexique_version() -> None:
+    """Vide le cache après une écriture sur lexique, type_field_configs ou projects."""
+    with _version_lock:
+        _version_cache.clear()
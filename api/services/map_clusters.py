@@ -0,0 +1,155 @@
+"""
+Regroupement des marqueurs de carte - GéoClic Suite
+Aux petits niveaux de zoom, la carte publique reçoit des regroupements
+calculés en SQL au lieu de milliers de marqueurs : les objets sont rangés
+dans une grille Web Mercator (ST_SnapToGrid) dont la maille vaut environ
+CLUSTER_CELL_PIXELS pixels à l'écran, puis comptés par maille et par
+catégorie.
+
+Chaque regroupement donne la position moyenne de ses objets, leur nombre,
+la répartition par catégorie et son emprise (zoom au clic). Un objet isolé
+garde son identifiant.
+
+L'emprise demandée est étendue aux limites des tuiles du zoom (snap_bbox) :
+deux vues voisines partagent la même requête, donc la même entrée du cache
+des réponses publiques.
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Taille d'une maille à l'écran (tuiles raster de 256 px)
+CLUSTER_CELL_PIXELS = 60
+
+# À partir de ce zoom (rue), les marqueurs sont renvoyés individuellement
+CLUSTER_MAX_ZOOM = 16
+
+# Largeur du monde en Web Mercator (mètres)
+WEB_MERCATOR_WIDTH = 40075016.685578488
+
+# Latitude limite de Web Mercator (monde carré)
+WEB_MERCATOR_MAX_LAT = 85.0511287798
+
+# Sans zoom fourni : tuiles choisies pour couvrir l'emprise en environ 4 colonnes
+SNAP_TILES_ACROSS = 4
+
+# (lon min, lat min, lon max, lat max) en WGS84
+BBox = Tuple[float, float, float, float]
+
+# Agrège une source (id, pt = point WGS84, category) par maille
+CLUSTER_SQL = """
+    WITH source AS ({source}),
+    snapped AS (
+        SELECT id, pt, category,
+               ST_SnapToGrid(ST_Transform(pt, 3857), CAST(:cell_size AS float8)) AS cell
+        FROM source
+        WHERE pt IS NOT NULL
+    ),
+    by_category AS (
+        SELECT ST_X(cell) AS cell_x, ST_Y(cell) AS cell_y, category,
+               COUNT(*) AS n,
+               SUM(ST_X(pt)) AS sum_lng, SUM(ST_Y(pt)) AS sum_lat,
+               MIN(ST_X(pt)) AS min_lng, MAX(ST_X(pt)) AS max_lng,
+               MIN(ST_Y(pt)) AS min_lat, MAX(ST_Y(pt)) AS max_lat,
+               MIN(id::text) AS any_id
+        FROM snapped
+        GROUP BY 1, 2, 3
+    )
+    SELECT SUM(n)::int AS count,
+           SUM(sum_lng) / SUM(n) AS longitude,
+           SUM(sum_lat) / SUM(n) AS latitude,
+           MIN(min_lng) AS min_lng, MAX(max_lng) AS max_lng,
+           MIN(min_lat) AS min_lat, MAX(max_lat) AS max_lat,
+           jsonb_object_agg(COALESCE(category, ''), n) AS categories,
+           CASE WHEN SUM(n) = 1 THEN MIN(any_id) END AS id
+    FROM by_category
+    GROUP BY cell_x, cell_y
+    ORDER BY count DESC
+"""
+
+
+def use_clusters(zoom: Optional[int]) -> bool:
+    """Mode regroupé : zoom fourni et inférieur au zoom des marqueurs individuels."""
+    return zoom is not None and zoom < CLUSTER_MAX_ZOOM
+
+
+def cluster_cell_size(zoom: int) -> float:
+    """Maille de la grille en mètres Web Mercator pour un niveau de zoom."""
+    return WEB_MERCATOR_WIDTH / (256 * 2 ** zoom) * CLUSTER_CELL_PIXELS
+
+
+def _mercator(lng: float, lat: float) -> Tuple[float, float]:
+    lat = max(-WEB_MERCATOR_MAX_LAT, min(WEB_MERCATOR_MAX_LAT, lat))
+    radius = WEB_MERCATOR_WIDTH / (2 * math.pi)
+    return (
+        lng / 360 * WEB_MERCATOR_WIDTH,
+        radius * math.log(math.tan(math.pi / 4 + math.radians(lat) / 2)),
+    )
+
+
+def _wgs84(x: float, y: float) -> Tuple[float, float]:
+    radius = WEB_MERCATOR_WIDTH / (2 * math.pi)
+    return (
+        round(x / WEB_MERCATOR_WIDTH * 360, 7),
+        round(math.degrees(2 * math.atan(math.exp(y / radius)) - math.pi / 2), 7),
+    )
+
+
+def snap_bbox(bbox: BBox, zoom: Optional[int] = None) -> BBox:
+    """
+    Étend une emprise aux limites des tuiles Web Mercator qu'elle touche.
+
+    Un déplacement de carte qui reste dans les mêmes tuiles donne la même
+    emprise. Sans zoom, la taille des tuiles suit la largeur de l'emprise.
+    """
+    min_x, min_y = _mercator(bbox[0], bbox[1])
+    max_x, max_y = _mercator(bbox[2], bbox[3])
+    if zoom is None:
+        width = max(max_x - min_x, 1.0)
+        zoom = int(math.log2(WEB_MERCATOR_WIDTH * SNAP_TILES_ACROSS / width))
+    zoom = max(0, min(22, zoom))
+
+    tile = WEB_MERCATOR_WIDTH / 2 ** zoom
+    half = WEB_MERCATOR_WIDTH / 2
+
+    def floor_edge(value: float) -> float:
+        return max(-half, math.floor((value + half) / tile) * tile - half)
+
+    def ceil_edge(value: float) -> float:
+        return min(half, math.ceil((value + half) / tile) * tile - half)
+
+    return (
+        *_wgs84(floor_edge(min_x), floor_edge(min_y)),
+        *_wgs84(ceil_edge(max_x), ceil_edge(max_y)),
+    )
+
+
+def bbox_condition(column: str, bbox: Optional[BBox], params: dict) -> Optional[str]:
+    """Condition d'emprise (index GiST) ; ajoute les bornes à params."""
+    if bbox is None:
+        return None
+    params.update(dict(zip(("min_lng", "min_lat", "max_lng", "max_lat"), bbox)))
+    return f"{column} && ST_MakeEnvelope(:min_lng, :min_lat, :max_lng, :max_lat, 4326)"
+
+
+async def fetch_clusters(db: AsyncSession, source_sql: str, params: dict, zoom: int) -> List[dict]:
+    """
+    Regroupe les objets d'une requête source.
+
+    Args:
+        source_sql: SELECT produisant id, pt (point WGS84) et category,
+            filtres et emprise déjà appliqués
+        params: Paramètres de la requête source
+        zoom: Niveau de zoom de la carte
+
+    Returns:
+        Regroupements (count, latitude, longitude, bornes, categories, id)
+    """
+    result = await db.execute(
+        text(CLUSTER_SQL.format(source=source_sql)),
+        {**params, "cell_size": cluster_cell_size(zoom)},
+    )
+    return [dict(row) for row in result.mappings().all()]
@@ -0,0 +1,99 @@
+"""
+Équipements les plus proches - GéoClic Suite
+Recherche des N points de geoclic_staging les plus proches d'une position
+(« l'équipement le plus proche de moi ») par l'opérateur KNN `<->` : le
+parcours de l'index GiST idx_staging_geom s'arrête aux premiers candidats,
+sans rayon à deviner ni distance calculée pour toute la table.
+
+`<->` mesure en degrés (SRID 4326), ce qui déforme l'est-ouest selon la
+latitude : la recherche prend quelques candidats de plus (KNN_OVERSAMPLE),
+calcule leur distance géodésique en mètres, puis les reclasse.
+
+La position est écrite directement dans l'ORDER BY des candidats : prise
+dans une CTE utilisée deux fois, elle serait matérialisée, et un ORDER BY
+sur la colonne d'une autre relation ne peut pas être servi par l'index
+(parcours complet puis tri à chaque requête).
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.point_filters import join_conditions
+
+MAX_NEAREST = 100
+
+# Candidats KNN par résultat demandé (reclassement en mètres)
+KNN_OVERSAMPLE = 3
+
+# Position recherchée (répétée plutôt que partagée par une CTE, voir plus haut)
+ORIGIN_SQL = "ST_SetSRID(ST_MakePoint(:lng, :lat), 4326)"
+
+NEAREST_SQL = """
+    WITH candidates AS (
+        SELECT t.id, t.name, t.type, t.subtype, t.lexique_code, t.sync_status,
+               t.project_id, t.geom
+        FROM geoclic_staging t
+        WHERE t.geom IS NOT NULL AND {where_sql}
+        ORDER BY t.geom <-> {origin}
+        LIMIT :candidates
+    )
+    SELECT c.id::text AS id, c.name, c.type, c.subtype, c.lexique_code,
+           c.sync_status, c.project_id::text AS project_id,
+           sc.short_code,
+           ST_Y(ST_PointOnSurface(c.geom)) AS latitude,
+           ST_X(ST_PointOnSurface(c.geom)) AS longitude,
+           ST_Distance(c.geom::geography, {origin}::geography) AS distance
+    FROM candidates c
+    LEFT JOIN LATERAL (
+        SELECT short_code FROM short_codes WHERE point_id = c.id ORDER BY id LIMIT 1
+    ) sc ON TRUE
+    ORDER BY distance
+    LIMIT :limit
+"""
+
+
+async def find_nearest_points(
+    db: AsyncSession,
+    lat: float,
+    lng: float,
+    limit: int,
+    clauses: List[str],
+    params: dict,
+    max_distance: Optional[float] = None,
+) -> List[dict]:
+    """
+    Points les plus proches d'une position.
+
+    Args:
+        lat, lng: Position (WGS84)
+        limit: Nombre de points (au plus MAX_NEAREST)
+        clauses: Conditions sur geoclic_staging (compile_point_filters)
+        params: Paramètres des conditions
+        max_distance: Distance maximale en mètres
+
+    Returns:
+        Points (id, name, type, short_code, latitude, longitude, distance en
+        mètres arrondie au centimètre), du plus proche au plus éloigné
+    """
+    limit = min(limit, MAX_NEAREST)
+    result = await db.execute(
+        text(NEAREST_SQL.format(where_sql=join_conditions(clauses), origin=ORIGIN_SQL)),
+        {
+            **params,
+            "lat": lat,
+            "lng": lng,
+            "limit": limit,
+            "candidates": limit * KNN_OVERSAMPLE,
+        },
+    )
+
+    points = []
+    for row in result.mappings().all():
+        if max_distance is not None and row["distance"] > max_distance:
+            break
+        point = dict(row)
+        point["distance"] = round(point["distance"], 2)
+        points.append(point)
+    return points
@@ -0,0 +1,181 @@
+"""
+Packages offline pré-construits - GéoClic Suite
+Matérialise les packages offline (lexique, champs dynamiques, projets) sous
+forme d'artefacts JSON déjà compressés, servis avec un ETag fort.
+
+Un artefact est reconstruit uniquement quand sa version change (compteurs de
+lexique_versions, migrations 026/027). En début de tournée, quand des dizaines
+de tablettes demandent le même package à la même minute, une seule requête
+le construit ; les autres attendent puis reçoivent les mêmes octets, ou un
+304 si leur copie est à jour.
+
+Le corps d'un artefact ne contient rien de propre à la requête : server_time
+y est l'heure de construction du package, l'heure du serveur est envoyée à
+chaque réponse dans l'en-tête X-Server-Time, et les permissions recopiées
+dans le package font partie de la clé (permissions_fingerprint).
+
+Le cache est borné en octets (OFFLINE_ARTIFACTS_MAX_BYTES), variantes
+compressées comprises.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel, gzip est toujours disponible
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Taille max des artefacts gardés en mémoire (brut + variantes compressées)
+OFFLINE_ARTIFACTS_MAX_BYTES = 64 * 1024 * 1024
+
+
+class OfflineArtifact:
+    """Package sérialisé une fois, avec ses variantes compressées."""
+
+    def __init__(self, version: str, raw: bytes):
+        self.version = version
+        self.raw = raw
+        self.gzip = gzip.compress(raw, compresslevel=6)
+        self.brotli = brotli.compress(raw) if brotli else None
+        self.etag_base = hashlib.sha256(raw).hexdigest()[:32]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.raw) + len(self.gzip) + len(self.brotli or b"")
+
+
+_artifacts: "OrderedDict[str, OfflineArtifact]" = OrderedDict()
+_artifacts_bytes = 0
+_build_locks: dict = {}
+
+
+def _store_artifact(key: str, artifact: OfflineArtifact) -> None:
+    """Garde un artefact ; évince les plus anciens au-delà de OFFLINE_ARTIFACTS_MAX_BYTES."""
+    global _artifacts_bytes
+    previous = _artifacts.pop(key, None)
+    if previous:
+        _artifacts_bytes -= previous.nbytes
+    _artifacts[key] = artifact
+    _artifacts_bytes += artifact.nbytes
+
+    # Le dernier artefact construit reste, même s'il dépasse seul la limite
+    while _artifacts_bytes > OFFLINE_ARTIFACTS_MAX_BYTES and len(_artifacts) > 1:
+        evicted_key, evicted = _artifacts.popitem(last=False)
+        _artifacts_bytes -= evicted.nbytes
+        _build_locks.pop(evicted_key, None)
+
+
+async def get_offline_artifact(
+    key: str,
+    version: str,
+    build: Callable[[], Awaitable[Any]],
+) -> OfflineArtifact:
+    """
+    Retourne l'artefact `key` pour `version`, en le construisant si nécessaire.
+
+    Args:
+        key: Identifiant du package (endpoint, projet, variante de droits...)
+        version: Version des données sources ; tout changement force la reconstruction
+        build: Coroutine produisant le package (modèle Pydantic ou dict) ;
+            tout ce qu'il contient est partagé par les requêtes de la clé
+    """
+    artifact = _artifacts.get(key)
+    if artifact and artifact.version == version:
+        _artifacts.move_to_end(key)
+        return artifact
+
+    lock = _build_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        # Un autre appel a pu construire l'artefact pendant l'attente
+        artifact = _artifacts.get(key)
+        if artifact and artifact.version == version:
+            return artifact
+
+        payload = await build()
+        if hasattr(payload, "model_dump_json"):
+            raw = payload.model_dump_json().encode()
+        else:
+            raw = json.dumps(payload, default=str, ensure_ascii=False).encode()
+
+        artifact = OfflineArtifact(version, raw)
+        _store_artifact(key, artifact)
+
+        logger.info(
+            f"Package offline construit: {key} v{version} "
+            f"({len(raw)} o, en mémoire {artifact.nbytes} o)"
+        )
+        return artifact
+
+
+def _if_none_match(request: Request, etag_base: str) -> bool:
+    """Comparaison faible (RFC 9110) de If-None-Match avec l'ETag de l'artefact."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        # Ignorer le suffixe d'encodage (-gz, -br) : même contenu décompressé
+        if tag.split("-")[0] == etag_base:
+            return True
+    return False
+
+
+def artifact_response(request: Request, artifact: OfflineArtifact) -> Response:
+    """
+    Sert un artefact : 304 si le client a déjà ce contenu, sinon la variante
+    la plus compacte acceptée par Accept-Encoding. L'heure du serveur est
+    dans l'en-tête X-Server-Time, hors du corps partagé.
+    """
+    headers = {
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
+        "X-Server-Time": datetime.utcnow().isoformat(),
+    }
+
+    if _if_none_match(request, artifact.etag_base):
+        headers["ETag"] = f'"{artifact.etag_base}"'
+        return Response(status_code=304, headers=headers)
+
+    accept_encoding = request.headers.get("accept-encoding", "").lower()
+    if artifact.brotli is not None and "br" in accept_encoding:
+        body, suffix = artifact.brotli, "-br"
+        headers["Content-Encoding"] = "br"
+    elif "gzip" in accept_encoding:
+        body, suffix = artifact.gzip, "-gz"
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body, suffix = artifact.raw, ""
+
+    # ETag distinct par encodage, comme l'exige la RFC
+    headers["ETag"] = f'"{artifact.etag_base}{suffix}"'
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def permissions_fingerprint(allowed_projects: Optional[list], permissions: Optional[dict] = None) -> str:
+    """
+    Empreinte courte des droits, pour séparer les artefacts : projets
+    autorisés et, si elles sont recopiées dans le package, permissions.
+    """
+    if allowed_projects is None and not permissions:
+        return "all"
+    scope = "all" if allowed_projects is None else ",".join(sorted(allowed_projects))
+    if permissions:
+        scope += "|" + json.dumps(permissions, sort_keys=True, default=str)
+    return hashlib.sha256(scope.encode()).hexdigest()[:12]
@@ -0,0 +1,464 @@
+"""
+Exports de points en flux - GéoClic Suite
+Générateurs d'export (GeoJSON, CSV) lisant geoclic_staging par curseur serveur :
+les lignes arrivent par paquets de EXPORT_CHUNK_SIZE et sont émises dès
+qu'elles sont lues. La mémoire du worker reste constante quelle que soit la
+taille de l'export.
+
+Chaque Feature est sérialisée par PostgreSQL (json_build_object) : côté
+Python, un paquet se réduit à une jointure de chaînes. Le CSV découvre ses
+colonnes dynamiques par une agrégation des clés custom_properties avant de
+lire les lignes une seule fois, éventuellement compressées en gzip à la volée.
+Le ZIP avec photos est produit par ZipStream (services/zip_stream.py).
+"""
+
+import csv
+import json
+import tempfile
+import zlib
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+from typing import AsyncIterator, Callable, List, Optional
+
+from sqlalchemy import text
+
+from config import settings
+from database import AsyncSessionLocal
+from services.zip_stream import ZipStream
+
+# Lignes lues par aller-retour sur le curseur serveur
+EXPORT_CHUNK_SIZE = 1000
+
+# Rappel de progression : reçoit le nombre de points traités depuis l'appel précédent
+ProgressCallback = Optional[Callable[[int], None]]
+
+# Propriétés d'un point exporté ; les champs dynamiques sont ajoutés
+# avec le préfixe custom_ (format historique de /export/geojson)
+GEOJSON_FEATURE_SQL = """
+    json_build_object(
+        'type', 'Feature',
+        'id', id::text,
+        'geometry', ST_AsGeoJSON(geom)::json,
+        'properties',
+        jsonb_build_object(
+            'name', name,
+            'type', type,
+            'subtype', subtype,
+            'lexique_code', lexique_code,
+            'condition_state', condition_state,
+            'point_status', point_status,
+            'sync_status', sync_status,
+            'comment', comment,
+            'materiau', materiau,
+            'hauteur', hauteur,
+            'largeur', largeur,
+            'photos', photos,
+            'created_at', created_at,
+            'updated_at', updated_at
+        ) || CASE WHEN jsonb_typeof(custom_properties) = 'object' THEN COALESCE(
+            (SELECT jsonb_object_agg('custom_' || key, value) FROM jsonb_each(custom_properties)),
+            '{}'::jsonb
+        ) ELSE '{}'::jsonb END
+    )::text
+"""
+
+
+async def count_export_points(where_sql: str, params: dict) -> int:
+    """Nombre de points d'un export (total affiché par les jobs d'export)."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            text(f"SELECT COUNT(*) FROM geoclic_staging WHERE {where_sql}"), params
+        )
+        return result.scalar() or 0
+
+
+async def stream_geojson(
+    where_sql: str,
+    params: dict,
+    progress: ProgressCallback = None,
+) -> AsyncIterator[bytes]:
+    """
+    Émet une FeatureCollection GeoJSON paquet par paquet.
+
+    Args:
+        where_sql: Conditions WHERE (littérales du code, valeurs paramétrées)
+        params: Paramètres liés de where_sql
+        progress: Rappel de progression (jobs d'export)
+
+    Le générateur ouvre sa propre session : il s'exécute après le retour de
+    l'endpoint, une fois la session de la requête fermée.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            text(f"""
+                SELECT {GEOJSON_FEATURE_SQL} AS feature
+                FROM geoclic_staging
+                WHERE {where_sql}
+                ORDER BY created_at DESC
+            """),
+            params,
+        )
+        yield b'{"type":"FeatureCollection","features":['
+        separator = ""
+        async for features in result.scalars().partitions(EXPORT_CHUNK_SIZE):
+            yield (separator + ",".join(features)).encode()
+            separator = ","
+            if progress:
+                progress(len(features))
+        yield b"]}"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CSV
+# ═══════════════════════════════════════════════════════════════════════════════
+
+CSV_BASE_HEADERS = [
+    "ID", "Nom", "Type", "Sous-type", "Code Lexique",
+    "État", "Statut", "Sync", "Commentaire",
+    "Matériau", "Hauteur", "Largeur",
+    "Latitude", "Longitude", "Photos",
+    "Date création", "Date modification"
+]
+
+# Latitude/longitude pour les seuls points (ST_X/ST_Y échouent sur une ligne
+# ou un polygone, ce qui couperait le flux en cours de route)
+CSV_SELECT_SQL = """
+    SELECT id, name, type, subtype, lexique_code,
+           condition_state, point_status, sync_status,
+           comment, materiau, hauteur, largeur,
+           photos, custom_properties,
+           CASE WHEN GeometryType(geom) = 'POINT' THEN ST_Y(geom) END as latitude,
+           CASE WHEN GeometryType(geom) = 'POINT' THEN ST_X(geom) END as longitude,
+           created_at, updated_at
+    FROM geoclic_staging
+"""
+
+
+async def discover_custom_keys(db, where_sql: str, params: dict) -> List[str]:
+    """
+    Clés des champs dynamiques présentes dans les points exportés.
+
+    Agrégation côté serveur (seules les clés distinctes reviennent) : les
+    lignes ne sont lues qu'une fois, par le flux qui suit.
+    """
+    result = await db.execute(
+        text(f"""
+            SELECT DISTINCT key
+            FROM geoclic_staging
+            CROSS JOIN LATERAL jsonb_object_keys(
+                CASE WHEN jsonb_typeof(custom_properties) = 'object'
+                     THEN custom_properties ELSE '{{}}'::jsonb END
+            ) AS key
+            WHERE {where_sql}
+        """),
+        params,
+    )
+    # Tri Python (ordre des points de code), indépendant de la collation
+    return sorted(row[0] for row in result.fetchall())
+
+
+def csv_row(row, custom_keys: List[str]) -> list:
+    """Ligne CSV d'un point : colonnes de base puis champs dynamiques."""
+    photos_str = ""
+    if row["photos"]:
+        photos = row["photos"]
+        if isinstance(photos, str):
+            photos = json.loads(photos)
+        if isinstance(photos, list):
+            photos_str = " | ".join(str(p) for p in photos)
+
+    base_data = [
+        str(row["id"]),
+        row["name"] or "",
+        row["type"] or "",
+        row["subtype"] or "",
+        row["lexique_code"] or "",
+        row["condition_state"] or "",
+        row["point_status"] or "",
+        row["sync_status"] or "",
+        row["comment"] or "",
+        row["materiau"] or "",
+        str(row["hauteur"]) if row["hauteur"] else "",
+        str(row["largeur"]) if row["largeur"] else "",
+        str(row["latitude"]) if row["latitude"] else "",
+        str(row["longitude"]) if row["longitude"] else "",
+        photos_str,
+        row["created_at"].isoformat() if row["created_at"] else "",
+        row["updated_at"].isoformat() if row["updated_at"] else "",
+    ]
+
+    custom = row["custom_properties"]
+    if isinstance(custom, str):
+        custom = json.loads(custom)
+    if not isinstance(custom, dict):
+        custom = {}
+
+    custom_data = []
+    for key in custom_keys:
+        value = custom.get(key, "")
+        # Convertir les listes en chaîne
+        if isinstance(value, list):
+            value = " | ".join(str(v) for v in value)
+        custom_data.append(str(value) if value else "")
+
+    return base_data + custom_data
+
+
+async def stream_csv(
+    where_sql: str,
+    params: dict,
+    compress: bool = False,
+    progress: ProgressCallback = None,
+) -> AsyncIterator[bytes]:
+    """
+    Émet l'export CSV (séparateur ;) paquet par paquet.
+
+    Args:
+        where_sql: Conditions WHERE (littérales du code, valeurs paramétrées)
+        params: Paramètres liés de where_sql
+        compress: Compresser le flux en gzip (Content-Encoding: gzip)
+        progress: Rappel de progression (jobs d'export)
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    # wbits=31 : en-tête et pied gzip
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def take() -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    async with AsyncSessionLocal() as db:
+        custom_keys = await discover_custom_keys(db, where_sql, params)
+        writer.writerow(CSV_BASE_HEADERS + [f"[{k}]" for k in custom_keys])
+        yield take()
+
+        result = await db.stream(
+            text(f"{CSV_SELECT_SQL} WHERE {where_sql} ORDER BY created_at DESC"),
+            params,
+        )
+        async for rows in result.mappings().partitions(EXPORT_CHUNK_SIZE):
+            writer.writerows(csv_row(row, custom_keys) for row in rows)
+            chunk = take()
+            if chunk:
+                yield chunk
+            if progress:
+                progress(len(rows))
+
+    if compressor:
+        yield compressor.flush()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ZIP AVEC PHOTOS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# data.geojson et data.csv passent sur disque au-delà de cette taille
+ZIP_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+ZIP_CSV_HEADERS = [
+    "id", "name", "type", "lexique_code", "latitude", "longitude",
+    "condition_state", "point_status", "sync_status", "comment",
+    "photos_count", "created_at",
+]
+
+ZIP_SELECT_SQL = """
+    SELECT id, name, type, subtype, lexique_code,
+           condition_state, point_status, sync_status,
+           comment, photos, custom_properties,
+           materiau, hauteur, largeur,
+           created_at, updated_at,
+           ST_AsGeoJSON(geom)::json as geometry,
+           CASE WHEN GeometryType(geom) = 'POINT' THEN ST_X(geom) END as longitude,
+           CASE WHEN GeometryType(geom) = 'POINT' THEN ST_Y(geom) END as latitude
+    FROM geoclic_staging
+"""
+
+
+def photo_file_path(photo_url: str) -> Optional[Path]:
+    """
+    Chemin disque d'une photo servie sous /api/photos/, None si l'URL sort
+    du stockage (autre origine, ../).
+    """
+    if not photo_url or not photo_url.startswith("/api/photos/"):
+        return None
+    file_path = Path(settings.photo_storage_path) / photo_url[len("/api/photos/"):]
+    if not file_path.resolve().is_relative_to(Path(settings.photo_storage_path).resolve()):
+        return None
+    return file_path
+
+
+async def stream_points_zip(
+    where_sql: str,
+    params: dict,
+    max_points: Optional[int] = None,
+    max_photos: Optional[int] = None,
+    progress: ProgressCallback = None,
+) -> AsyncIterator[bytes]:
+    """
+    Émet l'archive ZIP des points (data.geojson, data.csv, photos/, README.txt).
+
+    Les photos sont ajoutées au fil de la lecture des points ; GeoJSON et CSV
+    s'accumulent dans des fichiers temporaires ajoutés en fin d'archive.
+
+    Args:
+        where_sql: Conditions WHERE (littérales du code, valeurs paramétrées)
+        params: Paramètres liés de where_sql
+        max_points: Nombre max de points (None : tous)
+        max_photos: Nombre max de photos (None : toutes)
+        progress: Rappel de progression (jobs d'export)
+    """
+    archive = ZipStream()
+    photos_added = 0
+    photos_errors = []
+    points_count = 0
+
+    geojson_file = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_MEMORY)
+    csv_file = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_MEMORY)
+    try:
+        geojson_file.write(b'{"type": "FeatureCollection", "features": [')
+        csv_buffer = StringIO()
+        csv_writer = csv.DictWriter(csv_buffer, fieldnames=ZIP_CSV_HEADERS, delimiter=";")
+        csv_writer.writeheader()
+
+        limit_sql = ""
+        if max_points:
+            limit_sql = "LIMIT :max_points"
+            params = {**params, "max_points": max_points}
+
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(
+                text(f"{ZIP_SELECT_SQL} WHERE {where_sql} ORDER BY created_at DESC {limit_sql}"),
+                params,
+            )
+            async for rows in result.mappings().partitions(EXPORT_CHUNK_SIZE):
+                features = []
+                for row in rows:
+                    point_id = str(row["id"])
+                    short_id = point_id[:8]  # ID court pour les noms de fichiers
+
+                    photos_data = row["photos"] or []
+                    if isinstance(photos_data, str):
+                        try:
+                            photos_data = json.loads(photos_data)
+                        except ValueError:
+                            photos_data = []
+
+                    photo_files_in_zip = []
+                    for idx, photo in enumerate(photos_data):
+                        if max_photos and photos_added >= max_photos:
+                            break
+
+                        # URL format: /api/photos/2026/01/filename.jpg
+                        photo_url = photo.get("url") if isinstance(photo, dict) else photo
+                        file_path = photo_file_path(photo_url)
+                        if file_path is None:
+                            continue
+
+                        ext = file_path.suffix or ".jpg"
+                        zip_filename = f"photos/{short_id}_{idx + 1}{ext}"
+                        try:
+                            async for chunk in archive.add_file(zip_filename, file_path):
+                                yield chunk
+                            photo_files_in_zip.append(zip_filename)
+                            photos_added += 1
+                        except FileNotFoundError:
+                            photos_errors.append(f"{point_id}: fichier non trouvé {file_path}")
+                        except OSError as e:
+                            photos_errors.append(f"{point_id}: {str(e)}")
+
+                    properties = {
+                        "id": point_id,
+                        "name": row["name"],
+                        "type": row["type"],
+                        "subtype": row["subtype"],
+                        "lexique_code": row["lexique_code"],
+                        "condition_state": row["condition_state"],
+                        "point_status": row["point_status"],
+                        "sync_status": row["sync_status"],
+                        "comment": row["comment"],
+                        "materiau": row["materiau"],
+                        "hauteur": row["hauteur"],
+                        "largeur": row["largeur"],
+                        "photos": photo_files_in_zip,  # Chemins relatifs dans le ZIP
+                        "photos_metadata": photos_data,  # Métadonnées originales
+                        "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+                        "updated_at": row["updated_at"].isoformat() if row["updated_at"] else None,
+                    }
+
+                    custom = row["custom_properties"]
+                    if isinstance(custom, str):
+                        custom = json.loads(custom)
+                    if isinstance(custom, dict):
+                        for key, value in custom.items():
+                            properties[f"custom_{key}"] = value
+
+                    features.append(json.dumps({
+                        "type": "Feature",
+                        "id": point_id,
+                        "geometry": row["geometry"],
+                        "properties": properties,
+                    }, ensure_ascii=False, default=str))
+
+                    csv_writer.writerow({
+                        "id": point_id,
+                        "name": row["name"],
+                        "type": row["type"],
+                        "lexique_code": row["lexique_code"],
+                        "latitude": row["latitude"],
+                        "longitude": row["longitude"],
+                        "condition_state": row["condition_state"],
+                        "point_status": row["point_status"],
+                        "sync_status": row["sync_status"],
+                        "comment": row["comment"],
+                        "photos_count": len(photo_files_in_zip),
+                        "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+                    })
+
+                separator = ", " if points_count else ""
+                geojson_file.write((separator + ", ".join(features)).encode())
+                points_count += len(features)
+                csv_file.write(csv_buffer.getvalue().encode())
+                csv_buffer.seek(0)
+                csv_buffer.truncate()
+                if progress:
+                    progress(len(rows))
+
+        metadata = {
+            "exported_at": datetime.now().isoformat(),
+            "points_count": points_count,
+            "photos_count": photos_added,
+            "photos_errors": len(photos_errors),
+        }
+        geojson_file.write(f'], "metadata": {json.dumps(metadata)}}}'.encode())
+
+        geojson_file.seek(0)
+        async for chunk in archive.add_stream("data.geojson", geojson_file):
+            yield chunk
+        csv_file.seek(0)
+        async for chunk in archive.add_stream("data.csv", csv_file):
+            yield chunk
+
+        readme_content = f"""# Export GéoClic Data
+Exporté le: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+
+## Contenu
+- data.geojson : {points_count} points au format GeoJSON
+- data.csv : {points_count} points au format CSV (séparateur: ;)
+- photos/ : {photos_added} fichiers photos
+
+## Format des noms de photos
+Les photos sont nommées: {{id_point_court}}_{{numero}}.jpg
+Exemple: 3a32b799_1.jpg = première photo du point 3a32b799-xxxx-xxxx-xxxx
+
+## Erreurs photos ({len(photos_errors)})
+{chr(10).join(photos_errors) if photos_errors else "Aucune erreur"}
+"""
+        yield archive.add_bytes("README.txt", readme_content)
+        yield archive.close()
+    finally:
+        geojson_file.close()
+        csv_file.close()
@@ -0,0 +1,125 @@
+"""
+Filtres des points - GéoClic Suite
+Compile les filtres communs des listes et exports de points (projet, statut,
+type, codes lexique, sous-arbres du lexique, dates, sélection d'ids) en
+conditions SQL paramétrées.
+
+Le texte SQL produit ne dépend que des filtres présents, jamais du nombre de
+valeurs : une liste de codes lexique devient `lexique_code = ANY(:lexique_codes)`
+et non N placeholders. Les mêmes requêtes reviennent donc avec le même texte
+et profitent du cache de requêtes préparées d'asyncpg (par connexion).
+
+Les prédicats correspondent aux index de geoclic_staging (migrations 031 et
+035) : (project_id | lexique_code | sync_status, created_at DESC, id DESC),
+et à l'index GIN du chemin de catégorie (migration 036).
+"""
+
+import uuid
+from datetime import date
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+def parse_code_list(value: Optional[str]) -> List[str]:
+    """Codes séparés par des virgules (filtrage hiérarchique) -> liste sans doublon."""
+    if not value:
+        return []
+    return list(dict.fromkeys(code.strip() for code in value.split(",") if code.strip()))
+
+
+def _parse_date(name: str, value: str) -> date:
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{name}: date AAAA-MM-JJ attendue",
+        )
+
+
+def compile_point_filters(
+    project_id: Optional[str] = None,
+    sync_status=None,
+    type_filter: Optional[str] = None,
+    lexique_code: Optional[str] = None,
+    lexique_subtree: Optional[str] = None,
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+    point_ids: Optional[List[str]] = None,
+) -> Tuple[List[str], dict]:
+    """
+    Compile les filtres en conditions WHERE sur geoclic_staging.
+
+    Args:
+        project_id: UUID du projet
+        sync_status: Statut de workflow (SyncStatus ou chaîne)
+        type_filter: Type d'objet
+        lexique_code: Code lexique, ou codes séparés par des virgules
+        lexique_subtree: Catégorie(s) dont tous les descendants sont inclus
+            (codes séparés par des virgules)
+        date_start: Date de création minimale (AAAA-MM-JJ, incluse)
+        date_end: Date de création maximale (AAAA-MM-JJ, journée incluse)
+        point_ids: Sélection explicite de points
+
+    Returns:
+        (conditions, paramètres) ; les conditions sont des littérales du code,
+        toutes les valeurs passent en paramètres liés
+
+    Raises:
+        HTTPException 400 si une date ou un id est invalide
+    """
+    clauses: List[str] = []
+    params: dict = {}
+
+    if project_id:
+        clauses.append("project_id = CAST(:project_id AS uuid)")
+        params["project_id"] = project_id
+
+    if sync_status:
+        clauses.append("sync_status = :sync_status")
+        params["sync_status"] = getattr(sync_status, "value", sync_status)
+
+    if type_filter:
+        clauses.append("type = :type_filter")
+        params["type_filter"] = type_filter
+
+    codes = parse_code_list(lexique_code)
+    if codes:
+        clauses.append("lexique_code = ANY(CAST(:lexique_codes AS text[]))")
+        params["lexique_codes"] = codes
+
+    subtrees = parse_code_list(lexique_subtree)
+    if subtrees:
+        # Chemin matérialisé (migration 036) : un point est dans le sous-arbre
+        # si l'une des catégories figure parmi ses ancêtres
+        clauses.append("lexique_path && CAST(:lexique_subtrees AS text[])")
+        params["lexique_subtrees"] = subtrees
+
+    if date_start:
+        clauses.append("created_at >= CAST(:date_start AS date)")
+        params["date_start"] = _parse_date("date_start", date_start)
+
+    if date_end:
+        # Borne exclusive au lendemain (fuseau de la session) : toute la
+        # journée de date_end est incluse
+        clauses.append("created_at < CAST(:date_end AS date) + 1")
+        params["date_end"] = _parse_date("date_end", date_end)
+
+    if point_ids:
+        try:
+            ids = [str(uuid.UUID(point_id)) for point_id in point_ids]
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="point_ids: identifiant de point invalide",
+            )
+        clauses.append("id = ANY(CAST(:point_ids AS uuid[]))")
+        params["point_ids"] = ids
+
+    return clauses, params
+
+
+def join_conditions(clauses: List[str]) -> str:
+    """Assemble les conditions (1=1 sans filtre)."""
+    return " AND ".join(clauses) if clauses else "1=1"
@@ -0,0 +1,290 @@
+"""
+Cache des réponses publiques - GéoClic Suite
+Les GET anonymes du portail citoyen (carte, équipements scannés, catégories,
+suivi des demandes) sont servis depuis un cache partagé : un QR code affiché
+dans la rue ou un article de presse ne se traduit plus par une requête SQL
+par visite.
+
+- Durée de vie (ttl) puis période « stale » (stale_ttl) : une entrée périmée
+  est encore servie pendant qu'une seule tâche la recalcule en arrière-plan.
+- Étiquettes (tags) : une écriture appelle invalidate_public_cache("points")
+  et toutes les réponses qui dépendent des points sont ignorées. Chaque
+  étiquette porte un numéro de version ; une entrée mémorise les versions
+  lues avant son calcul.
+- Un seul calcul par clé à la fois dans un worker (single-flight) : les
+  requêtes simultanées sur une entrée absente attendent le même résultat.
+- Stockage : LRU en mémoire par worker, ou Redis (ou compatible) si
+  settings.public_cache_redis_url est renseignée, partagé par les workers.
+  Sans Redis, une invalidation n'est vue que par le worker qui l'a faite ;
+  les autres la voient à l'expiration (ttl court).
+
+Les corps sont stockés sérialisés, avec un ETag (empreinte du contenu).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import AsyncSessionLocal
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis est optionnel, le cache mémoire est toujours disponible
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+# Préfixe des clés Redis
+REDIS_PREFIX = "geoclic:public:"
+
+
+@dataclass
+class CachedResponse:
+    """Réponse en cache."""
+    body: bytes
+    etag: str
+    fresh_until: float  # Horodatage (time.time) de fin de fraîcheur
+    stale_until: float  # Au-delà, l'entrée n'est plus servie
+    tag_versions: Dict[str, int] = field(default_factory=dict)
+
+
+class MemoryBackend:
+    """LRU en mémoire (par worker)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tags: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        return {tag: self._tags.get(tag, 0) for tag in tags}
+
+    async def bump_tags(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._tags[tag] = self._tags.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+
+
+class RedisBackend:
+    """Redis (ou compatible) partagé par les workers."""
+
+    def __init__(self, url: str):
+        self._client = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        meta, body = await self._client.hmget(REDIS_PREFIX + key, "meta", "body")
+        if meta is None or body is None:
+            return None
+        return CachedResponse(body=body, **json.loads(meta))
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        meta = {
+            "etag": entry.etag,
+            "fresh_until": entry.fresh_until,
+            "stale_until": entry.stale_until,
+            "tag_versions": entry.tag_versions,
+        }
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.hset(REDIS_PREFIX + key, mapping={"meta": json.dumps(meta), "body": entry.body})
+            pipe.expireat(REDIS_PREFIX + key, int(entry.stale_until) + 1)
+            await pipe.execute()
+
+    async def tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        tags = list(tags)
+        if not tags:
+            return {}
+        values = await self._client.mget([f"{REDIS_PREFIX}tag:{tag}" for tag in tags])
+        return {tag: int(value or 0) for tag, value in zip(tags, values)}
+
+    async def bump_tags(self, tags: Iterable[str]) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"{REDIS_PREFIX}tag:{tag}")
+            await pipe.execute()
+
+
+_memory_backend = MemoryBackend(settings.public_cache_memory_entries)
+_redis_backend: Optional[RedisBackend] = None
+
+# Calculs en cours dans ce worker : clé -> tâche
+_inflight: Dict[str, "asyncio.Task[CachedResponse]"] = {}
+
+
+if settings.public_cache_redis_url and redis_asyncio is None:
+    logger.warning("PUBLIC_CACHE_REDIS_URL définie mais le paquet redis n'est pas installé : cache en mémoire")
+
+
+def _backend():
+    """Redis si configuré et disponible, sinon la mémoire du worker."""
+    global _redis_backend
+    if _redis_backend is None and settings.public_cache_redis_url and redis_asyncio is not None:
+        _redis_backend = RedisBackend(settings.public_cache_redis_url)
+    return _redis_backend or _memory_backend
+
+
+async def _safe(operation: Awaitable, default=None):
+    """Une panne du cache ne doit pas faire échouer la requête."""
+    try:
+        return await operation
+    except Exception as e:
+        logger.warning(f"Cache des réponses publiques indisponible: {e}")
+        return default
+
+
+def cache_key(request: Request, params: Optional[dict] = None) -> str:
+    """
+    Clé d'une requête : chemin et paramètres triés.
+
+    params remplace les paramètres bruts de la requête par des valeurs
+    normalisées (ex. emprise alignée sur les tuiles).
+    """
+    if params is not None:
+        query = sorted((name, value) for name, value in params.items() if value is not None)
+    else:
+        query = sorted(request.query_params.multi_items())
+    return request.url.path + "?" + json.dumps(query, separators=(",", ":"), default=str)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match contient-il l'ETag (comparaison faible) ?"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def cached_body_response(request: Request, entry: CachedResponse, max_age: int) -> Response:
+    """Réponse HTTP d'une entrée, 304 si le client a déjà cette version."""
+    headers = {
+        "Cache-Control": f"public, max-age={max_age}",
+        "ETag": entry.etag,
+    }
+    if etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+async def _build_entry(
+    key: str,
+    build: Callable[[AsyncSession], Awaitable],
+    tags: List[str],
+    ttl: int,
+    stale_ttl: int,
+) -> CachedResponse:
+    backend = _backend()
+    # Versions relevées avant le calcul : une écriture pendant le calcul rend
+    # l'entrée aussitôt périmée
+    tag_versions = await _safe(backend.tag_versions(tags), {})
+
+    # Session propre : le calcul peut survivre à la requête qui l'a lancé
+    async with AsyncSessionLocal() as db:
+        content = await build(db)
+
+    body = json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode()
+    now = time.time()
+    entry = CachedResponse(
+        body=body,
+        etag='"{}"'.format(hashlib.sha1(body).hexdigest()[:32]),
+        fresh_until=now + ttl,
+        stale_until=now + ttl + stale_ttl,
+        tag_versions=tag_versions,
+    )
+    await _safe(backend.set(key, entry))
+    return entry
+
+
+def _single_flight(key: str, *args) -> "asyncio.Task[CachedResponse]":
+    """Tâche de calcul de la clé, partagée par les requêtes simultanées."""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_build_entry(key, *args))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _inflight.pop(key, None))
+        # Une erreur d'un rafraîchissement en arrière-plan n'a pas de lecteur
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return task
+
+
+async def cached_response(
+    request: Request,
+    build: Callable[[AsyncSession], Awaitable],
+    tags: Iterable[str],
+    ttl: int = 60,
+    stale_ttl: int = 300,
+    key_params: Optional[dict] = None,
+) -> Response:
+    """
+    Sert une réponse publique depuis le cache, la calcule si besoin.
+
+    Args:
+        build: Calcul de la réponse (modèle Pydantic, dict ou liste) à partir
+            d'une session ; une HTTPException n'est pas mise en cache
+        tags: Données dont dépend la réponse (ex. "points", "lexique")
+        ttl: Fraîcheur en secondes (aussi le max-age envoyé au navigateur)
+        stale_ttl: Durée pendant laquelle une entrée périmée est encore
+            servie, le temps de la recalculer
+        key_params: Paramètres normalisés servant de clé à la place de
+            ceux de la requête (cf. cache_key)
+
+    Returns:
+        Réponse JSON avec Cache-Control et ETag (304 avec If-None-Match)
+    """
+    tags = sorted(set(tags))
+    if not settings.public_cache_enabled:
+        async with AsyncSessionLocal() as db:
+            content = await build(db)
+        return Response(
+            content=json.dumps(jsonable_encoder(content), ensure_ascii=False).encode(),
+            media_type="application/json",
+        )
+
+    key = cache_key(request, key_params)
+    backend = _backend()
+    entry = await _safe(backend.get(key))
+    if entry:
+        current = await _safe(backend.tag_versions(entry.tag_versions), None)
+        now = time.time()
+        if current != entry.tag_versions or now >= entry.stale_until:
+            entry = None  # Invalidée ou trop ancienne
+        elif now >= entry.fresh_until:
+            # Servir la version périmée, recalculer en arrière-plan
+            _single_flight(key, build, tags, ttl, stale_ttl)
+
+    if entry is None:
+        # La requête qui a lancé le calcul peut être annulée sans l'interrompre
+        entry = await asyncio.shield(_single_flight(key, build, tags, ttl, stale_ttl))
+
+    return cached_body_response(request, entry, ttl)
+
+
+async def invalidate_public_cache(*tags: str) -> None:
+    """Invalide les réponses publiques qui dépendent de ces données (après commit)."""
+    if tags:
+        await _safe(_backend().bump_tags(tags))
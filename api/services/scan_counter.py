@@ -0,0 +1,137 @@
+"""
+Compteurs de scans des QR codes - GéoClic Suite
+Chaque scan d'un QR code (GET /api/public/equipment/GC-XXXXXX) incrémentait
+short_codes.scans_count dans la requête : une écriture synchrone sur le
+chemin de lecture public, qui se bloque sur les lignes très scannées
+(événement, affichage en ville).
+
+Les scans sont désormais comptés en mémoire par worker, puis écrits par lots
+(une requête UPDATE ... FROM unnest(...) par intervalle) par une tâche de
+fond lancée dans le lifespan de l'application, avec une dernière écriture à
+l'arrêt. Un lot en échec est remis dans le tampon pour l'intervalle suivant.
+
+Seuls les codes au format GC-XXXXXX sont comptés, et le tampon est borné
+(MAX_PENDING_CODES codes distincts) : une base indisponible ou des codes
+inventés ne le font pas grossir sans fin.
+"""
+
+import asyncio
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
+from sqlalchemy import text
+
+from config import settings
+from database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Format des codes courts (routers/sig.py generate_short_code)
+SHORT_CODE_PATTERN = re.compile(r"GC-[A-Z0-9]{6}")
+
+# Codes distincts gardés en attente ; au-delà, les nouveaux codes sont ignorés
+MAX_PENDING_CODES = 10000
+
+# Scans en attente : short_code -> (nombre, dernier scan)
+_pending: Dict[str, Tuple[int, datetime]] = {}
+
+
+def _has_room(short_code: str) -> bool:
+    """Le code est-il déjà en attente, ou reste-t-il de la place ?"""
+    return short_code in _pending or len(_pending) < MAX_PENDING_CODES
+
+
+def record_scan(short_code: str) -> None:
+    """Compte un scan (écrit en base au prochain flush_scan_counts)."""
+    if not SHORT_CODE_PATTERN.fullmatch(short_code):
+        return
+    if not _has_room(short_code):
+        logger.debug(f"Tampon des scans plein, scan de {short_code} ignoré")
+        return
+    count, _ = _pending.get(short_code, (0, None))
+    _pending[short_code] = (count + 1, datetime.now(timezone.utc))
+
+
+def pending_scan_count() -> int:
+    """Nombre de scans pas encore écrits en base."""
+    return sum(count for count, _ in _pending.values())
+
+
+def _restore(batch: Dict[str, Tuple[int, datetime]]) -> None:
+    """Remet un lot non écrit dans le tampon (fusion avec les nouveaux scans)."""
+    dropped = 0
+    for code, (count, last) in batch.items():
+        if not _has_room(code):
+            dropped += 1
+            continue
+        pending_count, pending_last = _pending.get(code, (0, last))
+        _pending[code] = (count + pending_count, max(last, pending_last))
+    if dropped:
+        logger.warning(f"Tampon des scans plein : {dropped} code(s) abandonné(s)")
+
+
+async def flush_scan_counts() -> int:
+    """
+    Écrit les scans en attente en une requête.
+
+    Returns:
+        Nombre de scans écrits
+    """
+    global _pending
+    if not _pending:
+        return 0
+    batch, _pending = _pending, {}
+
+    # Ordre fixe des lignes : pas d'interblocage entre workers
+    codes = sorted(batch)
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text("""
+                    UPDATE short_codes sc
+                    SET scans_count = COALESCE(sc.scans_count, 0) + v.scans,
+                        last_scanned_at = GREATEST(sc.last_scanned_at, v.last_scanned_at)
+                    FROM unnest(
+                        CAST(:codes AS text[]),
+                        CAST(:scans AS int[]),
+                        CAST(:last_scanned AS timestamptz[])
+                    ) AS v(short_code, scans, last_scanned_at)
+                    WHERE sc.short_code = v.short_code
+                """),
+                {
+                    "codes": codes,
+                    "scans": [batch[code][0] for code in codes],
+                    "last_scanned": [batch[code][1] for code in codes],
+                },
+            )
+            await db.commit()
+    except Exception as e:
+        _restore(batch)
+        logger.warning(f"Écriture des compteurs de scans reportée ({len(batch)} code(s)): {e}")
+        return 0
+
+    return sum(count for count, _ in batch.values())
+
+
+async def run_scan_flusher(stop: asyncio.Event) -> None:
+    """
+    Tâche de fond : écrit les scans toutes les settings.scan_flush_interval_seconds.
+
+    Args:
+        stop: Événement positionné à l'arrêt ; les scans restants sont
+            écrits avant de terminer
+    """
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), settings.scan_flush_interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+        await flush_scan_counts()
+
+    if _pending:
+        # Dernier essai si l'écriture précédente a échoué
+        await flush_scan_counts()
+    if _pending:
+        logger.error(f"{pending_scan_count()} scan(s) QR non écrit(s) à l'arrêt")
@@ -0,0 +1,345 @@
+"""
+Cache des tuiles vectorielles - GéoClic Suite
+Les cartes (portail citoyen surtout) demandent sans cesse les mêmes tuiles
+sur des données qui changent peu : chaque tuile produite est gardée en
+mémoire (LRU par worker) et sur disque (settings.tile_cache_path, partagé
+par les workers).
+
+Invalidation précise : une écriture (point, demande, zone) invalide, à tous
+les niveaux de zoom, les seules tuiles dont l'emprise (marge de la tuile
+comprise) recoupe l'emprise de la géométrie avant et après modification.
+
+- Le disque fait foi : une entrée mémoire n'est servie que si son fichier
+  existe encore avec la même date, ce qui propage l'invalidation faite par
+  un autre worker (un stat, pas de requête SQL).
+- Une tuile calculée pendant une invalidation de sa couche n'est pas mise
+  en cache (elle a pu lire les données d'avant l'écriture).
+- Une tuile plus ancienne que settings.tile_cache_ttl_seconds est
+  recalculée : filet pour une écriture qui n'aurait pas invalidé.
+
+Disposition : {racine}/{couche}/{z}/{x}/{y}/{variante}.mvt, où la variante
+est l'empreinte des attributs et filtres de la requête.
+
+Une invalidation de nombreuses emprises (synchronisation d'un lot de
+points) fusionne d'abord, zoom par zoom, les tuiles visées en un ensemble
+(ou en leur emprise commune s'il est trop grand), puis ne parcourt que les
+tuiles en mémoire de ce zoom (index par couche et zoom).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# (lon min, lat min, lon max, lat max) en WGS84
+Bounds = Tuple[float, float, float, float]
+
+# Latitude limite de Web Mercator
+MAX_MERCATOR_LAT = 85.0511287798066
+
+# Fichier dont la date marque la dernière invalidation d'une couche
+EPOCH_FILE = ".invalidated"
+
+# Nombre de tuiles d'un zoom au-delà duquel une invalidation vise leur
+# emprise commune plutôt que chaque tuile
+MAX_TILE_SET = 65536
+
+_memory: "OrderedDict[tuple, Tuple[bytes, int]]" = OrderedDict()
+_memory_bytes = 0
+# Clés en mémoire par (couche, zoom)
+_memory_by_zoom: Dict[Tuple[str, int], Set[tuple]] = {}
+
+
+def tile_variant(*parts) -> str:
+    """Empreinte des paramètres qui font varier le contenu d'une tuile."""
+    canonical = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+def _layer_dir(layer: str) -> Path:
+    return Path(settings.tile_cache_path) / layer
+
+
+def _tile_path(layer: str, z: int, x: int, y: int, variant: str) -> Path:
+    return _layer_dir(layer) / str(z) / str(x) / str(y) / f"{variant}.mvt"
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def layer_epoch(layer: str) -> Optional[int]:
+    """Date de la dernière invalidation de la couche (à relever avant le calcul)."""
+    return _mtime_ns(_layer_dir(layer) / EPOCH_FILE)
+
+
+def _unindex(key: tuple) -> None:
+    zoom_keys = _memory_by_zoom.get(key[:2])
+    if zoom_keys is not None:
+        zoom_keys.discard(key)
+        if not zoom_keys:
+            del _memory_by_zoom[key[:2]]
+
+
+def _remember(key: tuple, data: bytes, mtime_ns: int) -> None:
+    global _memory_bytes
+    previous = _memory.pop(key, None)
+    if previous:
+        _memory_bytes -= len(previous[0])
+    _memory[key] = (data, mtime_ns)
+    _memory_bytes += len(data)
+    _memory_by_zoom.setdefault(key[:2], set()).add(key)
+
+    limit = settings.tile_cache_memory_mb * 1024 * 1024
+    while _memory_bytes > limit and _memory:
+        evicted_key, (evicted, _) = _memory.popitem(last=False)
+        _memory_bytes -= len(evicted)
+        _unindex(evicted_key)
+
+
+def _forget(key: tuple) -> None:
+    global _memory_bytes
+    entry = _memory.pop(key, None)
+    if entry:
+        _memory_bytes -= len(entry[0])
+        _unindex(key)
+
+
+async def get_cached_tile(layer: str, z: int, x: int, y: int, variant: str) -> Optional[bytes]:
+    """Tuile en cache (mémoire puis disque), None si absente."""
+    key = (layer, z, x, y, variant)
+    path = _tile_path(layer, z, x, y, variant)
+    mtime_ns = _mtime_ns(path)
+    if mtime_ns is not None and time.time_ns() - mtime_ns > settings.tile_cache_ttl_seconds * 10**9:
+        mtime_ns = None  # Expirée : recalculée puis réécrite par store_tile
+
+    entry = _memory.get(key)
+    if entry:
+        if entry[1] == mtime_ns:
+            _memory.move_to_end(key)
+            return entry[0]
+        _forget(key)  # Invalidée (ou remplacée) par un autre worker
+
+    if mtime_ns is None:
+        return None
+    try:
+        data = await asyncio.to_thread(path.read_bytes)
+    except OSError:
+        return None
+    _remember(key, data, mtime_ns)
+    return data
+
+
+def _write_tile(path: Path, data: bytes) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+    part_path.write_bytes(data)
+    os.replace(part_path, path)
+    return path.stat().st_mtime_ns
+
+
+async def store_tile(
+    layer: str, z: int, x: int, y: int, variant: str, data: bytes, epoch: Optional[int],
+) -> None:
+    """
+    Met une tuile en cache.
+
+    Args:
+        epoch: layer_epoch() relevé avant le calcul ; si la couche a été
+            invalidée depuis, la tuile n'est pas conservée
+    """
+    if layer_epoch(layer) != epoch:
+        return
+    path = _tile_path(layer, z, x, y, variant)
+    try:
+        mtime_ns = await asyncio.to_thread(_write_tile, path, data)
+    except OSError as e:
+        logger.warning(f"Cache de tuiles indisponible ({path}): {e}")
+        return
+    _remember((layer, z, x, y, variant), data, mtime_ns)
+
+
+def tile_range(bounds: Bounds, z: int, margin: float = 0.0) -> Tuple[int, int, int, int]:
+    """
+    Tuiles XYZ recouvrant une emprise WGS84 au zoom z.
+
+    Args:
+        margin: Marge autour de chaque tuile, en fraction de tuile (tampon
+            de ST_AsMVTGeom : un objet proche du bord figure aussi dans la
+            tuile voisine)
+
+    Returns:
+        (x min, y min, x max, y max), bornes incluses
+    """
+    lon_min, lat_min, lon_max, lat_max = bounds
+    n = 2 ** z
+
+    def tile_x(lon: float) -> float:
+        return (lon + 180.0) / 360.0 * n
+
+    def tile_y(lat: float) -> float:
+        lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+        rad = math.radians(lat)
+        return (1.0 - math.asinh(math.tan(rad)) / math.pi) / 2.0 * n
+
+    x_min = max(0, math.floor(tile_x(lon_min) - margin))
+    x_max = min(n - 1, math.floor(tile_x(lon_max) + margin))
+    # L'axe Y des tuiles va du nord au sud
+    y_min = max(0, math.floor(tile_y(lat_max) - margin))
+    y_max = min(n - 1, math.floor(tile_y(lat_min) + margin))
+    return x_min, y_min, x_max, y_max
+
+
+class ZoomSelection:
+    """
+    Tuiles à invalider à un niveau de zoom.
+
+    Les plages de tuiles de toutes les emprises sont fusionnées : un
+    ensemble exact de tuiles, ou leur emprise commune au-delà de
+    MAX_TILE_SET tuiles (une grande zone à fort zoom).
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[int, int, int, int]]):
+        ranges = set(ranges)
+        self.box = (
+            min(r[0] for r in ranges),
+            min(r[1] for r in ranges),
+            max(r[2] for r in ranges),
+            max(r[3] for r in ranges),
+        )
+        self.tiles: Optional[Set[Tuple[int, int]]] = None
+        if sum((r[2] - r[0] + 1) * (r[3] - r[1] + 1) for r in ranges) <= MAX_TILE_SET:
+            self.tiles = {
+                (x, y)
+                for x_min, y_min, x_max, y_max in ranges
+                for x in range(x_min, x_max + 1)
+                for y in range(y_min, y_max + 1)
+            }
+
+    def __contains__(self, tile: Tuple[int, int]) -> bool:
+        if self.tiles is not None:
+            return tile in self.tiles
+        x, y = tile
+        return self.box[0] <= x <= self.box[2] and self.box[1] <= y <= self.box[3]
+
+
+def zoom_selections(
+    bounds_list: Sequence[Bounds], max_zoom: int, margin: float,
+) -> Dict[int, ZoomSelection]:
+    """Tuiles recoupant des emprises, fusionnées par niveau de zoom."""
+    return {
+        z: ZoomSelection(tile_range(bounds, z, margin) for bounds in bounds_list)
+        for z in range(max_zoom + 1)
+    }
+
+
+def _numeric_entries(directory: Path, low: int, high: int) -> Iterable[Path]:
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.isdigit() and low <= int(entry.name) <= high:
+                    yield Path(entry.path)
+    except OSError:
+        return
+
+
+def _invalidate_disk(layer: str, selections: Dict[int, ZoomSelection]) -> int:
+    layer_dir = _layer_dir(layer)
+    layer_dir.mkdir(parents=True, exist_ok=True)
+
+    # Marquer l'invalidation avant de supprimer : un calcul en cours ne
+    # réécrira pas une tuile périmée
+    (layer_dir / EPOCH_FILE).touch()
+
+    removed = 0
+    for z, selection in selections.items():
+        x_min, y_min, x_max, y_max = selection.box
+        # Parcours des seuls répertoires existants : une grande emprise à fort
+        # zoom couvre des millions de tuiles, dont très peu en cache
+        for x_dir in list(_numeric_entries(layer_dir / str(z), x_min, x_max)):
+            x = int(x_dir.name)
+            for y_dir in list(_numeric_entries(x_dir, y_min, y_max)):
+                if (x, int(y_dir.name)) in selection:
+                    shutil.rmtree(y_dir, ignore_errors=True)
+                    removed += 1
+    return removed
+
+
+async def invalidate_tiles(
+    layer: str,
+    bounds_list: Sequence[Optional[Bounds]],
+    max_zoom: int,
+    margin: float,
+) -> None:
+    """
+    Invalide les tuiles d'une couche qui recoupent les emprises données.
+
+    Args:
+        bounds_list: Emprises WGS84 touchées
+        max_zoom: Zoom maximal servi par la couche
+        margin: Tampon des tuiles, en fraction de tuile
+    """
+    bounds_list = [b for b in bounds_list if b and all(v is not None for v in b)]
+    if not bounds_list:
+        return
+
+    selections = zoom_selections(bounds_list, max_zoom, margin)
+
+    # Mémoire de ce worker ; les autres voient disparaître les fichiers
+    for z, selection in selections.items():
+        for key in list(_memory_by_zoom.get((layer, z), ())):
+            if (key[2], key[3]) in selection:
+                _forget(key)
+
+    try:
+        removed = await asyncio.to_thread(_invalidate_disk, layer, selections)
+    except OSError as e:
+        logger.warning(f"Invalidation du cache de tuiles {layer} incomplète: {e}")
+        return
+    if removed:
+        logger.debug(f"Cache de tuiles {layer}: {removed} tuile(s) invalidée(s)")
+
+
+async def geometry_bounds(db: AsyncSession, table: str, ids: Iterable) -> List[Bounds]:
+    """
+    Emprises des géométries des lignes données (table interne, colonne geom).
+
+    Appelée avant une modification (ancienne position) et après (nouvelle).
+    Les identifiants invalides sont ignorés.
+    """
+    valid_ids = []
+    for value in ids:
+        try:
+            valid_ids.append(str(uuid.UUID(str(value))))
+        except (ValueError, TypeError):
+            continue
+    if not valid_ids:
+        return []
+
+    result = await db.execute(
+        text(f"""
+            SELECT ST_XMin(geom), ST_YMin(geom), ST_XMax(geom), ST_YMax(geom)
+            FROM {table}
+            WHERE id = ANY(CAST(:ids AS uuid[])) AND geom IS NOT NULL
+        """),
+        {"ids": valid_ids},
+    )
+    return [tuple(row) for row in result.fetchall()]
@@ -0,0 +1,269 @@
+"""
+Tuiles vectorielles (MVT) - GéoClic Suite
+Les cartes chargent les points, demandes et zones par tuiles Mapbox Vector
+Tile produites par PostGIS (ST_AsMVTGeom / ST_AsMVT) au lieu de listes JSON
+plafonnées : la charge utile dépend de l'emprise affichée, pas du volume de
+la base.
+
+- Les géométries sont découpées et quantifiées sur la grille de la tuile
+  (TILE_EXTENT) ; les polygones sont simplifiés au pixel près.
+- Chaque couche déclare ses attributs ; le client choisit ceux qu'il veut
+  (`fields`), les noms inconnus sont refusés.
+- Le nombre d'objets par tuile est borné (MAX_TILE_FEATURES).
+- Les tuiles sont mises en cache (services/tile_cache.py) ; les écritures
+  appellent invalidate_layer() avec les emprises modifiées, qui invalide
+  aussi le cache des réponses publiques (services/response_cache.py).
+
+Les routers ajoutent leurs filtres (conditions paramétrées) et exposent
+`/{couche}/tiles/{z}/{x}/{y}.mvt`.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.response_cache import invalidate_public_cache
+from services.tile_cache import (
+    Bounds, geometry_bounds, get_cached_tile, invalidate_tiles, layer_epoch, store_tile,
+    tile_variant,
+)
+
+# Grille d'une tuile et marge (en unités de grille) autour de la tuile
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+MAX_ZOOM = 22
+MAX_TILE_FEATURES = 50000
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+# Largeur du monde en Web Mercator (mètres)
+WEB_MERCATOR_WIDTH = 40075016.685578488
+
+
+class TileLayer:
+    """
+    Couche de tuiles vectorielles.
+
+    Args:
+        name: Nom de la couche dans la tuile
+        table: Table source (alias t)
+        attributes: Attributs disponibles (nom -> expression SQL sur t)
+        default_attributes: Attributs renvoyés sans `fields`
+        simplify: Simplifier les géométries au pixel (lignes, polygones)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        table: str,
+        attributes: Dict[str, str],
+        default_attributes: Sequence[str],
+        simplify: bool = False,
+    ):
+        self.name = name
+        self.table = table
+        self.attributes = attributes
+        self.default_attributes = list(default_attributes)
+        self.simplify = simplify
+
+    def select_attributes(self, fields: Optional[str]) -> List[str]:
+        """Attributs demandés (séparés par des virgules), 400 si inconnus."""
+        if not fields:
+            return self.default_attributes
+        names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [name for name in names if name not in self.attributes]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Attributs inconnus: {', '.join(unknown)} "
+                       f"(disponibles: {', '.join(self.attributes)})",
+            )
+        return names
+
+
+POINTS_LAYER = TileLayer(
+    name="points",
+    table="geoclic_staging",
+    attributes={
+        "id": "t.id::text",
+        "name": "t.name",
+        "type": "t.type",
+        "subtype": "t.subtype",
+        "lexique_code": "t.lexique_code",
+        "sync_status": "t.sync_status",
+        "condition_state": "t.condition_state",
+        "point_status": "t.point_status",
+        "zone_name": "t.zone_name",
+        "project_id": "t.project_id::text",
+        "updated_at": "t.updated_at::text",
+    },
+    default_attributes=["id", "name", "type", "lexique_code", "sync_status"],
+    simplify=True,
+)
+
+DEMANDES_LAYER = TileLayer(
+    name="demandes",
+    table="demandes_citoyens",
+    # Aucune donnée du déclarant
+    attributes={
+        "id": "t.id::text",
+        "numero_suivi": "t.numero_suivi",
+        "categorie_id": "t.categorie_id::text",
+        "statut": "t.statut",
+        "priorite": "t.priorite",
+        "project_id": "t.project_id::text",
+        "created_at": "t.created_at::text",
+    },
+    default_attributes=["id", "numero_suivi", "categorie_id", "statut", "priorite"],
+)
+
+ZONES_LAYER = TileLayer(
+    name="zones",
+    table="perimetres",
+    attributes={
+        "id": "t.id::text",
+        "name": "t.name",
+        "code": "t.code",
+        "zone_type": "COALESCE(t.perimetre_type, 'quartier')",
+        "level": "COALESCE(t.level, 2)",
+        "parent_id": "t.parent_id::text",
+        "is_global": "COALESCE(t.is_global, FALSE)",
+        "population": "t.population",
+    },
+    default_attributes=["id", "name", "code", "zone_type", "level"],
+    simplify=True,
+)
+
+
+def validate_tile(z: int, x: int, y: int) -> None:
+    """404 pour une tuile hors de la grille du niveau de zoom."""
+    if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tuile inexistante")
+
+
+def tile_sql(layer: TileLayer, attributes: List[str], where_clauses: List[str]) -> str:
+    """Requête produisant la tuile (bytea) d'une couche."""
+    columns = ",\n               ".join(
+        f'{layer.attributes[name]} AS "{name}"' for name in attributes
+    )
+    geom = "ST_Transform(t.geom, 3857)"
+    if layer.simplify:
+        # Tolérance d'un pixel de la grille : invisible, mais les polygones
+        # détaillés ne pèsent plus que ce qui s'affiche
+        geom = f"ST_Simplify({geom}, CAST(:pixel_size AS float8), true)"
+    where_sql = " AND ".join(["t.geom IS NOT NULL", "t.geom && bounds.envelope_4326", *where_clauses])
+
+    return f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS envelope,
+                   ST_Transform(
+                       ST_TileEnvelope(:z, :x, :y, margin => CAST(:margin AS float8)), 4326
+                   ) AS envelope_4326
+        ),
+        features AS (
+            SELECT ST_AsMVTGeom({geom}, bounds.envelope, {TILE_EXTENT}, {TILE_BUFFER}, true) AS geom,
+               {columns}
+            FROM {layer.table} t, bounds
+            WHERE {where_sql}
+            LIMIT {MAX_TILE_FEATURES}
+        )
+        SELECT ST_AsMVT(features.*, :layer_name, {TILE_EXTENT}, 'geom')
+        FROM features
+        WHERE geom IS NOT NULL
+    """
+
+
+async def render_tile(
+    db: AsyncSession,
+    layer: TileLayer,
+    z: int,
+    x: int,
+    y: int,
+    fields: Optional[str] = None,
+    where_clauses: Optional[List[str]] = None,
+    params: Optional[dict] = None,
+) -> bytes:
+    """
+    Produit une tuile MVT.
+
+    Args:
+        layer: Couche (attributs, table)
+        z, x, y: Coordonnées de la tuile (schéma XYZ)
+        fields: Attributs demandés, séparés par des virgules
+        where_clauses: Filtres du router (colonnes de la table, sans alias)
+        params: Valeurs des filtres
+
+    Returns:
+        Tuile encodée (vide s'il n'y a aucun objet)
+    """
+    validate_tile(z, x, y)
+    attributes = layer.select_attributes(fields)
+    where_clauses = where_clauses or []
+
+    variant = tile_variant(attributes, where_clauses, params)
+    cached = await get_cached_tile(layer.name, z, x, y, variant)
+    if cached is not None:
+        return cached
+    epoch = layer_epoch(layer.name)
+
+    result = await db.execute(
+        text(tile_sql(layer, attributes, where_clauses)),
+        {
+            **(params or {}),
+            "z": z,
+            "x": x,
+            "y": y,
+            "margin": TILE_BUFFER / TILE_EXTENT,
+            "pixel_size": WEB_MERCATOR_WIDTH / (2 ** z) / TILE_EXTENT,
+            "layer_name": layer.name,
+        },
+    )
+    tile = result.scalar()
+    tile = bytes(tile) if tile else b""
+
+    await store_tile(layer.name, z, x, y, variant, tile, epoch)
+    return tile
+
+
+async def invalidate_layer(layer: TileLayer, bounds_list: Sequence[Optional[Bounds]]) -> None:
+    """
+    Invalide les tuiles en cache d'une couche qui recoupent des emprises.
+
+    À appeler après le commit d'une écriture, avec les emprises de la
+    géométrie avant et après modification (tile_cache.geometry_bounds).
+    Les réponses publiques qui dépendent de la couche (étiquette du même nom)
+    sont invalidées aussi.
+    """
+    await invalidate_tiles(layer.name, bounds_list, MAX_ZOOM, TILE_BUFFER / TILE_EXTENT)
+    await invalidate_public_cache(layer.name)
+
+
+async def layer_bounds(db: AsyncSession, layer: TileLayer, ids: Iterable) -> List[Bounds]:
+    """Emprises actuelles de lignes de la couche (à relever avant modification)."""
+    return await geometry_bounds(db, layer.table, ids)
+
+
+async def invalidate_rows(
+    db: AsyncSession,
+    layer: TileLayer,
+    ids: Iterable,
+    previous_bounds: Sequence[Bounds] = (),
+) -> None:
+    """
+    Invalide les tuiles de lignes modifiées (après commit).
+
+    Args:
+        ids: Lignes créées ou modifiées (emprise relue en base)
+        previous_bounds: Emprises d'avant modification ou suppression
+    """
+    bounds = list(previous_bounds) + await geometry_bounds(db, layer.table, ids)
+    await invalidate_layer(layer, bounds)
+
+
+def tile_response(tile: bytes, cache_control: str = "private, max-age=60") -> Response:
+    """Réponse HTTP d'une tuile (corps vide si aucun objet)."""
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers={"Cache-Control": cache_control})
@@ -0,0 +1,133 @@
+"""
+Archives ZIP en flux - GéoClic Suite
+Produit une archive ZIP morceau par morceau, sans la construire en mémoire :
+chaque entrée ajoutée rend les octets à envoyer au client (ou à écrire dans
+un fichier), puis close() rend le répertoire central.
+
+- Les photos et fichiers déjà compressés (JPEG, PNG...) sont stockés tels
+  quels (ZIP_STORED) : les recompresser coûte du CPU pour ~0 % de gain.
+- Les entrées texte (GeoJSON, CSV, README) sont compressées (ZIP_DEFLATED).
+- La lecture des fichiers et la compression tournent dans un thread, pour ne
+  pas bloquer la boucle asyncio.
+- Les fichiers sont copiés par morceaux de FILE_CHUNK_SIZE, rendus au fur et
+  à mesure : le morceau suivant n'est lu qu'une fois le précédent consommé.
+
+La mémoire utilisée est bornée par la taille d'un morceau, pas par l'entrée.
+"""
+
+import asyncio
+import io
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Union
+
+# Extensions déjà compressées : stockées sans recompression
+STORED_EXTENSIONS = {
+    ".jpg", ".jpeg", ".png", ".webp", ".heic", ".gif",
+    ".zip", ".gz", ".mp4", ".mov", ".pdf",
+}
+
+# Taille des lectures de fichiers
+FILE_CHUNK_SIZE = 1024 * 1024
+
+
+class _ZipOutput(io.RawIOBase):
+    """Sortie non positionnable : zipfile écrit alors des data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    """
+    Écrivain d'archive ZIP en flux.
+
+    Usage:
+        archive = ZipStream()
+        async for chunk in archive.add_file("photos/a.jpg", path):
+            yield chunk
+        yield archive.add_bytes("data.csv", csv_bytes)
+        yield archive.close()
+    """
+
+    def __init__(self):
+        self._output = _ZipOutput()
+        self._zip = zipfile.ZipFile(self._output, "w", allowZip64=True)
+
+    @staticmethod
+    def compress_type(arcname: str) -> int:
+        if Path(arcname).suffix.lower() in STORED_EXTENSIONS:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def _entry(self, arcname: str, compress_type: int) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(arcname, date_time=datetime.now().timetuple()[:6])
+        info.compress_type = compress_type
+        return info
+
+    @staticmethod
+    def _copy_chunk(source: BinaryIO, target: BinaryIO) -> int:
+        data = source.read(FILE_CHUNK_SIZE)
+        if data:
+            target.write(data)
+        return len(data)
+
+    async def _copy_stream(self, info: zipfile.ZipInfo, source: BinaryIO, **open_args) -> AsyncIterator[bytes]:
+        """Copie une source dans une entrée, morceau par morceau (lecture et compression dans un thread)."""
+        with self._zip.open(info, "w", **open_args) as target:
+            while await asyncio.to_thread(self._copy_chunk, source, target):
+                data = self._output.drain()
+                if data:
+                    yield data
+        # Fin de la compression et data descriptor
+        yield self._output.drain()
+
+    async def add_file(self, arcname: str, path: Union[str, Path]) -> AsyncIterator[bytes]:
+        """
+        Ajoute un fichier disque et rend les octets produits, morceau par morceau.
+
+        Lève OSError (FileNotFoundError...) avant tout octet si le fichier est illisible.
+        """
+        path = Path(path)
+        info = await asyncio.to_thread(zipfile.ZipInfo.from_file, path, arcname)
+        info.compress_type = self.compress_type(arcname)
+        source = await asyncio.to_thread(open, path, "rb")
+        try:
+            async for data in self._copy_stream(info, source):
+                yield data
+        finally:
+            source.close()
+
+    async def add_stream(self, arcname: str, source: BinaryIO) -> AsyncIterator[bytes]:
+        """Ajoute le contenu d'un fichier ouvert (ex. fichier temporaire) et rend les octets produits, morceau par morceau."""
+        info = self._entry(arcname, self.compress_type(arcname))
+        async for data in self._copy_stream(info, source, force_zip64=True):
+            yield data
+
+    def add_bytes(self, arcname: str, data: Union[str, bytes]) -> bytes:
+        """Ajoute une petite entrée en mémoire et rend les octets produits."""
+        if isinstance(data, str):
+            data = data.encode()
+        self._zip.writestr(self._entry(arcname, self.compress_type(arcname)), data)
+        return self._output.drain()
+
+    def close(self) -> bytes:
+        """Écrit le répertoire central et rend les derniers octets."""
+        self._zip.close()
+        return self._output.drain()
@@ -9,6 +9,7 @@ Ce fichier configure l'environnement de test:
 """
 
 import pytest
+import json
 import os
 from typing import AsyncGenerator
 from httpx import AsyncClient, ASGITransport
@@ -317,6 +318,66 @@ async def test_demande(db_session: AsyncSession, test_subcategory: dict) -> dict
     await db_session.commit()
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# FIXTURES DE DONNÉES - POINTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@pytest.fixture
+async def insert_points(db_session: AsyncSession):
+    """
+    Insère des points de test dans geoclic_staging et retourne leurs ids.
+
+    Usage dans les tests:
+        ids = await insert_points([{"name": "Banc", "comment": "..."}])
+
+    Chaque point accepte name, type, comment, created_at, latitude et
+    longitude (valeurs par défaut sinon). Supprimés après le test.
+    """
+    created_ids = []
+
+    async def insert(points: list) -> list:
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "name": point.get("name", f"Point Test {fake.word()}"),
+                "type": point.get("type", "test"),
+                "comment": point.get("comment"),
+                "created_at": point["created_at"].isoformat() if point.get("created_at") else None,
+                "latitude": point.get("latitude", 43.6),
+                "longitude": point.get("longitude", 1.44),
+            }
+            for point in points
+        ]
+        # Un seul INSERT, même pour plusieurs milliers de points
+        await db_session.execute(
+            text("""
+                INSERT INTO geoclic_staging (id, name, type, comment, geom_type, geom, created_at)
+                SELECT r.id, r.name, r.type, r.comment, 'POINT',
+                       ST_SetSRID(ST_MakePoint(r.longitude, r.latitude), 4326),
+                       COALESCE(r.created_at, CURRENT_TIMESTAMP)
+                FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+                    id uuid, name text, type text, comment text,
+                    created_at timestamp, latitude double precision, longitude double precision
+                )
+            """),
+            {"rows": json.dumps(rows)},
+        )
+        await db_session.commit()
+        ids = [row["id"] for row in rows]
+        created_ids.extend(ids)
+        return ids
+
+    yield insert
+
+    # Nettoyage
+    if created_ids:
+        await db_session.execute(
+            text("DELETE FROM geoclic_staging WHERE id = ANY(CAST(:ids AS uuid[]))"),
+            {"ids": created_ids},
+        )
+        await db_session.commit()
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # HELPERS DE TEST
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -12,12 +12,15 @@ Endpoints testés:
 - POST /api/demandes/categories - Créer une catégorie
 - PATCH /api/demandes/{id}/statut - Changer le statut
 - PATCH /api/demandes/{id}/priorite - Changer la priorité
+- GET /api/demandes/public/carte/demandes - Carte du portail citoyen
 """
 
 import pytest
 from httpx import AsyncClient
 from faker import Faker
 
+from services.map_clusters import snap_bbox
+
 # Générateur de données de test
 fake = Faker('fr_FR')
 
@@ -363,3 +366,78 @@ class TestStatistiquesEndpoints:
         )
 
         assert response.status_code == 200
+
+
+class TestCarteEmprise:
+    """Tests de l'alignement de l'emprise de la carte sur les tuiles."""
+
+    def test_nearby_views_share_snapped_bbox(self):
+        """
+        Test: Deux vues légèrement décalées donnent la même emprise alignée,
+        qui contient chacune d'elles.
+        """
+        view_a = (1.4301, 43.5912, 1.4398, 43.5987)
+        view_b = (1.4305, 43.5915, 1.4402, 43.5991)
+
+        snapped = snap_bbox(view_a, 14)
+
+        assert snap_bbox(view_b, 14) == snapped
+        for view in (view_a, view_b):
+            assert snapped[0] <= view[0] and snapped[1] <= view[1]
+            assert snapped[2] >= view[2] and snapped[3] >= view[3]
+
+    def test_snapped_bbox_without_zoom(self):
+        """
+        Test: Sans zoom, l'emprise est alignée sur des tuiles à son échelle.
+        """
+        view = (1.3, 43.5, 1.5, 43.7)
+
+        snapped = snap_bbox(view)
+
+        assert snapped[0] <= 1.3 and snapped[2] >= 1.5
+        assert snapped[2] - snapped[0] < 1.0
+
+
+class TestCartePubliqueEndpoints:
+    """Tests de la carte publique des demandes."""
+
+    @pytest.mark.parametrize("params", [
+        {"categorie_id": "pas-un-uuid"},
+        {"project_id": "1; DROP TABLE demandes_citoyens"},
+    ])
+    async def test_carte_invalid_uuid_rejected(self, client: AsyncClient, params: dict):
+        """
+        Test: Un identifiant de catégorie ou de projet invalide retourne 400.
+        """
+        response = await client.get("/api/demandes/public/carte/demandes", params=params)
+
+        assert response.status_code == 400
+
+    async def test_carte_etag_revalidation(self, client: AsyncClient):
+        """
+        Test: La carte porte un ETag ; le renvoyer donne un 304.
+        """
+        params = {"min_lat": 43.5, "max_lat": 43.7, "min_lng": 1.3, "max_lng": 1.5}
+        response = await client.get("/api/demandes/public/carte/demandes", params=params)
+
+        assert response.status_code == 200
+        assert response.json()["type"] == "FeatureCollection"
+        assert "public" in response.headers["cache-control"]
+
+        response = await client.get(
+            "/api/demandes/public/carte/demandes",
+            params=params,
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+
+        assert response.status_code == 304
+
+    async def test_carte_clustered_at_low_zoom(self, client: AsyncClient):
+        """
+        Test: Sous le zoom rue, la carte renvoie des regroupements.
+        """
+        response = await client.get("/api/demandes/public/carte/demandes", params={"zoom": 10})
+
+        assert response.status_code == 200
+        for feature in response.json()["features"]:
+            assert feature["properties"]["cluster"] is True
@@ -0,0 +1,103 @@
+"""
+═══════════════════════════════════════════════════════════════════════════════
+Tests des exports asynchrones - GéoClic Suite
+═══════════════════════════════════════════════════════════════════════════════
+Ces tests vérifient les jobs d'export (services/export_jobs.py).
+
+Endpoints testés:
+- POST /api/exports - Lancer un export
+- GET /api/exports/{id} - Progression
+- GET /api/exports/{id}/download - Téléchargement (Range)
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+
+from routers.exports import check_export_access, job_to_response
+from services.export_jobs import export_cache_key
+
+
+class TestExportJobs:
+    """Tests des helpers des jobs d'export."""
+
+    def test_cache_key_ignores_param_order(self):
+        """
+        Test: Deux demandes aux mêmes paramètres partagent la même clé de cache.
+        """
+        key_a = export_cache_key("points_csv", {"project_id": "p1", "lexique_code": "BANC"})
+        key_b = export_cache_key("points_csv", {"lexique_code": "BANC", "project_id": "p1"})
+
+        assert key_a == key_b
+        assert key_a != export_cache_key("points_geojson", {"project_id": "p1", "lexique_code": "BANC"})
+
+    def test_cache_key_includes_data_version(self):
+        """
+        Test: Un export n'est pas réutilisé si la version de ses données a changé.
+        """
+        params = {"point_ids": ["0b8f2f2e-1111-4222-8333-444455556666"], "format": "pdf"}
+
+        assert export_cache_key("qrcodes", params, "v1") != export_cache_key("qrcodes", params, "v2")
+
+    def test_export_visible_to_owner_only(self):
+        """
+        Test: Un export n'est visible que de son auteur et des administrateurs.
+        """
+        job = {"created_by": "0b8f2f2e-1111-4222-8333-444455556666"}
+
+        check_export_access(job, {"id": "0b8f2f2e-1111-4222-8333-444455556666"})
+        check_export_access(job, {"id": "autre", "role_data": "admin"})
+        with pytest.raises(HTTPException) as exc_info:
+            check_export_access(job, {"id": "autre", "role_data": "user"})
+        assert exc_info.value.status_code == 404
+
+    def test_running_job_progress(self):
+        """
+        Test: La progression est le ratio traité/total, sans lien de téléchargement.
+        """
+        response = job_to_response({
+            "id": "0b8f2f2e-1111-4222-8333-444455556666", "kind": "points_zip",
+            "status": "running", "progress_done": 250, "progress_total": 1000,
+            "bytes_written": 4096, "created_at": datetime(2026, 1, 1),
+        })
+
+        assert response.progress == 0.25
+        assert response.download_url is None
+
+
+class TestExportEndpoints:
+    """Tests des endpoints d'export asynchrone."""
+
+    async def test_unknown_kind_rejected(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: Un type d'export inconnu est refusé.
+        """
+        response = await client.post("/api/exports", headers=auth_headers, json={"kind": "inconnu"})
+
+        assert response.status_code == 422
+
+    async def test_geojson_export_job(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: Un export GeoJSON lancé en job se termine et se télécharge par plage.
+        """
+        response = await client.post(
+            "/api/exports", headers=auth_headers, json={"kind": "points_geojson", "params": {}},
+        )
+        assert response.status_code == 202
+        job = response.json()
+
+        for _ in range(50):
+            if job["status"] in ("done", "error"):
+                break
+            await asyncio.sleep(0.1)
+            job = (await client.get(f"/api/exports/{job['id']}", headers=auth_headers)).json()
+
+        assert job["status"] == "done"
+        response = await client.get(
+            job["download_url"], headers={**auth_headers, "Range": "bytes=0-9"},
+        )
+        assert response.status_code == 206
+        assert response.content.startswith(b'{"type":')
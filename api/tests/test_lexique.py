@@ -0,0 +1,178 @@
+"""
+═══════════════════════════════════════════════════════════════════════════════
+Tests de la version du lexique - GéoClic Suite
+═══════════════════════════════════════════════════════════════════════════════
+Ces tests vérifient la version comparée par le mobile à chaque synchronisation
+(services/lexique_version.py) : compteurs en base, cache mémoire avec TTL,
+invalidation après chaque écriture.
+
+Endpoints testés:
+- POST /api/projects - Création d'un projet
+- POST /api/lexique - Création d'une entrée du lexique
+- POST /api/champs - Création d'un champ dynamique
+"""
+
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services import lexique_version
+from services.lexique_version import (
+    get_lexique_version, get_projects_version, invalidate_lexique_version,
+)
+
+
+class VersionsSession:
+    """Session factice : compte les lectures de lexique_versions."""
+
+    def __init__(self, versions: dict):
+        self.versions = versions
+        self.reads = 0
+
+    async def execute(self, statement, params):
+        self.reads += 1
+        versions = self.versions
+
+        class Result:
+            def fetchall(self):
+                return [(scope, versions[scope]) for scope in params["scopes"] if scope in versions]
+
+        return Result()
+
+
+@pytest.fixture(autouse=True)
+def empty_version_cache():
+    """Chaque test part d'un cache vide."""
+    invalidate_lexique_version()
+    yield
+    invalidate_lexique_version()
+
+
+class TestLexiqueVersionCache:
+    """Tests du cache mémoire de la version du lexique."""
+
+    async def test_version_cached_within_ttl(self):
+        """
+        Test: Dans le délai du TTL, la version est servie sans relire la base.
+        """
+        db = VersionsSession({"all": 3})
+
+        assert await get_lexique_version(db) == "3"
+        db.versions["all"] = 4
+        assert await get_lexique_version(db) == "3"
+        assert db.reads == 1
+
+    async def test_version_reread_after_ttl(self, monkeypatch):
+        """
+        Test: Une fois le TTL écoulé, la version est relue en base.
+        """
+        monkeypatch.setattr(lexique_version, "LEXIQUE_VERSION_TTL_SECONDS", 0)
+        db = VersionsSession({"all": 3})
+
+        await get_lexique_version(db)
+        db.versions["all"] = 4
+
+        assert await get_lexique_version(db) == "4"
+        assert db.reads == 2
+
+    async def test_invalidation_clears_cache(self):
+        """
+        Test: Après invalidation, la version suivante est relue en base.
+        """
+        db = VersionsSession({"all": 3, "projects": 7})
+        await get_lexique_version(db)
+        await get_projects_version(db)
+        db.versions.update({"all": 4, "projects": 8})
+
+        invalidate_lexique_version()
+
+        assert await get_lexique_version(db) == "4"
+        assert await get_projects_version(db) == "8"
+
+    async def test_project_version_combines_shared(self):
+        """
+        Test: La version d'un projet combine son compteur et celui des
+        entrées partagées ; l'id du projet est insensible à la casse.
+        """
+        project_id = "0b8f2f2e-1111-4222-8333-444455556666"
+        db = VersionsSession({project_id: 5, "shared": 2})
+
+        assert await get_lexique_version(db, project_id.upper()) == "5.2"
+
+
+class TestLexiqueVersionEndpoints:
+    """Tests de l'incrément de version par les écritures."""
+
+    async def test_project_write_bumps_version(
+        self, client: AsyncClient, auth_headers: dict, db_session: AsyncSession,
+    ):
+        """
+        Test: Créer un projet change la version des projets, sans attendre le TTL.
+        """
+        before = await get_projects_version(db_session)
+
+        response = await client.post(
+            "/api/projects", headers=auth_headers, json={"name": f"Projet Test {uuid.uuid4().hex[:8]}"},
+        )
+        assert response.status_code == 201
+        try:
+            assert await get_projects_version(db_session) != before
+        finally:
+            await db_session.execute(
+                text("DELETE FROM projects WHERE id = CAST(:id AS uuid)"), {"id": response.json()["id"]},
+            )
+            await db_session.commit()
+
+    async def test_lexique_write_bumps_version(
+        self, client: AsyncClient, auth_headers: dict, db_session: AsyncSession,
+    ):
+        """
+        Test: Créer une entrée du lexique change la version globale et celle du projet.
+        """
+        project = await client.post(
+            "/api/projects", headers=auth_headers, json={"name": f"Projet Test {uuid.uuid4().hex[:8]}"},
+        )
+        project_id = project.json()["id"]
+        code = f"TEST_{uuid.uuid4().hex[:8].upper()}"
+        try:
+            before_all = await get_lexique_version(db_session)
+            before_project = await get_lexique_version(db_session, project_id)
+
+            response = await client.post(
+                "/api/lexique", headers=auth_headers,
+                json={"code": code, "label": "Entrée de test", "project_id": project_id},
+            )
+
+            assert response.status_code == 201
+            assert await get_lexique_version(db_session) != before_all
+            assert await get_lexique_version(db_session, project_id) != before_project
+        finally:
+            await db_session.execute(text("DELETE FROM lexique WHERE code = :code"), {"code": code})
+            await db_session.execute(
+                text("DELETE FROM projects WHERE id = CAST(:id AS uuid)"), {"id": project_id},
+            )
+            await db_session.commit()
+
+    async def test_champ_write_bumps_version(
+        self, client: AsyncClient, auth_headers: dict, db_session: AsyncSession,
+    ):
+        """
+        Test: Créer un champ dynamique change la version globale du lexique.
+        """
+        before = await get_lexique_version(db_session)
+
+        response = await client.post(
+            "/api/champs", headers=auth_headers,
+            json={"lexique_id": "TEST_CHAMP", "nom": f"Champ {uuid.uuid4().hex[:8]}", "type": "text"},
+        )
+        assert response.status_code == 201
+        try:
+            assert await get_lexique_version(db_session) != before
+        finally:
+            await db_session.execute(
+                text("DELETE FROM type_field_configs WHERE id = :id"), {"id": int(response.json()["id"])},
+            )
+            await db_session.commit()
@@ -0,0 +1,532 @@
+"""
+═══════════════════════════════════════════════════════════════════════════════
+Tests du module Points (patrimoine terrain) - GéoClic Suite
+═══════════════════════════════════════════════════════════════════════════════
+Ces tests vérifient la liste des points et ses filtres.
+
+Endpoints testés:
+- GET /api/points - Liste paginée, filtres sur les données techniques
+- GET /api/points/export/geojson - Export GeoJSON en flux
+- GET /api/points/export/csv - Export CSV en flux
+- GET /api/points/export/zip - Archive ZIP en flux (services/zip_stream.py)
+- GET /api/points/nearest - Points les plus proches (KNN)
+"""
+
+import io
+import json
+import random
+import string
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from routers.points import (
+    decode_points_cursor, encode_points_cursor, escape_like, estimate_points_count,
+)
+from services import custom_filters, point_export, zip_stream
+from services.custom_filters import (
+    _containment_candidates, build_custom_filters_sql, expression_index_name,
+    range_expression,
+)
+from services.nearest_points import NEAREST_SQL, ORIGIN_SQL
+from services.point_export import csv_row, stream_geojson
+from services.point_filters import compile_point_filters
+from services.zip_stream import ZipStream
+
+
+class TestCustomFilters:
+    """Tests de la traduction des filtres sur les données techniques."""
+
+    def test_numeric_equality_matches_number_and_text(self):
+        """
+        Test: Un nombre est cherché sous ses deux formes stockées (6 et "6").
+        """
+        candidates = _containment_candidates("Hauteur", "number", 6)
+
+        assert [json.loads(c) for c in candidates] == [{"Hauteur": 6}, {"Hauteur": "6"}]
+
+    def test_numeric_equality_rejects_text(self):
+        """
+        Test: Une valeur non numérique sur un champ nombre lève une erreur 400.
+        """
+        with pytest.raises(HTTPException) as exc_info:
+            _containment_candidates("Hauteur", "number", "haut")
+
+        assert exc_info.value.status_code == 400
+
+    def test_decimal_equality_kept_exact(self):
+        """
+        Test: Une valeur décimale est écrite telle quelle dans le document JSON.
+        """
+        candidates = _containment_candidates("Hauteur", "number", "0,1")
+
+        assert candidates[0] == '{"Hauteur": 0.1}'
+
+    @pytest.mark.parametrize("value", ["NaN", "Infinity", "-inf"])
+    def test_non_finite_number_rejected(self, value):
+        """
+        Test: NaN et Infinity ne sont pas des bornes acceptées.
+        """
+        with pytest.raises(HTTPException) as exc_info:
+            _containment_candidates("Hauteur", "number", value)
+
+        assert exc_info.value.status_code == 400
+
+    async def test_decimal_range_bounds_exact(self, monkeypatch):
+        """
+        Test: Les bornes d'une plage sont liées en Decimal exact (un float 0.1
+        serait envoyé 0.1000000000000000055… et exclurait un 0.1 stocké).
+        """
+        async def field_types(db, fields):
+            return {"Épaisseur": "number"}
+
+        monkeypatch.setattr(custom_filters, "get_field_types", field_types)
+        monkeypatch.setattr(custom_filters, "_record_range_filter", lambda kind, field: None)
+        params = {}
+
+        clauses = await build_custom_filters_sql(None, {"Épaisseur": {"min": 0.1, "max": 0.3}}, params)
+
+        assert len(clauses) == 2
+        assert params == {"cf_0_min": Decimal("0.1"), "cf_0_max": Decimal("0.3")}
+
+    def test_range_expression_escapes_field(self):
+        """
+        Test: Le nom de champ écrit en littéral est échappé, l'index porte un nom sûr.
+        """
+        expression = range_expression("num", "L'épaisseur")
+
+        assert expression == "geoclic_jsonb_numeric(custom_properties, 'L''épaisseur')"
+        assert expression_index_name("num", "L'épaisseur").startswith("idx_cp_num_")
+
+
+def search_marker() -> str:
+    """Mot unique (lettres seules) isolant les points d'un test dans la base."""
+    return "".join(random.choices(string.ascii_lowercase, k=12))
+
+
+class TestPointsSearch:
+    """Tests de la préparation de la recherche de points."""
+
+    @pytest.mark.parametrize("value, expected", [
+        ("100%", "100\\%"),
+        ("nom_rue", "nom\\_rue"),
+        ("C:\\temp", "C:\\\\temp"),
+        ("\\%", "\\\\\\%"),
+    ])
+    def test_escape_like(self, value, expected):
+        """
+        Test: Les jokers LIKE (%, _) et le caractère d'échappement sont
+        échappés, la barre oblique inverse en premier.
+        """
+        assert escape_like(value) == expected
+
+    def test_escape_like_keeps_plain_text(self):
+        """
+        Test: Une saisie sans caractère spécial est inchangée.
+        """
+        assert escape_like("Lampadaire église") == "Lampadaire église"
+
+
+class TestPointsPagination:
+    """Tests du curseur de pagination et du total estimé."""
+
+    def test_cursor_roundtrip(self):
+        """
+        Test: Un curseur encodé se décode en la même position (created_at, id).
+        """
+        created_at = datetime(2026, 3, 14, 15, 9, 26, 535897)
+        cursor = encode_points_cursor(created_at, "0B8F2F2E-1111-4222-8333-444455556666")
+
+        assert decode_points_cursor(cursor) == (created_at, "0b8f2f2e-1111-4222-8333-444455556666")
+
+    @pytest.mark.parametrize("cursor", [
+        "pas un curseur !",
+        "bm9uLWRhdGV8MGI4ZjJmMmUtMTExMS00MjIyLTgzMzMtNDQ0NDU1NTU2NjY2",  # date invalide
+        "MjAyNi0wMS0wMVQwMDowMDowMHxwYXMtdW4tdXVpZA",  # id non UUID
+        "MjAyNi0wMS0wMVQwMDowMDowMA",  # séparateur absent
+        "_w",  # octets non UTF-8
+    ])
+    def test_malformed_cursor_rejected(self, cursor):
+        """
+        Test: Un curseur mal formé ou modifié lève une erreur 400.
+        """
+        with pytest.raises(HTTPException) as exc_info:
+            decode_points_cursor(cursor)
+
+        assert exc_info.value.status_code == 400
+
+    async def test_estimate_without_filter_uses_reltuples(self):
+        """
+        Test: Sans filtre, le total vient des statistiques de la table.
+        """
+        class Result:
+            def scalar(self):
+                return 123456
+
+        class Session:
+            async def execute(self, statement, *args):
+                assert "reltuples" in str(statement)
+                return Result()
+
+        assert await estimate_points_count(Session(), "1=1", {}) == 123456
+
+    async def test_estimate_with_filter_uses_plan_rows(self):
+        """
+        Test: Avec filtres, le total est le nombre de lignes prévu par EXPLAIN.
+        """
+        class Result:
+            def scalar(self):
+                return json.dumps([{"Plan": {"Node Type": "Bitmap Heap Scan", "Plan Rows": 842}}])
+
+        class Session:
+            async def execute(self, statement, *args):
+                assert str(statement).startswith("EXPLAIN (FORMAT JSON)")
+                return Result()
+
+        where_sql = "project_id = CAST(:project_id AS uuid)"
+        assert await estimate_points_count(Session(), where_sql, {"project_id": "p"}) == 842
+
+
+class TestPointFilters:
+    """Tests du compilateur de filtres des points."""
+
+    def test_sql_text_independent_of_code_count(self):
+        """
+        Test: Un ou plusieurs codes lexique produisent le même texte SQL
+        (cache des requêtes préparées), les valeurs passent en paramètre.
+        """
+        one, params_one = compile_point_filters(lexique_code="ECL")
+        many, params_many = compile_point_filters(lexique_code="ECL, ECL_LAM,ECL")
+
+        assert one == many == ["lexique_code = ANY(CAST(:lexique_codes AS text[]))"]
+        assert params_many["lexique_codes"] == ["ECL", "ECL_LAM"]
+
+    def test_lexique_subtree_uses_materialized_path(self):
+        """
+        Test: Le filtre par sous-arbre est un seul prédicat sur le chemin
+        matérialisé, quel que soit le nombre de catégories.
+        """
+        clauses, params = compile_point_filters(lexique_subtree="ECL,VOI")
+
+        assert clauses == ["lexique_path && CAST(:lexique_subtrees AS text[])"]
+        assert params["lexique_subtrees"] == ["ECL", "VOI"]
+
+    def test_invalid_date_rejected(self):
+        """
+        Test: Une date mal formée lève une erreur 400 au lieu d'une erreur SQL.
+        """
+        with pytest.raises(HTTPException) as exc_info:
+            compile_point_filters(date_end="31/12/2026")
+
+        assert exc_info.value.status_code == 400
+
+
+class TestGeojsonExport:
+    """Tests de l'émission en flux de la FeatureCollection."""
+
+    @pytest.mark.parametrize("count", [0, 1, 5, 7])
+    async def test_partitions_framed_as_one_collection(self, monkeypatch, count):
+        """
+        Test: Virgules et crochets entre les paquets forment une seule
+        FeatureCollection valide, vide comprise.
+        """
+        features = [json.dumps({"type": "Feature", "properties": {"n": i}}) for i in range(count)]
+
+        class Scalars:
+            async def partitions(self, size):
+                for start in range(0, len(features), size):
+                    yield features[start:start + size]
+
+        class Result:
+            def scalars(self):
+                return Scalars()
+
+        class Session:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def stream(self, *args):
+                return Result()
+
+        monkeypatch.setattr(point_export, "AsyncSessionLocal", Session)
+        monkeypatch.setattr(point_export, "EXPORT_CHUNK_SIZE", 2)
+
+        body = b"".join([chunk async for chunk in stream_geojson("1=1", {})])
+
+        collection = json.loads(body)
+        assert collection["type"] == "FeatureCollection"
+        assert [f["properties"]["n"] for f in collection["features"]] == list(range(count))
+
+
+class TestCsvExport:
+    """Tests de l'export CSV en flux."""
+
+    def test_csv_row_custom_columns(self):
+        """
+        Test: Les champs dynamiques suivent l'ordre des colonnes découvertes,
+        les listes sont jointes et les champs absents laissés vides.
+        """
+        row = {
+            "id": "0b8f2f2e-1111-4222-8333-444455556666", "name": "Banc",
+            "type": "mobilier", "subtype": None, "lexique_code": "BANC",
+            "condition_state": "Bon", "point_status": "Actif", "sync_status": "validated",
+            "comment": None, "materiau": "Bois", "hauteur": 0.8, "largeur": None,
+            "latitude": 43.6, "longitude": 1.44, "photos": [],
+            "custom_properties": {"Couleurs": ["Vert", "Gris"]},
+            "created_at": datetime(2026, 1, 1), "updated_at": None,
+        }
+
+        values = csv_row(row, ["Couleurs", "Hauteur assise"])
+
+        assert values[-2:] == ["Vert | Gris", ""]
+        assert values[10] == "0.8"
+
+
+class TestZipStream:
+    """Tests de l'écriture d'archives ZIP en flux."""
+
+    async def test_jpeg_stored_text_deflated(self, tmp_path):
+        """
+        Test: Les photos sont stockées sans recompression, les entrées texte
+        compressées, et l'archive produite morceau par morceau est valide.
+        """
+        photo = tmp_path / "photo.jpg"
+        photo.write_bytes(b"\xff\xd8" + bytes(range(256)) * 100)
+        archive = ZipStream()
+
+        data = b"".join([chunk async for chunk in archive.add_file("photos/a_1.jpg", photo)])
+        data += archive.add_bytes("data.csv", "id;name\n" * 500)
+        data += archive.close()
+
+        with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+            assert zip_file.testzip() is None
+            assert zip_file.getinfo("photos/a_1.jpg").compress_type == zipfile.ZIP_STORED
+            assert zip_file.getinfo("data.csv").compress_type == zipfile.ZIP_DEFLATED
+            assert zip_file.read("photos/a_1.jpg") == photo.read_bytes()
+
+    async def test_stream_entry_emitted_by_chunks(self, tmp_path, monkeypatch):
+        """
+        Test: Une entrée volumineuse est rendue morceau par morceau, sans
+        être gardée entière en mémoire.
+        """
+        monkeypatch.setattr(zip_stream, "FILE_CHUNK_SIZE", 1024)
+        content = bytes(range(256)) * 64  # 16 Ko, incompressible en ZIP_STORED
+        source = tmp_path / "data.bin.gz"
+        source.write_bytes(content)
+        archive = ZipStream()
+
+        with open(source, "rb") as stream:
+            chunks = [chunk async for chunk in archive.add_stream("data.bin.gz", stream)]
+        data = b"".join(chunks) + archive.close()
+
+        assert len(chunks) > 10
+        assert max(len(chunk) for chunk in chunks) <= 2048
+        with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+            assert zip_file.read("data.bin.gz") == content
+
+
+class TestPointsListEndpoints:
+    """Tests de la liste des points."""
+
+    async def test_range_filter_on_text_field_rejected(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: Une plage sur un champ non déclaré nombre/date retourne 400.
+        """
+        response = await client.get(
+            "/api/points",
+            headers=auth_headers,
+            params={"custom_filters": json.dumps({"Champ inconnu": {"min": 1}})},
+        )
+
+        assert response.status_code == 400
+
+    async def search_ids(self, client: AsyncClient, auth_headers: dict, search: str) -> list:
+        response = await client.get(
+            "/api/points", headers=auth_headers, params={"search": search, "page_size": 500},
+        )
+        assert response.status_code == 200
+        return [item["id"] for item in response.json()["items"]]
+
+    async def test_search_ignores_accents(self, client: AsyncClient, auth_headers: dict, insert_points):
+        """
+        Test: La recherche ne tient compte ni des accents ni de la casse.
+        """
+        marker = search_marker()
+        [point_id] = await insert_points([{"name": f"Lampadaire Église {marker}"}])
+
+        assert point_id in await self.search_ids(client, auth_headers, f"eglise {marker}")
+        assert point_id in await self.search_ids(client, auth_headers, f"ÉGLISE {marker}")
+
+    async def test_search_ranked_by_relevance(self, client: AsyncClient, auth_headers: dict, insert_points):
+        """
+        Test: Un point dont le nom contient le mot cherché passe devant un
+        point qui ne le contient que dans son commentaire.
+        """
+        marker = search_marker()
+        in_comment, in_name = await insert_points([
+            {"name": "Banc", "comment": f"Repeint {marker}"},
+            {"name": f"Banc {marker}"},
+        ])
+
+        ids = [i for i in await self.search_ids(client, auth_headers, marker) if i in (in_comment, in_name)]
+
+        assert ids == [in_name, in_comment]
+
+    async def test_search_wildcard_is_literal(self, client: AsyncClient, auth_headers: dict, insert_points):
+        """
+        Test: Un % saisi par l'utilisateur est cherché tel quel, pas comme joker LIKE.
+        """
+        marker = search_marker()
+        percent, digits = await insert_points([
+            {"name": f"Remise 100% {marker}"},
+            {"name": f"Remise 1000 {marker}"},
+        ])
+
+        ids = await self.search_ids(client, auth_headers, f"0% {marker}")
+
+        assert percent in ids
+        assert digits not in ids
+
+    async def test_cursor_pages_stable_on_created_at_ties(
+        self, client: AsyncClient, auth_headers: dict, insert_points,
+    ):
+        """
+        Test: Des points de même created_at répartis sur plusieurs pages ne
+        sont ni répétés ni sautés (départage par id).
+        """
+        # Date future : ces points sont les premiers de l'ordre created_at DESC
+        created_at = datetime(2100, 1, 1) + timedelta(seconds=random.randint(0, 10 ** 6))
+        ids = await insert_points([{"created_at": created_at} for _ in range(5)])
+
+        seen, cursor = [], None
+        for _ in range(3):
+            params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+            response = await client.get("/api/points", headers=auth_headers, params=params)
+            assert response.status_code == 200
+            data = response.json()
+            seen += [item["id"] for item in data["items"]]
+            cursor = data["next_cursor"]
+
+        assert seen == sorted(ids, reverse=True)
+
+    async def test_invalid_cursor_returns_400(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: GET /api/points avec un curseur invalide retourne 400.
+        """
+        response = await client.get("/api/points", headers=auth_headers, params={"cursor": "invalide"})
+
+        assert response.status_code == 400
+
+    async def test_estimated_total(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: Avec total_mode=estimated, le total est signalé comme estimé.
+        """
+        response = await client.get(
+            "/api/points", headers=auth_headers, params={"total_mode": "estimated", "page_size": 1},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_estimated"] is True
+        assert data["total"] >= 0
+
+    async def test_geojson_export_empty(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: Un export sans point est une FeatureCollection vide valide.
+        """
+        response = await client.get(
+            "/api/points/export/geojson", headers=auth_headers,
+            params={"date_start": "2999-12-31", "date_end": "2999-12-31"},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"type": "FeatureCollection", "features": []}
+
+    async def test_geojson_export_several_partitions(
+        self, client: AsyncClient, auth_headers: dict, insert_points,
+    ):
+        """
+        Test: Un export de plusieurs paquets de 1000 lignes reste une seule
+        FeatureCollection valide, sans point perdu ni répété.
+        """
+        # Journée future propre au test : seuls ses points sont exportés
+        day = datetime(2100, 1, 1) + timedelta(days=random.randint(0, 30000))
+        ids = await insert_points([{"created_at": day} for _ in range(2500)])
+
+        response = await client.get(
+            "/api/points/export/geojson", headers=auth_headers,
+            params={"date_start": day.date().isoformat(), "date_end": day.date().isoformat()},
+        )
+
+        assert response.status_code == 200
+        collection = json.loads(response.content)
+        assert collection["type"] == "FeatureCollection"
+        exported = [feature["id"] for feature in collection["features"]]
+        assert sorted(exported) == sorted(ids)
+
+    async def test_csv_export_gzip(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: L'export CSV est compressé en gzip quand le client l'accepte.
+        """
+        response = await client.get(
+            "/api/points/export/csv",
+            headers={**auth_headers, "Accept-Encoding": "gzip"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text.startswith("ID;Nom;Type")
+
+    async def test_nearest_points(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: Les points proches sont classés par distance croissante (mètres).
+        """
+        response = await client.get(
+            "/api/points/nearest",
+            headers=auth_headers,
+            params={"lat": 43.6, "lng": 1.44, "limit": 5},
+        )
+
+        assert response.status_code == 200
+        distances = [point["distance"] for point in response.json()["points"]]
+        assert distances == sorted(distances)
+        assert len(distances) <= 5
+
+
+class TestNearestPoints:
+    """Tests de la recherche des points les plus proches."""
+
+    def test_knn_ordering_before_distance(self):
+        """
+        Test: Les candidats viennent du parcours KNN de l'index (<->) et la
+        distance n'est calculée que pour eux.
+        """
+        candidates, final = NEAREST_SQL.split("SELECT c.id")
+
+        assert "ORDER BY t.geom <-> {origin}" in candidates
+        assert "ST_Distance" not in candidates
+        assert "ST_Distance" in final
+
+    async def test_knn_plan_uses_gist_index(self, db_session):
+        """
+        Test: Le plan sert l'ORDER BY <-> par un parcours de l'index GiST,
+        sans parcours complet ni tri des candidats.
+        """
+        await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+        result = await db_session.execute(
+            text("EXPLAIN " + NEAREST_SQL.format(where_sql="1=1", origin=ORIGIN_SQL)),
+            {"lat": 43.6, "lng": 1.44, "limit": 5, "candidates": 15},
+        )
+        plan = "\n".join(row[0] for row in result.fetchall())
+
+        assert "Index Scan using idx_staging_geom" in plan
+        assert "Order By:" in plan
+        assert "Seq Scan on geoclic_staging" not in plan
@@ -0,0 +1,175 @@
+"""
+═══════════════════════════════════════════════════════════════════════════════
+Tests du cache des réponses publiques - GéoClic Suite
+═══════════════════════════════════════════════════════════════════════════════
+Ces tests vérifient le cache des GET anonymes (services/response_cache.py):
+calcul unique pour des requêtes simultanées, invalidation par étiquette,
+service d'une entrée périmée pendant son recalcul et ETag ; ainsi que les
+compteurs de scans QR écrits par lots (services/scan_counter.py).
+"""
+
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from services import response_cache, scan_counter
+from services.response_cache import cached_response, invalidate_public_cache
+
+
+def make_request(path: str = "/api/public/map/points", query: str = "", headers: dict = None) -> Request:
+    """Construit une requête GET anonyme."""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Chaque test part d'un cache vide."""
+    response_cache._memory_backend.clear()
+    yield
+    response_cache._memory_backend.clear()
+
+
+class TestPublicResponseCache:
+    """Tests du cache des réponses publiques."""
+
+    async def test_concurrent_misses_build_once(self):
+        """
+        Test: Des requêtes simultanées sur une entrée absente déclenchent un seul calcul.
+        """
+        calls = []
+
+        async def build(db):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"markers": []}
+
+        responses = await asyncio.gather(*[
+            cached_response(make_request(), build, tags=["points"]) for _ in range(10)
+        ])
+
+        assert len(calls) == 1
+        assert {r.body for r in responses} == {b'{"markers":[]}'}
+
+    async def test_key_params_share_entry(self):
+        """
+        Test: Deux requêtes aux paramètres bruts différents mais de même clé
+        normalisée partagent l'entrée du cache.
+        """
+        calls = []
+
+        async def build(db):
+            calls.append(1)
+            return {"features": []}
+
+        key_params = {"bbox": (1.428, 43.58, 1.45, 43.612), "zoom": 14}
+        for query in ("min_lng=1.4301&zoom=14", "min_lng=1.4305&zoom=14"):
+            await cached_response(make_request(query=query), build, tags=["demandes"], key_params=key_params)
+
+        assert len(calls) == 1
+
+    async def test_tag_invalidation(self):
+        """
+        Test: Une écriture invalide les seules réponses de son étiquette.
+        """
+        calls = {"points": 0, "lexique": 0}
+
+        def builder(tag):
+            async def build(db):
+                calls[tag] += 1
+                return {"version": calls[tag]}
+            return build
+
+        for _ in range(2):
+            await cached_response(make_request("/api/public/map/points"), builder("points"), tags=["points"])
+            await cached_response(make_request("/api/public/categories"), builder("lexique"), tags=["lexique"])
+        assert calls == {"points": 1, "lexique": 1}
+
+        await invalidate_public_cache("points")
+        response = await cached_response(make_request("/api/public/map/points"), builder("points"), tags=["points"])
+        await cached_response(make_request("/api/public/categories"), builder("lexique"), tags=["lexique"])
+
+        assert calls == {"points": 2, "lexique": 1}
+        assert response.body == b'{"version":2}'
+
+    async def test_stale_served_while_revalidating(self):
+        """
+        Test: Une entrée périmée est servie aussitôt et recalculée en arrière-plan.
+        """
+        calls = []
+
+        async def build(db):
+            calls.append(1)
+            return {"version": len(calls)}
+
+        await cached_response(make_request(), build, tags=["points"], ttl=0, stale_ttl=60)
+        response = await cached_response(make_request(), build, tags=["points"], ttl=0, stale_ttl=60)
+
+        assert response.body == b'{"version":1}'
+        await asyncio.sleep(0)  # Laisser le recalcul se terminer
+        await asyncio.sleep(0)
+        assert len(calls) == 2
+
+    async def test_etag_revalidation(self):
+        """
+        Test: Un client qui renvoie l'ETag reçu obtient un 304.
+        """
+        async def build(db):
+            return ["faible", "normal"]
+
+        response = await cached_response(make_request(), build, tags=[])
+        assert response.headers["cache-control"] == "public, max-age=60"
+
+        revalidated = await cached_response(
+            make_request(headers={"If-None-Match": response.headers["etag"]}), build, tags=[],
+        )
+
+        assert revalidated.status_code == 304
+
+
+class TestScanCounter:
+    """Tests des compteurs de scans QR."""
+
+    async def test_failed_flush_keeps_scans(self, monkeypatch):
+        """
+        Test: Les scans sont cumulés en mémoire ; un lot non écrit est conservé.
+        """
+        monkeypatch.setattr(scan_counter, "_pending", {})
+
+        async def failing_execute(*args, **kwargs):
+            raise ConnectionError("base indisponible")
+
+        monkeypatch.setattr(scan_counter.AsyncSessionLocal.class_, "execute", failing_execute)
+
+        for _ in range(3):
+            scan_counter.record_scan("GC-ABC123")
+        scan_counter.record_scan("GC-XYZ789")
+
+        assert await scan_counter.flush_scan_counts() == 0
+
+        scan_counter.record_scan("GC-ABC123")
+        assert scan_counter._pending["GC-ABC123"][0] == 4
+        assert scan_counter.pending_scan_count() == 5
+
+    def test_invalid_codes_and_full_buffer_ignored(self, monkeypatch):
+        """
+        Test: Un identifiant hors format n'est pas compté ; un tampon plein
+        n'accepte plus de nouveaux codes mais compte encore les siens.
+        """
+        monkeypatch.setattr(scan_counter, "_pending", {})
+        monkeypatch.setattr(scan_counter, "MAX_PENDING_CODES", 2)
+
+        scan_counter.record_scan("GC-' OR 1=1 --")
+        scan_counter.record_scan("GC-ABC123")
+        scan_counter.record_scan("GC-XYZ789")
+        scan_counter.record_scan("GC-NEW456")
+        scan_counter.record_scan("GC-ABC123")
+
+        assert scan_counter._pending.keys() == {"GC-ABC123", "GC-XYZ789"}
+        assert scan_counter.pending_scan_count() == 3
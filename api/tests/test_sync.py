@@ -0,0 +1,380 @@
+"""
+═══════════════════════════════════════════════════════════════════════════════
+Tests de la synchronisation Mobile ↔ Serveur - GéoClic Suite
+═══════════════════════════════════════════════════════════════════════════════
+Ces tests vérifient le protocole de synchronisation delta (journal + curseur).
+
+Endpoints testés:
+- POST /api/sync - Synchronisation bidirectionnelle
+- GET /api/sync/download - Téléchargement en flux (NDJSON)
+- GET /api/sync/status - Statut de synchronisation
+- GET /api/sync/stats - Percentiles de performance (admin)
+"""
+
+import json
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from starlette.requests import Request
+
+from routers.points import check_user_permissions
+from routers.sync import (
+    encode_sync_cursor, decode_sync_cursor,
+    prepare_upload_rows, prepare_update_entry, split_upload_conflicts,
+    upload_points_bulk,
+    get_user_project_scope, row_to_sync_point,
+)
+from schemas.point import GeometryEncoding, PointCreate
+from schemas.sync import SyncPointCreate
+from services.geometry_encoding import encoded_geometry_sql
+from services.offline_package import OfflineArtifact, artifact_response, permissions_fingerprint
+
+
+class TestSyncCursor:
+    """Tests du curseur opaque de synchronisation."""
+
+    def test_cursor_roundtrip(self):
+        """
+        Test: Un curseur encodé se décode en la même position (txid, seq).
+        """
+        cursor = encode_sync_cursor(123456789, 42)
+
+        assert decode_sync_cursor(cursor) == (123456789, 42)
+
+    def test_cursor_is_opaque(self):
+        """
+        Test: Le curseur ne laisse pas apparaître la position brute.
+        """
+        cursor = encode_sync_cursor(1000, 7)
+
+        assert ":" not in cursor
+        assert "=" not in cursor
+
+    def test_invalid_cursor_rejected(self):
+        """
+        Test: Un curseur corrompu lève une erreur 400.
+        """
+        with pytest.raises(HTTPException) as exc_info:
+            decode_sync_cursor("pas-un-curseur")
+
+        assert exc_info.value.status_code == 400
+
+
+class TestSyncBatchValidation:
+    """Tests de la validation des lots avant l'écriture groupée."""
+
+    def test_upload_rows_keep_valid_points(self):
+        """
+        Test: Les points valides deviennent des lignes prêtes pour jsonb_to_recordset,
+        les points invalides produisent une erreur par point.
+        """
+        valid = PointCreate(
+            name="Lampadaire", type="eclairage",
+            coordinates=[{"latitude": 43.6, "longitude": 1.44}],
+        )
+        invalid = PointCreate(
+            name="Réseau", type="reseau", geom_type="LINESTRING",
+            coordinates=[{"latitude": 43.6, "longitude": 1.44}],
+        )
+
+        rows, errors = prepare_upload_rows([valid, invalid])
+
+        assert len(rows) == 1
+        assert rows[0]["wkt"] == "POINT(1.44 43.6)"
+        assert len(errors) == 1
+        assert "Réseau" in errors[0]
+
+    def test_upload_rows_keep_client_id(self):
+        """
+        Test: L'UUID généré par le mobile est conservé, un renvoi ne crée pas de doublon.
+        """
+        point = SyncPointCreate(
+            id="0B8F2F2E-1111-4222-8333-444455556666",
+            name="Lampadaire", type="eclairage",
+            coordinates=[{"latitude": 43.6, "longitude": 1.44}],
+        )
+
+        rows, errors = prepare_upload_rows([point])
+
+        assert errors == []
+        assert rows[0]["id"] == "0b8f2f2e-1111-4222-8333-444455556666"
+
+    async def test_upload_conflicts_reported(self):
+        """
+        Test: Un point écarté par ON CONFLICT est signalé : déjà reçu s'il vient
+        du même utilisateur, en erreur si l'identifiant appartient à un autre point.
+        """
+        class OwnersResult:
+            def fetchall(self):
+                return [("00000000-0000-4000-8000-000000000002", "user-1"),
+                        ("00000000-0000-4000-8000-000000000003", "user-2")]
+
+        class Session:
+            async def execute(self, *args, **kwargs):
+                return OwnersResult()
+
+        rows = [
+            {"id": f"00000000-0000-4000-8000-00000000000{i}", "name": f"Point {i}"}
+            for i in (1, 2, 3)
+        ]
+
+        already_uploaded, errors = await split_upload_conflicts(
+            Session(), rows, {"00000000-0000-4000-8000-000000000001"}, "user-1",
+        )
+
+        assert already_uploaded == ["00000000-0000-4000-8000-000000000002"]
+        assert len(errors) == 1 and "Point 3" in errors[0]
+
+    async def test_upload_returns_server_generated_ids(self):
+        """
+        Test: Un point envoyé sans identifiant (ancien client) est retourné avec
+        l'id généré par le serveur, pour invalider les tuiles qui le couvrent.
+        """
+        class InsertResult:
+            def __init__(self, ids):
+                self.ids = ids
+
+            def fetchall(self):
+                return [(point_id,) for point_id in self.ids]
+
+        class Savepoint:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        class Session:
+            def begin_nested(self):
+                return Savepoint()
+
+            async def execute(self, statement, params):
+                return InsertResult([row["id"] for row in json.loads(params["rows"])])
+
+        point = SyncPointCreate(
+            name="Lampadaire", type="eclairage",
+            coordinates=[{"latitude": 43.6, "longitude": 1.44}],
+        )
+
+        inserted_ids, errors, already_uploaded = await upload_points_bulk(Session(), [point], "user-1")
+
+        assert errors == [] and already_uploaded == []
+        assert len(inserted_ids) == 1 and inserted_ids[0] is not None
+
+    def test_update_entry_casts_values(self):
+        """
+        Test: Une mise à jour est typée selon la colonne cible.
+        """
+        row = prepare_update_entry({
+            "id": "0b8f2f2e-1111-4222-8333-444455556666",
+            "hauteur": "6.5",
+            "name": "Mât",
+        })
+
+        assert row["hauteur"] == 6.5
+        assert row["name"] == "Mât"
+
+    def test_update_entry_rejects_unknown_field(self):
+        """
+        Test: Un champ hors liste blanche est refusé (il servirait à construire le SQL).
+        """
+        with pytest.raises(ValueError):
+            prepare_update_entry({
+                "id": "0b8f2f2e-1111-4222-8333-444455556666",
+                "name = 'x'; --": "y",
+            })
+
+
+class TestSyncProjectScope:
+    """Tests du périmètre de projets appliqué au téléchargement."""
+
+    def test_admin_is_not_restricted(self):
+        """
+        Test: Un admin n'a pas de périmètre (tous les projets).
+        """
+        assert get_user_project_scope({"is_super_admin": True}) is None
+        assert get_user_project_scope({"role_data": "admin", "permissions": {"projets": ["x"]}}) is None
+
+    def test_user_scope_from_permissions(self):
+        """
+        Test: Les projets autorisés deviennent le périmètre, les ids invalides sont ignorés.
+        """
+        project_id = "0B8F2F2E-1111-4222-8333-444455556666"
+        scope = get_user_project_scope({
+            "role_data": "editeur",
+            "permissions": {"projets": [project_id, "pas-un-uuid"]},
+        })
+
+        assert scope == [project_id.lower()]
+
+    def test_permission_check_matches_scope(self):
+        """
+        Test: La vérification d'accès compare les projets comme le périmètre,
+        sans tenir compte de la casse.
+        """
+        user = {
+            "role_data": "editeur",
+            "permissions": {"projets": ["0B8F2F2E-1111-4222-8333-444455556666"]},
+        }
+
+        check_user_permissions(user, "0b8f2f2e-1111-4222-8333-444455556666")
+        with pytest.raises(HTTPException) as exc_info:
+            check_user_permissions(user, "00000000-0000-4000-8000-000000000001")
+        assert exc_info.value.status_code == 403
+
+
+class TestGeometryEncoding:
+    """Tests de l'encodage compact des géométries."""
+
+    def test_encoded_geometry_passed_through(self):
+        """
+        Test: Une géométrie encodée par PostGIS est transmise telle quelle,
+        sans liste de coordonnées.
+        """
+        point = row_to_sync_point({
+            "id": "0b8f2f2e-1111-4222-8333-444455556666",
+            "name": "Réseau", "type": "reseau", "geom_type": "LINESTRING",
+            "geom_encoded": "AgAChNLWDtT65yIKFA==",
+            "created_at": "2026-01-01T00:00:00",
+        })
+
+        assert point.coordinates == []
+        assert point.geometry == "AgAChNLWDtT65yIKFA=="
+
+    def test_twkb_sql_expression(self):
+        """
+        Test: L'encodage TWKB est produit en SQL, en base64 sans retour à la ligne.
+        """
+        sql = encoded_geometry_sql(GeometryEncoding.twkb)
+
+        assert sql.startswith("translate(encode(ST_AsTWKB(geom, 7, 2), 'base64')")
+
+
+class TestOfflinePackageArtifact:
+    """Tests du service des packages offline pré-construits."""
+
+    def make_request(self, headers: dict) -> Request:
+        return Request({
+            "type": "http",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        })
+
+    def test_gzip_variant_served(self):
+        """
+        Test: Un client acceptant gzip reçoit la variante compressée avec un ETag dédié.
+        """
+        artifact = OfflineArtifact("1.1:1", b'{"lexique_entries": []}' * 50)
+
+        response = artifact_response(self.make_request({"Accept-Encoding": "gzip"}), artifact)
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == f'"{artifact.etag_base}-gz"'
+        assert response.body == artifact.gzip
+
+    def test_if_none_match_returns_304(self):
+        """
+        Test: Un client renvoyant l'ETag reçu (même compressé) obtient un 304 sans corps.
+        """
+        artifact = OfflineArtifact("1.1:1", b'{"lexique_entries": []}')
+
+        response = artifact_response(
+            self.make_request({"If-None-Match": f'W/"{artifact.etag_base}-gz"'}),
+            artifact,
+        )
+
+        assert response.status_code == 304
+        assert response.body == b""
+
+    def test_server_time_sent_in_header(self):
+        """
+        Test: L'heure du serveur est envoyée en en-tête, le corps partagé
+        garde un ETag fort.
+        """
+        artifact = OfflineArtifact("1.1:1", b'{"lexique_entries": []}')
+
+        response = artifact_response(self.make_request({}), artifact)
+
+        assert response.headers["x-server-time"]
+        assert response.headers["etag"] == f'"{artifact.etag_base}"'
+        assert json.loads(response.body) == {"lexique_entries": []}
+
+    def test_permissions_separate_artifacts(self):
+        """
+        Test: Deux utilisateurs aux mêmes projets mais aux permissions
+        différentes n'ont pas le même artefact (permissions recopiées).
+        """
+        projects = ["0b8f2f2e-1111-4222-8333-444455556666"]
+
+        assert permissions_fingerprint(None) == "all"
+        assert permissions_fingerprint(projects, {"sync": True}) != permissions_fingerprint(projects, {"sync": False})
+        assert permissions_fingerprint(projects, {"a": 1, "b": 2}) == permissions_fingerprint(projects, {"b": 2, "a": 1})
+
+
+class TestSyncEndpoints:
+    """Tests des endpoints de synchronisation."""
+
+    async def test_sync_without_auth_fails(self, client: AsyncClient):
+        """
+        Test: POST /api/sync sans authentification échoue.
+        """
+        response = await client.post("/api/sync", json={"device_id": "test-device"})
+
+        assert response.status_code in [401, 403]
+
+    async def test_sync_returns_cursor(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: Une sync sans curseur retourne un curseur pour la suivante.
+        """
+        response = await client.post(
+            "/api/sync",
+            headers=auth_headers,
+            json={"device_id": "test-device", "page_size": 10}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["next_cursor"]
+        assert isinstance(data["points_deleted_ids"], list)
+        assert len(data["points_to_download"]) <= 10
+
+    async def test_sync_with_invalid_cursor(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: Une sync avec un curseur invalide retourne 400.
+        """
+        response = await client.post(
+            "/api/sync",
+            headers=auth_headers,
+            json={"device_id": "test-device", "cursor": "invalide"}
+        )
+
+        assert response.status_code == 400
+
+    async def test_download_stream_ends_with_cursor(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: GET /api/sync/download émet une ligne JSON par modification
+        et se termine par une ligne "end" portant le curseur suivant.
+        """
+        response = await client.get("/api/sync/download", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[-1]["type"] == "end"
+        assert lines[-1]["cursor"]
+        assert {line["type"] for line in lines} <= {"point", "deleted", "checkpoint", "end"}
+
+    async def test_sync_stats_by_device(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: GET /api/sync/stats regroupe les percentiles par appareil.
+        """
+        await client.post("/api/sync", headers=auth_headers, json={"device_id": "test-device"})
+
+        response = await client.get("/api/sync/stats?group_by=device&days=1", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["group_by"] == "device"
+        device = next(item for item in data["items"] if item["key"] == "test-device")
+        assert device["syncs"] >= 1
+        assert device["total_p95_ms"] >= device["total_p50_ms"]
@@ -0,0 +1,199 @@
+"""
+═══════════════════════════════════════════════════════════════════════════════
+Tests des tuiles vectorielles (MVT) - GéoClic Suite
+═══════════════════════════════════════════════════════════════════════════════
+Ces tests vérifient la construction des tuiles (services/vector_tiles.py),
+leur cache (services/tile_cache.py) et le regroupement des marqueurs de la
+carte publique (services/map_clusters.py).
+
+Endpoints testés:
+- GET /api/points/tiles/{z}/{x}/{y}.mvt
+- GET /api/zones/tiles/{z}/{x}/{y}.mvt
+- GET /api/demandes/public/carte/demandes/clusters
+"""
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+
+from config import settings
+from services.map_clusters import (
+    CLUSTER_MAX_ZOOM, CLUSTER_SQL, bbox_condition, cluster_cell_size, use_clusters,
+)
+from services.tile_cache import (
+    MAX_TILE_SET, ZoomSelection, get_cached_tile, layer_epoch, store_tile, tile_range,
+    zoom_selections,
+)
+from services.vector_tiles import (
+    DEMANDES_LAYER, MVT_MEDIA_TYPE, POINTS_LAYER, ZONES_LAYER, invalidate_layer,
+    tile_sql, validate_tile,
+)
+
+
+class TestVectorTiles:
+    """Tests de la construction des tuiles."""
+
+    def test_tile_outside_grid_rejected(self):
+        """
+        Test: Une tuile hors de la grille du niveau de zoom n'existe pas (404).
+        """
+        validate_tile(2, 3, 3)
+
+        with pytest.raises(HTTPException) as exc_info:
+            validate_tile(2, 4, 0)
+
+        assert exc_info.value.status_code == 404
+
+    def test_unknown_attribute_rejected(self):
+        """
+        Test: Un attribut non déclaré par la couche est refusé (400).
+        """
+        assert POINTS_LAYER.select_attributes(None) == POINTS_LAYER.default_attributes
+        assert POINTS_LAYER.select_attributes("name, id,name") == ["name", "id"]
+
+        with pytest.raises(HTTPException) as exc_info:
+            DEMANDES_LAYER.select_attributes("id,declarant_email")
+
+        assert exc_info.value.status_code == 400
+
+    def test_tile_sql_filters_by_envelope(self):
+        """
+        Test: La requête filtre par l'emprise de la tuile (index GiST) et
+        simplifie les polygones des zones.
+        """
+        sql = tile_sql(ZONES_LAYER, ["id", "name"], ["level = :level"])
+
+        assert "t.geom && bounds.envelope_4326" in sql
+        assert "level = :level" in sql
+        assert "ST_Simplify" in sql
+        assert "ST_Simplify" not in tile_sql(DEMANDES_LAYER, ["id"], [])
+
+
+class TestTileCache:
+    """Tests du cache de tuiles."""
+
+    def test_tile_range(self):
+        """
+        Test: Les tuiles couvrant une emprise suivent le schéma XYZ (Y vers le sud).
+        """
+        assert tile_range((1.44, 43.6, 1.44, 43.6), 0) == (0, 0, 0, 0)
+        assert tile_range((1.44, 43.6, 1.44, 43.6), 1) == (1, 0, 1, 0)
+        # Près d'un bord, la marge inclut la tuile voisine
+        assert tile_range((0.001, 43.6, 0.001, 43.6), 1, margin=0.02) == (0, 0, 1, 0)
+
+    def test_zoom_selection_merges_bounds(self):
+        """
+        Test: Les emprises d'un lot sont fusionnées par zoom ; une sélection
+        trop grande se réduit à son emprise commune.
+        """
+        points = [(1.44 + i * 0.001, 43.6, 1.44 + i * 0.001, 43.6) for i in range(1000)]
+        selections = zoom_selections(points, 22, 0.0)
+
+        assert selections[0].tiles == {(0, 0)}
+        assert len(selections[22].tiles) <= 1000
+        assert (0, 0) not in selections[22]
+
+        large = ZoomSelection([(0, 0, MAX_TILE_SET, 1)])
+        assert large.tiles is None
+        assert (10, 1) in large and (10, 2) not in large
+
+    async def test_invalidation_limited_to_bounds(self, tmp_path, monkeypatch):
+        """
+        Test: Une écriture n'invalide que les tuiles qui recoupent son emprise,
+        à tous les niveaux de zoom.
+        """
+        monkeypatch.setattr(settings, "tile_cache_path", str(tmp_path))
+        # Toulouse (z1: 1/0) et Sydney (z1: 1/1)
+        await store_tile("points", 1, 1, 0, "v", b"toulouse", layer_epoch("points"))
+        await store_tile("points", 1, 1, 1, "v", b"sydney", layer_epoch("points"))
+        assert await get_cached_tile("points", 1, 1, 0, "v") == b"toulouse"
+
+        await invalidate_layer(POINTS_LAYER, [(1.44, 43.6, 1.45, 43.61)])
+
+        assert await get_cached_tile("points", 1, 1, 0, "v") is None
+        assert await get_cached_tile("points", 1, 1, 1, "v") == b"sydney"
+
+    async def test_tile_not_stored_after_concurrent_invalidation(self, tmp_path, monkeypatch):
+        """
+        Test: Une tuile calculée pendant une invalidation n'est pas mise en cache.
+        """
+        monkeypatch.setattr(settings, "tile_cache_path", str(tmp_path))
+        epoch = layer_epoch("zones")
+
+        await invalidate_layer(ZONES_LAYER, [(1.44, 43.6, 1.45, 43.61)])
+        await store_tile("zones", 0, 0, 0, "v", b"perimee", epoch)
+
+        assert await get_cached_tile("zones", 0, 0, 0, "v") is None
+
+    async def test_expired_tile_not_served(self, tmp_path, monkeypatch):
+        """
+        Test: Une tuile plus ancienne que tile_cache_ttl_seconds est recalculée.
+        """
+        monkeypatch.setattr(settings, "tile_cache_path", str(tmp_path))
+        await store_tile("demandes", 0, 0, 0, "v", b"ancienne", layer_epoch("demandes"))
+        assert await get_cached_tile("demandes", 0, 0, 0, "v") == b"ancienne"
+
+        monkeypatch.setattr(settings, "tile_cache_ttl_seconds", -1)
+
+        assert await get_cached_tile("demandes", 0, 0, 0, "v") is None
+
+
+class TestMapClusters:
+    """Tests du regroupement des marqueurs."""
+
+    def test_clusters_below_street_zoom(self):
+        """
+        Test: Les marqueurs sont regroupés sous le zoom rue, pas sans zoom.
+        """
+        assert use_clusters(10)
+        assert not use_clusters(CLUSTER_MAX_ZOOM)
+        assert not use_clusters(None)
+
+    def test_cell_size_halves_per_zoom(self):
+        """
+        Test: La maille (mètres) est divisée par deux à chaque niveau de zoom.
+        """
+        assert cluster_cell_size(11) == pytest.approx(cluster_cell_size(10) / 2)
+        # ~60 px à l'écran au zoom 12 : un peu plus de 2 km
+        assert 2000 < cluster_cell_size(12) < 2500
+
+    def test_bbox_condition_uses_index(self):
+        """
+        Test: L'emprise est filtrée par l'opérateur && (index GiST).
+        """
+        params = {}
+        sql = bbox_condition("d.geom", (1.3, 43.5, 1.5, 43.7), params)
+
+        assert sql.startswith("d.geom && ST_MakeEnvelope")
+        assert params == {"min_lng": 1.3, "min_lat": 43.5, "max_lng": 1.5, "max_lat": 43.7}
+        assert bbox_condition("d.geom", None, params) is None
+        assert "ST_SnapToGrid" in CLUSTER_SQL
+
+    async def test_demandes_clusters_requires_zoom(self, client: AsyncClient):
+        """
+        Test: Le mode regroupé exige un niveau de zoom.
+        """
+        response = await client.get("/api/demandes/public/carte/demandes/clusters")
+
+        assert response.status_code == 422
+
+
+class TestTilesEndpoints:
+    """Tests des endpoints de tuiles."""
+
+    async def test_points_tile(self, client: AsyncClient, auth_headers: dict):
+        """
+        Test: La tuile des points est servie au format MVT.
+        """
+        response = await client.get("/api/points/tiles/0/0/0.mvt", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == MVT_MEDIA_TYPE
+
+    async def test_zones_tile_outside_grid(self, client: AsyncClient):
+        """
+        Test: Une tuile inexistante retourne 404.
+        """
+        response = await client.get("/api/zones/tiles/1/2/0.mvt")
+
+        assert response.status_code == 404
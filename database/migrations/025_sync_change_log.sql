@@ -0,0 +1,104 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 025: Journal des modifications pour la synchronisation delta
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- POST /api/sync ne lit plus geoclic_staging par updated_at mais ce journal,
+-- alimenté par trigger (INSERT / UPDATE / DELETE). Le mobile renvoie un curseur
+-- opaque (txid, seq) et reçoit ses modifications par pages bornées, y compris
+-- les suppressions (tombstones).
+--
+-- Pourquoi txid et pas seulement seq : une séquence est attribuée avant le
+-- COMMIT, deux transactions concurrentes peuvent donc rendre visibles leurs
+-- lignes dans le désordre. En ne lisant que les lignes dont la transaction est
+-- antérieure au xmin du snapshot courant (toutes terminées), l'ensemble lu ne
+-- peut plus changer et le curseur ne saute jamais de modification.
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 1. TABLE DU JOURNAL
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+CREATE TABLE IF NOT EXISTS geoclic_staging_changes (
+    seq BIGSERIAL PRIMARY KEY,
+    txid BIGINT NOT NULL DEFAULT txid_current(),
+    point_id UUID NOT NULL,
+    project_id UUID,
+    operation CHAR(1) NOT NULL,  -- I = insert, U = update, D = delete (tombstone)
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_staging_changes_cursor ON geoclic_staging_changes (txid, seq);
+CREATE INDEX IF NOT EXISTS idx_staging_changes_project_cursor ON geoclic_staging_changes (project_id, txid, seq);
+CREATE INDEX IF NOT EXISTS idx_staging_changes_point ON geoclic_staging_changes (point_id);
+CREATE INDEX IF NOT EXISTS idx_staging_changes_changed_at ON geoclic_staging_changes (changed_at);
+
+COMMENT ON TABLE geoclic_staging_changes IS 'Journal des modifications de geoclic_staging pour la synchronisation delta mobile';
+COMMENT ON COLUMN geoclic_staging_changes.txid IS 'Transaction ayant produit la modification (txid_current), sert de curseur avec seq';
+COMMENT ON COLUMN geoclic_staging_changes.operation IS 'I = création, U = modification, D = suppression (tombstone)';
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 2. TRIGGER D'ALIMENTATION
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION log_staging_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO geoclic_staging_changes (point_id, project_id, operation)
+        VALUES (OLD.id, OLD.project_id, 'D');
+        RETURN OLD;
+    END IF;
+
+    -- Un point déplacé vers un autre projet disparaît de l'ancien
+    IF TG_OP = 'UPDATE' AND OLD.project_id IS DISTINCT FROM NEW.project_id THEN
+        INSERT INTO geoclic_staging_changes (point_id, project_id, operation)
+        VALUES (OLD.id, OLD.project_id, 'D');
+    END IF;
+
+    INSERT INTO geoclic_staging_changes (point_id, project_id, operation)
+    VALUES (NEW.id, NEW.project_id, CASE WHEN TG_OP = 'INSERT' THEN 'I' ELSE 'U' END);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS staging_log_change ON geoclic_staging;
+
+CREATE TRIGGER staging_log_change
+    AFTER INSERT OR UPDATE OR DELETE ON geoclic_staging
+    FOR EACH ROW EXECUTE FUNCTION log_staging_change();
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 3. AMORÇAGE AVEC LES POINTS EXISTANTS
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Un mobile sans curseur reçoit tout le journal : il doit contenir chaque point.
+
+INSERT INTO geoclic_staging_changes (point_id, project_id, operation, changed_at)
+SELECT s.id, s.project_id, 'I', COALESCE(s.updated_at, s.created_at, CURRENT_TIMESTAMP)
+FROM geoclic_staging s
+WHERE NOT EXISTS (
+    SELECT 1 FROM geoclic_staging_changes c WHERE c.point_id = s.id
+);
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 4. COMPACTION
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Ne garde que la dernière entrée par point et par projet (les tombstones
+-- restent) parmi les transactions terminées. À lancer périodiquement (cron).
+
+CREATE OR REPLACE FUNCTION compact_staging_changes()
+RETURNS INTEGER AS $$
+DECLARE
+    v_deleted INTEGER;
+BEGIN
+    DELETE FROM geoclic_staging_changes c
+    USING geoclic_staging_changes newer
+    WHERE newer.point_id = c.point_id
+      AND newer.project_id IS NOT DISTINCT FROM c.project_id
+      AND (newer.txid, newer.seq) > (c.txid, c.seq)
+      AND newer.txid < txid_snapshot_xmin(txid_current_snapshot());
+
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+    RETURN v_deleted;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION compact_staging_changes IS 'Supprime les entrées du journal de sync remplacées par une modification plus récente';
@@ -0,0 +1,61 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 026: Compteurs de version du lexique (lexique + champs dynamiques)
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Remplace le hash MD5 de toute la table lexique calculé à chaque appel de
+-- /api/sync. Chaque écriture sur lexique ou type_field_configs incrémente :
+--   - 'all'        : toute modification
+--   - 'shared'     : lignes sans projet (communes à tous les projets)
+--   - <project_id> : lignes du projet
+-- La version d'un projet est "<project>.<shared>", la version globale "<all>".
+-- Une vérification de version coûte une lecture par clé primaire.
+
+CREATE TABLE IF NOT EXISTS lexique_versions (
+    scope VARCHAR(64) PRIMARY KEY,  -- 'all', 'shared' ou project_id
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE lexique_versions IS 'Compteurs de version du lexique et des champs dynamiques (global, partagé, par projet)';
+
+CREATE OR REPLACE FUNCTION bump_lexique_version()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_scopes TEXT[] := ARRAY['all'];
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        v_scopes := v_scopes || COALESCE(NEW.project_id::text, 'shared');
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        v_scopes := v_scopes || COALESCE(OLD.project_id::text, 'shared');
+    END IF;
+
+    INSERT INTO lexique_versions (scope, version)
+    SELECT DISTINCT s, 1 FROM unnest(v_scopes) AS s
+    ON CONFLICT (scope) DO UPDATE
+        SET version = lexique_versions.version + 1,
+            updated_at = CURRENT_TIMESTAMP;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS lexique_bump_version ON lexique;
+CREATE TRIGGER lexique_bump_version
+    AFTER INSERT OR UPDATE OR DELETE ON lexique
+    FOR EACH ROW EXECUTE FUNCTION bump_lexique_version();
+
+DROP TRIGGER IF EXISTS type_field_configs_bump_version ON type_field_configs;
+CREATE TRIGGER type_field_configs_bump_version
+    AFTER INSERT OR UPDATE OR DELETE ON type_field_configs
+    FOR EACH ROW EXECUTE FUNCTION bump_lexique_version();
+
+-- Initialisation des compteurs existants
+INSERT INTO lexique_versions (scope, version) VALUES ('all', 1), ('shared', 1)
+ON CONFLICT (scope) DO NOTHING;
+
+INSERT INTO lexique_versions (scope, version)
+SELECT DISTINCT project_id::text, 1 FROM lexique WHERE project_id IS NOT NULL
+UNION
+SELECT DISTINCT project_id::text, 1 FROM type_field_configs WHERE project_id IS NOT NULL
+ON CONFLICT (scope) DO NOTHING;
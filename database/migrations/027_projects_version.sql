@@ -0,0 +1,28 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 027: Compteur de version des projets (packages offline)
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Les packages offline (/api/sync/offline-package, /api/sig/offline-package)
+-- sont pré-construits et compressés côté API, puis servis avec un ETag. Ils
+-- sont reconstruits quand le lexique, les champs (migration 026) ou les
+-- projets changent : ce compteur couvre les projets (scope 'projects').
+
+CREATE OR REPLACE FUNCTION bump_projects_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO lexique_versions (scope, version)
+    VALUES ('projects', 1)
+    ON CONFLICT (scope) DO UPDATE
+        SET version = lexique_versions.version + 1,
+            updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS projects_bump_version ON projects;
+CREATE TRIGGER projects_bump_version
+    AFTER INSERT OR UPDATE OR DELETE ON projects
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_projects_version();
+
+INSERT INTO lexique_versions (scope, version) VALUES ('projects', 1)
+ON CONFLICT (scope) DO NOTHING;
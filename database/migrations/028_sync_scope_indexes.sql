@@ -0,0 +1,15 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 028: Index pour la synchronisation limitée au périmètre utilisateur
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Le téléchargement mobile et le compteur pending_downloads de /api/sync/status
+-- sont filtrés en SQL par projet (projet demandé et projets autorisés). Le coût
+-- de ces requêtes doit suivre le périmètre de l'utilisateur, pas la taille de
+-- toute la base de la collectivité.
+
+-- Points modifiés depuis la dernière sync, projet par projet
+CREATE INDEX IF NOT EXISTS idx_staging_project_updated
+    ON geoclic_staging (project_id, updated_at);
+
+-- Redondant avec le précédent (préfixe project_id)
+DROP INDEX IF EXISTS idx_staging_project;
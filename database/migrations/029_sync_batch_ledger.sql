@@ -0,0 +1,23 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 029: Lots de synchronisation idempotents
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Sur réseau mobile, la réponse de POST /api/sync peut être perdue alors que le
+-- serveur a déjà validé les écritures. Le mobile renvoie alors le même lot avec
+-- la même clé (batch_id) : sync_history sert de registre, le serveur retrouve
+-- le résultat d'origine et ne rejoue pas les écritures.
+--
+-- Le résultat (compteurs, erreurs) est enregistré dans la même transaction que
+-- les écritures : une ligne visible avec batch_id signifie lot déjà appliqué.
+
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS batch_id VARCHAR(64);
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS batch_result JSONB;
+
+-- Une clé de lot par utilisateur ; sert aussi d'arbitre entre deux renvois
+-- simultanés (INSERT ... ON CONFLICT DO NOTHING)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sync_history_batch
+    ON sync_history (user_id, batch_id)
+    WHERE batch_id IS NOT NULL;
+
+COMMENT ON COLUMN sync_history.batch_id IS 'Clé d''idempotence du lot envoyée par le mobile';
+COMMENT ON COLUMN sync_history.batch_result IS 'Résultat des écritures du lot (compteurs, erreurs), renvoyé en cas de rejeu';
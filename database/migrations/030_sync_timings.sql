@@ -0,0 +1,25 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 030: Mesures de performance de la synchronisation
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Chaque POST /api/sync enregistre la durée de ses phases (upload, update,
+-- delete, download, lexique) et la taille des échanges. GET /api/sync/stats
+-- en tire les percentiles p50 / p95 par appareil, utilisateur ou projet, pour
+-- savoir quelle phase ralentit quand "la synchro est lente".
+
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS project_id UUID;
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS upload_ms REAL;
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS update_ms REAL;
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS delete_ms REAL;
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS download_ms REAL;
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS lexique_ms REAL;
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS total_ms REAL;
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS request_bytes INTEGER;
+ALTER TABLE sync_history ADD COLUMN IF NOT EXISTS response_bytes INTEGER;
+
+-- Les statistiques portent sur une fenêtre récente
+CREATE INDEX IF NOT EXISTS idx_sync_history_started_at ON sync_history (started_at);
+
+COMMENT ON COLUMN sync_history.total_ms IS 'Durée totale de POST /api/sync côté serveur (ms)';
+COMMENT ON COLUMN sync_history.request_bytes IS 'Taille du corps de la requête (Content-Length)';
+COMMENT ON COLUMN sync_history.response_bytes IS 'Taille de la réponse JSON';
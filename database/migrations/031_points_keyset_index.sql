@@ -0,0 +1,21 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 031: Pagination par clé de GET /api/points
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- La grille de GéoClic Data pagine sur (created_at, id) au lieu de OFFSET :
+-- chaque page lit l'index à partir du curseur, quelle que soit sa profondeur.
+
+-- La clé de pagination ne doit pas contenir de NULL
+UPDATE geoclic_staging
+SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
+WHERE created_at IS NULL;
+
+ALTER TABLE geoclic_staging ALTER COLUMN created_at SET NOT NULL;
+
+-- Liste complète (tri par défaut de la grille)
+CREATE INDEX IF NOT EXISTS idx_staging_created_id
+    ON geoclic_staging (created_at DESC, id DESC);
+
+-- Liste filtrée par projet
+CREATE INDEX IF NOT EXISTS idx_staging_project_created_id
+    ON geoclic_staging (project_id, created_at DESC, id DESC);
@@ -0,0 +1,98 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 032: Recherche de points (plein texte français + trigrammes)
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- La recherche de GET /api/points ne fait plus LOWER(...) LIKE '%x%' sur toute
+-- la table. Deux colonnes tenues à jour par trigger et indexées en GIN :
+--   - search_vector : tsvector français sans accents (nom > données techniques
+--     > commentaire), pour les mots entiers et le classement par pertinence ;
+--   - search_text   : texte normalisé (minuscules, sans accents) pour les
+--     fragments de mots via pg_trgm (LIKE '%lamp%').
+-- Les libellés du lexique sont cherchés à part (table de quelques centaines de
+-- lignes), ce qui évite de recalculer les points quand un libellé change.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 1. NORMALISATION ET CONFIGURATION FRANÇAISE
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+-- unaccent() n'est pas IMMUTABLE (dictionnaire modifiable) : enveloppe figée
+-- pour pouvoir l'utiliser dans les index et les colonnes calculées
+CREATE OR REPLACE FUNCTION geoclic_search_normalize(p_text TEXT)
+RETURNS TEXT AS $$
+    SELECT lower(public.unaccent('public.unaccent'::regdictionary, COALESCE(p_text, '')))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'geoclic_fr') THEN
+        CREATE TEXT SEARCH CONFIGURATION geoclic_fr (COPY = french);
+        ALTER TEXT SEARCH CONFIGURATION geoclic_fr
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+    END IF;
+END $$;
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 2. COLONNES ET TRIGGER
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+ALTER TABLE geoclic_staging ADD COLUMN IF NOT EXISTS search_text TEXT;
+ALTER TABLE geoclic_staging ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+CREATE OR REPLACE FUNCTION staging_search_update()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_custom TEXT;
+BEGIN
+    -- Valeurs des données techniques (custom_properties), sans les clés
+    SELECT string_agg(value, ' ') INTO v_custom
+    FROM jsonb_each_text(COALESCE(NEW.custom_properties, '{}'::jsonb));
+
+    NEW.search_text := geoclic_search_normalize(concat_ws(' ', NEW.name, NEW.comment, v_custom));
+    NEW.search_vector :=
+        setweight(to_tsvector('geoclic_fr', COALESCE(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('geoclic_fr', COALESCE(v_custom, '')), 'C') ||
+        setweight(to_tsvector('geoclic_fr', COALESCE(NEW.comment, '')), 'D');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS staging_search_update ON geoclic_staging;
+
+CREATE TRIGGER staging_search_update
+    BEFORE INSERT OR UPDATE OF name, comment, custom_properties ON geoclic_staging
+    FOR EACH ROW EXECUTE FUNCTION staging_search_update();
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 3. AMORÇAGE DES POINTS EXISTANTS
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Sans journal de sync ni updated_at : le calcul de l'index de recherche n'est
+-- pas une modification du point (les mobiles ne doivent pas tout retélécharger).
+
+ALTER TABLE geoclic_staging DISABLE TRIGGER staging_log_change;
+ALTER TABLE geoclic_staging DISABLE TRIGGER update_staging_modtime;
+ALTER TABLE geoclic_staging DISABLE TRIGGER staging_detect_zone;
+
+UPDATE geoclic_staging SET name = name WHERE search_vector IS NULL;
+
+ALTER TABLE geoclic_staging ENABLE TRIGGER staging_log_change;
+ALTER TABLE geoclic_staging ENABLE TRIGGER update_staging_modtime;
+ALTER TABLE geoclic_staging ENABLE TRIGGER staging_detect_zone;
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 4. INDEX
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+CREATE INDEX IF NOT EXISTS idx_staging_search_vector
+    ON geoclic_staging USING GIN (search_vector);
+
+CREATE INDEX IF NOT EXISTS idx_staging_search_trgm
+    ON geoclic_staging USING GIN (search_text gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_lexique_label_trgm
+    ON lexique USING GIN (geoclic_search_normalize(label) gin_trgm_ops);
+
+COMMENT ON COLUMN geoclic_staging.search_text IS 'Nom, commentaire et données techniques normalisés (minuscules, sans accents) pour pg_trgm';
+COMMENT ON COLUMN geoclic_staging.search_vector IS 'Index plein texte français (geoclic_fr) : nom (A), données techniques (C), commentaire (D)';
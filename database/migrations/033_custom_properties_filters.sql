@@ -0,0 +1,59 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 033: Filtres typés sur les données techniques (custom_properties)
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Les filtres custom_filters de GET /api/points acceptent égalité, listes de
+-- valeurs (IN) et plages numériques ou de dates selon le type déclaré dans
+-- type_field_configs.
+--   - égalité / IN : custom_properties @> {...}, index GIN jsonb_path_ops ;
+--   - plages : fonctions de conversion tolérantes ci-dessous. L'API crée un
+--     index d'expression (CREATE INDEX CONCURRENTLY) pour les champs les plus
+--     filtrés, nommé idx_cp_num_<hash> / idx_cp_date_<hash>.
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 1. INDEX GIN
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+CREATE INDEX IF NOT EXISTS idx_staging_custom_properties
+    ON geoclic_staging USING GIN (custom_properties jsonb_path_ops);
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 2. CONVERSIONS (IMMUTABLE, utilisables dans un index d'expression)
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Les valeurs saisies sur le terrain ne sont pas toujours propres ("6,5",
+-- "n/a") : une valeur non convertible donne NULL au lieu d'une erreur.
+
+CREATE OR REPLACE FUNCTION geoclic_jsonb_numeric(p_props JSONB, p_key TEXT)
+RETURNS NUMERIC AS $$
+DECLARE
+    v_text TEXT := btrim(p_props->>p_key);
+BEGIN
+    IF v_text IS NULL OR v_text !~ '^-?[0-9]+([.,][0-9]+)?$' THEN
+        RETURN NULL;
+    END IF;
+    RETURN replace(v_text, ',', '.')::numeric;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE;
+
+CREATE OR REPLACE FUNCTION geoclic_jsonb_date(p_props JSONB, p_key TEXT)
+RETURNS DATE AS $$
+DECLARE
+    v_text TEXT := btrim(p_props->>p_key);
+BEGIN
+    -- Format ISO (AAAA-MM-JJ, éventuellement suivi de l'heure) uniquement :
+    -- indépendant de DateStyle, donc IMMUTABLE
+    IF v_text IS NULL OR v_text !~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}' THEN
+        RETURN NULL;
+    END IF;
+    RETURN make_date(
+        substr(v_text, 1, 4)::int,
+        substr(v_text, 6, 2)::int,
+        substr(v_text, 9, 2)::int
+    );
+EXCEPTION WHEN OTHERS THEN
+    RETURN NULL;  -- date impossible (2024-02-31)
+END;
+$$ LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE;
+
+COMMENT ON FUNCTION geoclic_jsonb_numeric IS 'Valeur numérique d''une donnée technique (NULL si non numérique)';
+COMMENT ON FUNCTION geoclic_jsonb_date IS 'Date ISO d''une donnée technique (NULL si invalide)';
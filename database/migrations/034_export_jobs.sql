@@ -0,0 +1,45 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 034: Jobs d'export asynchrones
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Les gros exports (points GeoJSON/CSV/ZIP, photos, QR codes) tournent en
+-- arrière-plan : POST /api/exports crée un job, GET /api/exports/{id} suit sa
+-- progression, GET /api/exports/{id}/download sert le fichier (Range).
+--
+-- Un résultat est réutilisé tant que les données n'ont pas changé : cache_key
+-- (type + paramètres) et data_version (dernier txid terminé de geoclic_staging_changes).
+-- La table est partagée par les workers uvicorn ; les fichiers sont sur disque
+-- (EXPORT_STORAGE_PATH).
+
+CREATE TABLE IF NOT EXISTS export_jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    kind VARCHAR(30) NOT NULL,
+    params JSONB NOT NULL DEFAULT '{}'::jsonb,
+    cache_key VARCHAR(64) NOT NULL,
+    data_version BIGINT NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending, running, done, error
+    progress_done INTEGER NOT NULL DEFAULT 0,
+    progress_total INTEGER,
+    bytes_written BIGINT NOT NULL DEFAULT 0,
+    file_path TEXT,
+    filename VARCHAR(255),
+    media_type VARCHAR(100),
+    error TEXT,
+    created_by UUID REFERENCES geoclic_users(id) ON DELETE SET NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    expires_at TIMESTAMPTZ
+);
+
+-- Recherche d'un résultat réutilisable
+CREATE INDEX IF NOT EXISTS idx_export_jobs_cache
+    ON export_jobs (cache_key, data_version, created_at DESC);
+
+-- Purge des jobs expirés
+CREATE INDEX IF NOT EXISTS idx_export_jobs_expires ON export_jobs (expires_at);
+
+COMMENT ON TABLE export_jobs IS 'Exports exécutés en arrière-plan, résultat sur disque réutilisé tant que les données ne changent pas';
+COMMENT ON COLUMN export_jobs.data_version IS 'Dernier txid terminé (sous le xmin du snapshot) de geoclic_staging_changes au lancement du job';
+COMMENT ON COLUMN export_jobs.updated_at IS 'Battement de cœur : un job en cours sans mise à jour est considéré interrompu';
@@ -0,0 +1,25 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 035: Index alignés sur les filtres des points
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Listes et exports de points passent par un compilateur de filtres unique
+-- (api/services/point_filters.py) qui produit toujours les mêmes prédicats :
+--   project_id = :project_id
+--   sync_status = :sync_status
+--   lexique_code = ANY(:lexique_codes)
+--   created_at >= :date_start / created_at < :date_end + 1
+--   id = ANY(:point_ids)
+-- triés par created_at DESC, id DESC.
+--
+-- Les index (colonne filtrée, created_at DESC, id DESC) servent le filtre et
+-- le tri ; ils remplacent les index simples sur lexique_code et sync_status
+-- (préfixe identique). project_id est couvert par la migration 031.
+
+CREATE INDEX IF NOT EXISTS idx_staging_lexique_created_id
+    ON geoclic_staging (lexique_code, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_staging_sync_status_created_id
+    ON geoclic_staging (sync_status, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_staging_lexique;
+DROP INDEX IF EXISTS idx_staging_sync_status;
@@ -0,0 +1,212 @@
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Migration 036: Chemin matérialisé du lexique
+-- GéoClic Suite V14
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Le filtrage par catégorie dépliait l'arborescence de plusieurs façons
+-- (listes de codes, LIKE 'ECL%', LIKE 'ECL_%') et get_lexique_path()
+-- remontait les parents pour chaque ligne affichée.
+--
+-- Chaque entrée du lexique porte désormais son chemin :
+--   lexique.path_codes       ARRAY['ECL', 'ECL_LAM', 'ECL_LAM_LED']
+--   lexique.full_path        'Éclairage > Lampadaires > LED'
+-- et chaque point le chemin de sa catégorie :
+--   geoclic_staging.lexique_path
+--
+-- "Tous les points sous la catégorie ECL" devient un seul prédicat indexé
+-- (GIN) : lexique_path @> ARRAY['ECL'].
+--
+-- Tableau de codes plutôt que ltree : les codes du lexique sont libres
+-- (points, tirets, accents) alors que les labels ltree sont restreints, et
+-- aucune extension supplémentaire n'est requise.
+--
+-- Résolution d'un code : l'entrée du projet, sinon l'entrée partagée
+-- (project_id NULL), sinon toute entrée portant ce code.
+
+ALTER TABLE lexique ADD COLUMN IF NOT EXISTS path_codes TEXT[];
+ALTER TABLE lexique ADD COLUMN IF NOT EXISTS full_path TEXT;
+ALTER TABLE geoclic_staging ADD COLUMN IF NOT EXISTS lexique_path TEXT[];
+
+COMMENT ON COLUMN lexique.path_codes IS 'Codes de la racine jusqu''à l''entrée (maintenu par trigger)';
+COMMENT ON COLUMN lexique.full_path IS 'Libellés de la racine jusqu''à l''entrée, séparés par " > " (maintenu par trigger)';
+COMMENT ON COLUMN geoclic_staging.lexique_path IS 'Chemin de codes de la catégorie du point (copie de lexique.path_codes)';
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 1. RÉSOLUTION DU CHEMIN D'UN CODE
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION geoclic_lexique_path(p_code VARCHAR, p_project_id UUID)
+RETURNS TEXT[] AS $$
+    SELECT CASE WHEN p_code IS NOT NULL THEN
+        COALESCE(
+            (SELECT path_codes FROM lexique
+             WHERE code = p_code
+             ORDER BY (project_id IS NOT DISTINCT FROM p_project_id) DESC,
+                      (project_id IS NULL) DESC
+             LIMIT 1),
+            -- Code absent du lexique : le point reste trouvable par son code
+            ARRAY[p_code::text]
+        )
+    END
+$$ LANGUAGE sql STABLE;
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 2. TRIGGERS DU LEXIQUE
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+-- Calcul du chemin d'une entrée à partir de celui de son parent
+CREATE OR REPLACE FUNCTION lexique_path_update()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_parent_codes TEXT[];
+    v_parent_path TEXT;
+BEGIN
+    IF NEW.parent_code IS NOT NULL THEN
+        SELECT path_codes, full_path INTO v_parent_codes, v_parent_path
+        FROM lexique
+        WHERE code = NEW.parent_code AND id IS DISTINCT FROM NEW.id
+        ORDER BY (project_id IS NOT DISTINCT FROM NEW.project_id) DESC,
+                 (project_id IS NULL) DESC
+        LIMIT 1;
+    END IF;
+
+    IF NEW.code = ANY(v_parent_codes) THEN
+        RAISE EXCEPTION 'Cycle dans le lexique: % est un ancêtre de %', NEW.code, NEW.parent_code;
+    END IF;
+
+    NEW.path_codes := COALESCE(v_parent_codes, ARRAY[]::TEXT[]) || NEW.code::TEXT;
+    NEW.full_path := concat_ws(' > ', v_parent_path, NEW.label);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS lexique_path_update ON lexique;
+CREATE TRIGGER lexique_path_update
+    BEFORE INSERT OR UPDATE OF code, parent_code, label, project_id ON lexique
+    FOR EACH ROW EXECUTE FUNCTION lexique_path_update();
+
+-- Propagation aux descendants et aux points quand un chemin change
+CREATE OR REPLACE FUNCTION lexique_path_cascade()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_codes TEXT[] := ARRAY[]::TEXT[];
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.code = OLD.code
+       AND NEW.path_codes IS NOT DISTINCT FROM OLD.path_codes
+       AND NEW.full_path IS NOT DISTINCT FROM OLD.full_path THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP <> 'DELETE' THEN
+        v_codes := v_codes || NEW.code::TEXT;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        v_codes := v_codes || OLD.code::TEXT;
+    END IF;
+
+    -- Les enfants sont recalculés par lexique_path_update, qui cascade à son tour
+    UPDATE lexique SET parent_code = parent_code
+    WHERE parent_code = ANY(v_codes);
+
+    -- Le chemin des points ne dépend que des codes : un changement de libellé
+    -- ne touche aucun point
+    UPDATE geoclic_staging
+    SET lexique_path = geoclic_lexique_path(lexique_code, project_id)
+    WHERE lexique_code = ANY(v_codes)
+      AND lexique_path IS DISTINCT FROM geoclic_lexique_path(lexique_code, project_id);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS lexique_path_cascade ON lexique;
+CREATE TRIGGER lexique_path_cascade
+    AFTER INSERT OR DELETE OR UPDATE OF code, parent_code, label, project_id ON lexique
+    FOR EACH ROW EXECUTE FUNCTION lexique_path_cascade();
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 3. TRIGGER DES POINTS
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION staging_lexique_path_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.lexique_path := geoclic_lexique_path(NEW.lexique_code, NEW.project_id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS staging_lexique_path_update ON geoclic_staging;
+CREATE TRIGGER staging_lexique_path_update
+    BEFORE INSERT OR UPDATE OF lexique_code, project_id ON geoclic_staging
+    FOR EACH ROW EXECUTE FUNCTION staging_lexique_path_update();
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 4. AMORÇAGE
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- Lexique : niveau par niveau, une entrée est calculée quand son parent l'est.
+-- Ni cascade ni changement de version : le contenu du lexique ne change pas.
+
+ALTER TABLE lexique DISABLE TRIGGER lexique_path_cascade;
+ALTER TABLE lexique DISABLE TRIGGER lexique_bump_version;
+
+DO $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    LOOP
+        UPDATE lexique l SET parent_code = l.parent_code
+        WHERE l.path_codes IS NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM lexique p
+              WHERE p.code = l.parent_code AND p.id <> l.id AND p.path_codes IS NULL
+          );
+        GET DIAGNOSTICS v_count = ROW_COUNT;
+        EXIT WHEN v_count = 0;
+    END LOOP;
+
+    -- Entrées restantes (parents en boucle) : calculées telles quelles
+    UPDATE lexique SET parent_code = parent_code WHERE path_codes IS NULL;
+END $$;
+
+ALTER TABLE lexique ENABLE TRIGGER lexique_path_cascade;
+ALTER TABLE lexique ENABLE TRIGGER lexique_bump_version;
+
+-- Points : sans journal de sync ni updated_at (cf. migration 032)
+ALTER TABLE geoclic_staging DISABLE TRIGGER staging_log_change;
+ALTER TABLE geoclic_staging DISABLE TRIGGER update_staging_modtime;
+ALTER TABLE geoclic_staging DISABLE TRIGGER staging_detect_zone;
+
+UPDATE geoclic_staging
+SET lexique_path = geoclic_lexique_path(lexique_code, project_id)
+WHERE lexique_path IS NULL AND lexique_code IS NOT NULL;
+
+ALTER TABLE geoclic_staging ENABLE TRIGGER staging_log_change;
+ALTER TABLE geoclic_staging ENABLE TRIGGER update_staging_modtime;
+ALTER TABLE geoclic_staging ENABLE TRIGGER staging_detect_zone;
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 5. INDEX
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- @> (sous-arbre d'une catégorie) et && (sous-arbres de plusieurs catégories)
+
+CREATE INDEX IF NOT EXISTS idx_staging_lexique_path
+    ON geoclic_staging USING GIN (lexique_path);
+
+CREATE INDEX IF NOT EXISTS idx_lexique_path_codes
+    ON lexique USING GIN (path_codes);
+
+-- ═══════════════════════════════════════════════════════════════════════════════
+-- 6. get_lexique_path() LIT LE CHEMIN MATÉRIALISÉ
+-- ═══════════════════════════════════════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION get_lexique_path(p_code VARCHAR, p_separator VARCHAR DEFAULT ' > ')
+RETURNS TEXT AS $$
+    SELECT COALESCE(
+        (SELECT replace(full_path, ' > ', p_separator) FROM lexique
+         WHERE code = p_code
+         ORDER BY (project_id IS NULL) DESC
+         LIMIT 1),
+        ''
+    )
+$$ LANGUAGE sql STABLE;
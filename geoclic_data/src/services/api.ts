@@ -399,8 +399,11 @@ export const pointsAPI = {
     project_id?: string
     lexique_code?: string
     search?: string
+    custom_filters?: string
     page?: number
     page_size?: number
+    cursor?: string
+    total_mode?: 'exact' | 'estimated'
   }) {
     const response = await api.get('/points', { params })
     return {
@@ -70,6 +70,7 @@ export const usePointsStore = defineStore('points', () => {
   const loading = ref(false)
   const error = ref<string | null>(null)
   const total = ref(0)
+  const totalEstimated = ref(false)
 
   // Filtres
   const filters = ref({
@@ -85,6 +86,10 @@ export const usePointsStore = defineStore('points', () => {
     page_size: 50,
   })
 
+  // Curseurs de pagination par clé (page -> curseur), valables pour un jeu de filtres
+  let pageCursors: Record<number, string> = {}
+  let pageCursorsKey = ''
+
   // Rayon de détection doublon (en mètres)
   const duplicateRadius = ref(5)
 
@@ -145,18 +150,39 @@ export const usePointsStore = defineStore('points', () => {
         ? JSON.stringify(Object.fromEntries(Object.entries(cf).filter(([, v]) => v)))
         : undefined
 
-      const params = {
+      const filterParams = {
         project_id: filters.value.projet_id || undefined,
         lexique_code: lexiqueCode,
         search: filters.value.search || undefined,
         custom_filters: customFiltersJson,
-        page: pagination.value.page,
+      }
+      const hasFilters = Object.values(filterParams).some(v => v)
+
+      // Les curseurs ne valent que pour les filtres et la taille de page qui les ont produits
+      const cursorsKey = JSON.stringify([filterParams, pagination.value.page_size])
+      if (cursorsKey !== pageCursorsKey) {
+        pageCursors = {}
+        pageCursorsKey = cursorsKey
+      }
+      const page = pagination.value.page
+
+      const params = {
+        ...filterParams,
+        page,
         page_size: pagination.value.page_size,
+        // Page suivante déjà connue : pagination par clé, sans OFFSET
+        cursor: pageCursors[page],
+        // Sans filtre, le total exact coûte un parcours complet de la table
+        total_mode: hasFilters ? 'exact' as const : 'estimated' as const,
       }
 
       const response = await pointsAPI.getAll(params)
       points.value = response.items || response
       total.value = response.total || points.value.length
+      totalEstimated.value = !!response.total_estimated
+      if (response.next_cursor) {
+        pageCursors[page + 1] = response.next_cursor
+      }
     } catch (err: any) {
       error.value = err.response?.data?.detail || 'Erreur lors du chargement des points'
     } finally {
@@ -368,6 +394,7 @@ export const usePointsStore = defineStore('points', () => {
     loading,
     error,
     total,
+    totalEstimated,
     filters,
     pagination,
     duplicateRadius,
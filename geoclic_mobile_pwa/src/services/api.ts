@@ -124,7 +124,10 @@ export interface ChampDynamique {
 
 export interface SyncRequest {
   device_id: string
+  batch_id?: string     // Clé d'idempotence, identique à chaque renvoi du lot
   last_sync_at?: string
+  cursor?: string       // next_cursor de la sync précédente
+  page_size?: number
   points_to_upload: Point[]
 }
 
@@ -132,8 +135,13 @@ export interface SyncResponse {
   success: boolean
   sync_id: number
   server_time: string
+  replayed?: boolean    // Lot déjà appliqué (renvoi)
   points_uploaded: number
+  points_already_uploaded?: string[]  // Points déjà reçus lors d'une sync précédente
   points_to_download: Point[]
+  points_deleted_ids: string[]
+  next_cursor?: string
+  has_more: boolean
   errors: string[]
 }
 
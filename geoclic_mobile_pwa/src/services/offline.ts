@@ -186,6 +186,8 @@ class OfflineService {
 
     await this.db!.put('pendingPoints', {
       ...point,
+      // Identifiant définitif du point, envoyé à la sync : un renvoi ne le recrée pas
+      id: point.id || localId,
       _localId: localId,
       _createdAt: Date.now(),
       _attempts: 0
@@ -390,6 +392,15 @@ class OfflineService {
     await this.setMetadata('lastSyncAt', timestamp)
   }
 
+  // Curseur opaque renvoyé par /sync (next_cursor) : point de reprise des téléchargements
+  async getSyncCursor(): Promise<string | undefined> {
+    return this.getMetadata<string>('syncCursor')
+  }
+
+  async setSyncCursor(cursor: string): Promise<void> {
+    await this.setMetadata('syncCursor', cursor)
+  }
+
   // ========== STATISTIQUES ==========
 
   async getStats(): Promise<{
@@ -320,6 +320,7 @@ export const usePointsStore = defineStore('points', () => {
 
         const localPoint: Point = {
           ...point,
+          id: point.id || localId,
           _localId: localId,
           _pendingSync: true,
           sync_status: 'pending'
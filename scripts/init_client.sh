@@ -137,6 +137,18 @@ MIGRATIONS=(
     "022_apply_project_id_type_field_configs.sql"
     "023_push_subscriptions.sql"
     "024_contact_messages.sql"
+    "025_sync_change_log.sql"
+    "026_lexique_versions.sql"
+    "027_projects_version.sql"
+    "028_sync_scope_indexes.sql"
+    "029_sync_batch_ledger.sql"
+    "030_sync_timings.sql"
+    "031_points_keyset_index.sql"
+    "032_points_search.sql"
+    "033_custom_properties_filters.sql"
+    "034_export_jobs.sql"
+    "035_points_filter_indexes.sql"
+    "036_lexique_path.sql"
 )
 
 applied=0